@@ -0,0 +1,206 @@
+"""Answer cache for repeated REPL questions.
+
+A question asked again while the data behind its answer is still fresh is
+answered from memory, without the LLM or the tools. Questions are matched
+on a normalized form ('BTC price?' and 'what's the btc price' are the same
+question; tense and time words are kept, so 'what was the BTC price' is
+not 'BTC price now') and must name the same numbers. With
+ANSWER_CACHE_MATCH=similar, near-identical phrasings match too: their
+embeddings must have cosine similarity of at least ANSWER_CACHE_SIMILARITY,
+and they must name the same tickers and numbers.
+Embeddings are hashed character trigrams by default, or come from a local
+Ollama model with ANSWER_CACHE_EMBED_MODEL.
+
+An answer expires with the data behind it: `providers.cache.trace()` records
+when every cached response the tools read goes stale, and the earliest of
+those is the answer's expiry (at most ANSWER_CACHE_MAX_TTL). Follow-ups
+that lean on the conversation ('and ETH?', 'chart it') are never cached.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from providers import cache
+
+logger = logging.getLogger(__name__)
+
+MATCH = os.getenv("ANSWER_CACHE_MATCH", "exact").lower()  # off | exact | similar
+SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.9"))
+EMBED_MODEL = os.getenv("ANSWER_CACHE_EMBED_MODEL", "")
+MAX_TTL = float(os.getenv("ANSWER_CACHE_MAX_TTL", "600"))
+MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+
+_WORD = re.compile(r"[a-z0-9$%]+(?:[.\-/][a-z0-9]+)*")
+_CONTRACTIONS = {"what's": "what is", "whats": "what is", "how's": "how is", "where's": "where is"}
+_FILLER = frozenset("a an the please pls what is are me tell show give get".split())
+# Tickers, indicator names and numbers: similar questions must agree on these
+_ANCHOR = re.compile(r"\b(?:[A-Z]{2,}[A-Z0-9.\-]*|\d[\d.,%]*)\b")
+_FOLLOW_UP = re.compile(
+    r"^\s*(?:and|also|then|ok|okay|same|what about|how about)\b|\b(?:it|its|they|them|their|those|these)\b",
+    re.IGNORECASE,
+)
+_DIMS = 1024
+
+
+def normalize(query):
+    """Lower-case words without punctuation and filler: 'What's the BTC price?' -> 'btc price'."""
+    text = query.lower()
+    for short, long in _CONTRACTIONS.items():
+        text = text.replace(short, long)
+    words = _WORD.findall(text)
+    kept = [w for w in words if w not in _FILLER]
+    return " ".join(kept or words)
+
+
+def anchors(query):
+    return frozenset(a.upper() for a in _ANCHOR.findall(query))
+
+
+def _agree(a, b):
+    """Anchors of two queries with the same normalized form name the same
+    numbers, and the same tickers unless one side wrote them in lower case."""
+    numbers_a = {x for x in a if x[0].isdigit()}
+    numbers_b = {x for x in b if x[0].isdigit()}
+    tickers_a, tickers_b = a - numbers_a, b - numbers_b
+    return numbers_a == numbers_b and (not tickers_a or not tickers_b or tickers_a == tickers_b)
+
+
+def cacheable(query):
+    """False for follow-ups whose meaning depends on the previous turns."""
+    return not _FOLLOW_UP.search(query)
+
+
+def _trigram_vector(text):
+    import numpy as np
+
+    vec = np.zeros(_DIMS, dtype=np.float32)
+    padded = f" {text} "
+    for i in range(len(padded) - 2):
+        vec[zlib.crc32(padded[i:i + 3].encode()) % _DIMS] += 1.0
+    return vec
+
+
+class _Embedder:
+    """Unit-length query vectors from the Ollama model, or trigrams if it's unset or down."""
+
+    def __init__(self, model=EMBED_MODEL):
+        self.model = model
+        self._client = None
+
+    def __call__(self, text):
+        import numpy as np
+
+        vec = None
+        if self.model:
+            try:
+                if self._client is None:
+                    from langchain_ollama import OllamaEmbeddings
+
+                    self._client = OllamaEmbeddings(model=self.model)
+                vec = np.asarray(self._client.embed_query(text), dtype=np.float32)
+            except Exception as e:
+                logger.warning(f"Embedding model {self.model!r} unavailable ({e}); using trigram similarity")
+                self.model = ""
+        if vec is None:
+            vec = _trigram_vector(text)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+
+@dataclass
+class Entry:
+    query: str
+    answer: str
+    steps: list
+    created: float
+    expires: float  # time.monotonic()
+    anchors: frozenset = frozenset()
+    vector: object = None
+    hits: int = 0
+
+
+class AnswerCache:
+    """Normalized-question -> answer entries, LRU-bounded, expiring with their data."""
+
+    def __init__(self, match=MATCH, similarity=SIMILARITY, max_entries=MAX_ENTRIES, embed=None):
+        self.match = match
+        self.similarity = similarity
+        self.max_entries = max_entries
+        self.embed = embed or _Embedder()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query, now=None):
+        """The fresh entry answering `query`, or None."""
+        if self.match == "off" or not cacheable(query):
+            return None
+        now = time.monotonic() if now is None else now
+        key = normalize(query)
+        vector = self.embed(key) if self.match == "similar" else None
+        with self._lock:
+            for stale in [k for k, e in self._entries.items() if e.expires <= now]:
+                del self._entries[stale]
+            wanted = anchors(query)
+            entry = self._entries.get(key)
+            if entry is not None and not _agree(entry.anchors, wanted):
+                entry = None  # '1,000' and '1 000' normalize alike
+            if entry is None and vector is not None:
+                best = 0.0
+                for candidate in self._entries.values():
+                    if candidate.anchors != wanted or candidate.vector is None:
+                        continue
+                    score = float(candidate.vector @ vector)
+                    if score >= self.similarity and score > best:
+                        entry, best = candidate, score
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(normalize(entry.query))
+            entry.hits += 1
+            self.hits += 1
+            return entry
+
+    def put(self, query, answer, steps=(), expiries=(), now=None):
+        """Cache an answer until the earliest of `expiries` (from cache.trace()).
+
+        An answer whose tools read nothing traceable is kept for a quote's
+        TTL; one that used no tools, for ANSWER_CACHE_MAX_TTL.
+        """
+        if self.match == "off" or not cacheable(query):
+            return None
+        now = time.monotonic() if now is None else now
+        expires = min([now + MAX_TTL, *expiries])
+        if steps and not expiries:
+            expires = min(expires, now + cache.TTLS["quote"])
+        if expires - now < 1:
+            return None
+        key = normalize(query)
+        entry = Entry(
+            query, answer, list(steps), now, expires, anchors(query),
+            self.embed(key) if self.match == "similar" else None,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "match": self.match,
+            }
@@ -0,0 +1,305 @@
+"""Bulk backfill: years of daily bars for a universe of symbols, one NPZ file each.
+
+Reads a universe file (one symbol per line; '#' comments, and CSV files
+whose first column is the symbol, work too) and splits --start..--end into
+provider-sized chunks of RANGE_DAYS (set in each provider module, one
+request per chunk). Chunks run concurrently, every request still goes
+through the provider's rate limiter (providers/ratelimit.py), and a chunk
+that meets a spent budget waits for it instead of failing.
+
+Every finished chunk is saved under OUT/.parts/ as a checkpoint, so an
+interrupted run resumes where it stopped: run the same command again. A
+symbol whose OUT/SYMBOL.npz already starts early enough only has the days
+from its saved end on fetched (the last saved bar may have been partial),
+so rerunning the same command on a later day just adds the new bars. Once
+all of a symbol's chunks are in they are merged into OUT/SYMBOL.npz —
+compressed columns ts, open, high, low, close, volume (see Bars.to_npz),
+plus provider, start and end — and the parts are removed. With --archive
+each symbol's bars are also written into the memory-mapped bar archive
+(providers/archive.py), where the agent's tools read them without a
+request. Progress and throughput go to stderr every few seconds.
+
+Run:  python backfill.py universe.txt --start 2015-01-01 -o data/backfill
+      python backfill.py universe.txt --start 2020-01-01 --end 2024-12-31 --provider tiingo -c 4
+      python backfill.py universe.txt --start 2015-01-01 --archive
+
+USDT pairs go to Binance and everything else to Yahoo Finance unless
+--provider says otherwise. Exits non-zero if any chunk failed; rerunning
+retries only those.
+"""
+
+import argparse
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from providers import archive, bar_store, binance, polygon, ratelimit, tiingo, yahoo_finance
+from providers.bars import Bars
+
+# Providers with fetch_range(symbol, start, end) and RANGE_DAYS
+SOURCES = {"yahoo_finance": yahoo_finance, "tiingo": tiingo, "polygon": polygon, "binance": binance}
+
+# Seconds between retries of a chunk whose provider is out of budget
+RATE_LIMIT_POLL = 1.0
+
+
+@dataclass(frozen=True)
+class Chunk:
+    symbol: str
+    provider: str
+    start: int  # UTC-midnight epoch seconds, inclusive
+    end: int
+
+    @property
+    def label(self):
+        return f"{bar_store.format_date(self.start)}_{bar_store.format_date(self.end)}"
+
+
+def read_universe(lines):
+    """Symbols from a universe file, upper-cased and de-duplicated in order."""
+    symbols = []
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        symbol = line.split(",", 1)[0].strip().strip('"').upper()
+        if symbol and symbol not in ("SYMBOL", "TICKER"):
+            symbols.append(symbol)
+    return list(dict.fromkeys(symbols))
+
+
+def source_for(symbol, provider="auto"):
+    if provider != "auto":
+        return provider
+    return "binance" if symbol.endswith("USDT") else "yahoo_finance"
+
+
+def chunk_range(symbol, provider, start, end):
+    """[start, end] split into consecutive chunks of the provider's RANGE_DAYS."""
+    step = SOURCES[provider].RANGE_DAYS * 86400
+    return [Chunk(symbol, provider, lo, min(end, lo + step - 86400)) for lo in range(start, end + 1, step)]
+
+
+def _safe(symbol):
+    return symbol.replace("/", "_")
+
+
+def symbol_path(out, symbol):
+    return Path(out) / f"{_safe(symbol)}.npz"
+
+
+def part_path(out, chunk):
+    return Path(out) / ".parts" / _safe(chunk.symbol) / f"{chunk.label}.npz"
+
+
+def _saved(path):
+    """(provider, start, end) of a finished symbol file, or None if there is none."""
+    try:
+        with np.load(path) as data:
+            return str(data["provider"]), int(data["start"]), int(data["end"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def fetch_chunk(chunk, max_wait):
+    """The chunk's bars, waiting up to `max_wait` seconds for rate-limit budget."""
+    module = SOURCES[chunk.provider]
+    deadline = time.monotonic() + max_wait
+    while True:
+        try:
+            return module.fetch_range(chunk.symbol, chunk.start, chunk.end)
+        except ratelimit.RateLimited:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(RATE_LIMIT_POLL)
+
+
+def merge(out, symbol, chunks, to_archive=False):
+    """Combine a symbol's saved parts into OUT/SYMBOL.npz (and the bar archive); return its bar count.
+
+    Parts that extend an existing file from the same provider are merged
+    into it; where both have a bar for a day, the newly fetched one wins.
+    """
+    parts = [Bars.from_npz(part_path(out, c)) for c in chunks]
+    start = chunks[0].start
+    saved = _saved(symbol_path(out, symbol))
+    if saved is not None and saved[0] == chunks[0].provider and saved[1] <= start <= saved[2] + 86400:
+        parts.append(Bars.from_npz(symbol_path(out, symbol)))
+        start = saved[1]
+    bars = Bars.concat(parts)
+    bars = bars[np.argsort(bars.ts, kind="stable")]
+    _, first = np.unique(bars.ts, return_index=True)
+    bars = bars[first]
+    bars.to_npz(
+        symbol_path(out, symbol),
+        provider=np.array(chunks[0].provider), start=np.int64(start), end=np.int64(chunks[-1].end),
+    )
+    if to_archive:
+        archive.ARCHIVE.write(chunks[0].provider, symbol, "1d", bars)
+    shutil.rmtree(part_path(out, chunks[0]).parent, ignore_errors=True)
+    return len(bars)
+
+
+class Progress:
+    """Counters for a run, printed as one status line every `every` seconds."""
+
+    def __init__(self, symbols, chunks, stream=sys.stderr, every=5.0):
+        self.symbols, self.chunks = symbols, chunks
+        self.fetched = self.resumed = self.failed = self.symbols_done = self.bars = 0
+        self.errors = []  # (chunk, message)
+        self.started = time.perf_counter()
+        self.stream, self.every = stream, every
+        self._stop = threading.Event()
+        self._thread = None
+
+    def line(self):
+        elapsed = time.perf_counter() - self.started
+        done = self.fetched + self.resumed + self.failed
+        rate = self.fetched / elapsed if elapsed else 0.0
+        left = self.chunks - done
+        eta = f"{left / rate:.0f}s" if rate and left else "-"
+        return (
+            f"[{elapsed:6.1f}s] chunks {done}/{self.chunks} ({self.resumed} resumed, {self.failed} failed)  "
+            f"symbols {self.symbols_done}/{self.symbols}  {self.bars:,} bars  "
+            f"{rate:.1f} chunks/s  {self.bars / elapsed if elapsed else 0:,.0f} bars/s  ETA {eta}"
+        )
+
+    def _report(self):
+        while not self._stop.wait(self.every):
+            print(self.line(), file=self.stream, flush=True)
+
+    def __enter__(self):
+        if self.every:
+            self._thread = threading.Thread(target=self._report, name="backfill-progress", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        print(self.line(), file=self.stream, flush=True)
+
+    def summary(self):
+        return {
+            "symbols": self.symbols, "symbols_done": self.symbols_done, "chunks": self.chunks,
+            "fetched": self.fetched, "resumed": self.resumed, "failed": self.failed, "bars": self.bars,
+            "seconds": round(time.perf_counter() - self.started, 3),
+            "errors": [f"{c.symbol} {c.label}: {message}" for c, message in self.errors],
+        }
+
+
+def run(
+    symbols, start, end, out, provider="auto", concurrency=8, max_wait=3600.0, stream=sys.stderr, every=5.0,
+    to_archive=False,
+):
+    """Backfill `symbols` over [start, end] (UTC-midnight epoch seconds) into `out`.
+
+    With `to_archive`, every symbol's bars (including ones an earlier run
+    already finished) are written into the bar archive too. Returns
+    Progress.summary(). Raises ValueError for a provider that isn't
+    configured.
+    """
+    plans = {}
+    for symbol in symbols:
+        name = source_for(symbol, provider)
+        if SOURCES[name].tool is None:
+            raise ValueError(f"{name} is not configured (its API key is not set)")
+        saved = _saved(symbol_path(out, symbol))
+        if saved is None or saved[0] != name or saved[1] > start:
+            plans[symbol] = chunk_range(symbol, name, start, end)
+        elif saved[2] < end:
+            plans[symbol] = chunk_range(symbol, name, saved[2], end)  # refetch the last saved day, then extend
+        elif to_archive:
+            archive.ARCHIVE.write(saved[0], symbol, "1d", Bars.from_npz(symbol_path(out, symbol)))
+
+    todo = [c for chunks in plans.values() for c in chunks if not part_path(out, c).exists()]
+    remaining = {symbol: sum(not part_path(out, c).exists() for c in chunks) for symbol, chunks in plans.items()}
+    progress = Progress(len(symbols), sum(len(c) for c in plans.values()), stream, every)
+    progress.resumed = progress.chunks - len(todo)
+    progress.symbols_done = len(symbols) - len(plans)
+    failed = set()
+
+    def finish(symbol):
+        progress.bars += merge(out, symbol, plans[symbol], to_archive)
+        progress.symbols_done += 1
+
+    def fetch(chunk):
+        bars = fetch_chunk(chunk, max_wait)
+        path = part_path(out, chunk)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        bars.to_npz(path)
+        return len(bars)
+
+    with progress, ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="backfill") as pool:
+        for symbol, left in remaining.items():
+            if left == 0:
+                finish(symbol)  # every chunk was saved by an earlier run
+        futures = {pool.submit(fetch, chunk): chunk for chunk in todo}
+        try:
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    progress.failed += 1
+                    progress.errors.append((chunk, str(e)))
+                    failed.add(chunk.symbol)
+                    continue
+                progress.fetched += 1
+                remaining[chunk.symbol] -= 1
+                if remaining[chunk.symbol] == 0 and chunk.symbol not in failed:
+                    finish(chunk.symbol)
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return progress.summary()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("universe", help="file with one symbol per line, or - for stdin")
+    parser.add_argument("--start", required=True, help="first date, YYYY-MM-DD")
+    parser.add_argument("--end", default=time.strftime("%Y-%m-%d", time.gmtime()), help="last date (default today)")
+    parser.add_argument("-o", "--output", default="data/backfill", help="output directory (default data/backfill)")
+    parser.add_argument("--provider", default="auto", choices=["auto", *SOURCES], help="bar source (default auto)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="chunks in flight at once")
+    parser.add_argument("--max-wait", type=float, default=3600.0, help="seconds a chunk may wait for rate-limit budget")
+    parser.add_argument("--progress", type=float, default=5.0, help="seconds between progress lines (0 = off)")
+    parser.add_argument("--archive", action="store_true", help="also write the bars into the bar archive")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.universe == "-" else open(args.universe, encoding="utf-8")
+    with source:
+        symbols = read_universe(source)
+    start, end = bar_store.parse_date(args.start), bar_store.parse_date(args.end)
+    if not symbols or end < start:
+        parser.error("need at least one symbol and --start on or before --end")
+    Path(args.output).mkdir(parents=True, exist_ok=True)
+
+    try:
+        summary = run(
+            symbols, start, end, args.output, args.provider, max(1, args.concurrency), args.max_wait,
+            every=args.progress, to_archive=args.archive,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        print("\nInterrupted; finished chunks are saved, run the same command to resume.", file=sys.stderr)
+        return 130
+
+    print(
+        f"\nBackfilled {summary['symbols_done']}/{summary['symbols']} symbols, {summary['bars']:,} bars, "
+        f"{summary['fetched']} chunks fetched and {summary['resumed']} resumed in {summary['seconds']:.1f}s "
+        f"into {args.output}",
+        file=sys.stderr,
+    )
+    for error in summary["errors"]:
+        print(f"  failed: {error}", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
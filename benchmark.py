@@ -0,0 +1,172 @@
+"""Offline latency benchmark for every provider tool.
+
+Starts the replay stub (stub_server.py) on a fixture directory, points the
+transport at it and calls each tool's query function under increasing
+concurrency, reporting p50/p95/p99 latency, throughput, cache hit rate and
+the average tokens per answer the agent would see (--compact to compare
+TOOL_OUTPUT_MODE=compact).
+Needs no network or API keys, so each performance change can be measured
+on a plain Linux box.
+
+Run:  python benchmark.py
+      python benchmark.py --latency 120 --jitter 60 --error-rate 0.05 --concurrency 1,8,32 --requests 200
+
+The bundled fixtures/sample set is synthetic. To benchmark against real
+responses, record them first:
+      HTTP_RECORD_DIR=fixtures/recorded python -m pytest test_providers.py
+      python benchmark.py --fixtures fixtures/recorded
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+# Queries per tool. Each cycles through its list, so repeats hit the cache.
+WORKLOADS = {
+    "yahoo_finance": ["AAPL", "MSFT", "AAPL, MSFT"],
+    "alpha_vantage": ["AAPL RSI", "AAPL"],
+    "finnhub": ["AAPL"],
+    "polygon": ["AAPL"],
+    "fred": ["CPI"],
+    "binance": ["BTC", "ETH", "BTC, ETH"],
+    "twelve_data": ["AAPL", "AAPL RSI"],
+    "financial_modeling_prep": ["AAPL"],
+    "tiingo": ["AAPL"],
+    "coingecko": ["BTC", "trending", "BTC, ETH"],
+    "consensus_quote": ["AAPL"],
+    "technical_indicators": ["AAPL RSI", "AAPL", "BTCUSDT MACD"],
+    "market_data": ["quote AAPL", "bars AAPL 5", "crypto BTC", "fundamentals AAPL"],
+    "asset_analytics": ["AAPL, MSFT", "BTC, ETH vs BTC 30d"],
+}
+
+_API_KEYS = (
+    "ALPHA_VANTAGE_API_KEY", "FINNHUB_API_KEY", "POLYGON_API_KEY", "FRED_API_KEY",
+    "TWELVE_DATA_API_KEY", "FMP_API_KEY", "TIINGO_API_KEY",
+)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def measure(func, queries, concurrency, requests):
+    """Call func over `requests` queries with `concurrency` workers.
+
+    Returns latencies (seconds), wall time and the number of error outputs.
+    """
+    calls = list(islice(cycle(queries), requests))
+
+    def timed(query):
+        start = time.perf_counter()
+        output = func(query)
+        return time.perf_counter() - start, " error" in output.lower()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, calls))
+    wall = time.perf_counter() - start
+    return [r[0] for r in results], wall, sum(r[1] for r in results)
+
+
+def run(tools, concurrency_levels, requests, clear_cache=True):
+    """Benchmark rows (dicts) for each tool at each concurrency level."""
+    from providers import cache, output
+
+    rows = []
+    for tool in tools:
+        queries = WORKLOADS.get(tool.name)
+        if not queries:
+            continue
+        for concurrency in concurrency_levels:
+            if clear_cache:
+                cache.CACHE.clear()
+            before, tokens_before = cache.stats(), output.stats().get(tool.name, {})
+            latencies, wall, errors = measure(tool.func, queries, concurrency, requests)
+            after, tokens_after = cache.stats(), output.stats().get(tool.name, {})
+            hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+            calls = tokens_after.get("calls", 0) - tokens_before.get("calls", 0)
+            sent = tokens_after.get("sent", 0) - tokens_before.get("sent", 0)
+            rows.append({
+                "tool": tool.name,
+                "concurrency": concurrency,
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "throughput": len(latencies) / wall,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "tokens": sent / calls if calls else 0.0,
+                "errors": errors,
+            })
+    return rows
+
+
+def print_rows(rows):
+    print(
+        f"\n{'Tool':24s} {'Conc':>4s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'req/s':>8s} {'Hit %':>6s} "
+        f"{'Tokens':>6s} {'Err':>4s}"
+    )
+    for r in rows:
+        print(
+            f"{r['tool']:24s} {r['concurrency']:>4d} {r['p50'] * 1000:>8.1f} {r['p95'] * 1000:>8.1f} "
+            f"{r['p99'] * 1000:>8.1f} {r['throughput']:>8.1f} {r['hit_rate'] * 100:>5.0f}% "
+            f"{r.get('tokens', 0):>6.0f} {r['errors']:>4d}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default="fixtures/sample", help="fixture directory")
+    parser.add_argument("--latency", type=float, default=50, help="stub latency per request (ms)")
+    parser.add_argument("--jitter", type=float, default=20, help="uniform +/- jitter (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--concurrency", default="1,8", help="comma-separated worker counts")
+    parser.add_argument("--requests", type=int, default=40, help="calls per tool and concurrency level")
+    parser.add_argument("--tools", default="", help="comma-separated tool names (default: all)")
+    parser.add_argument("--keep-cache", action="store_true", help="don't clear the cache between runs")
+    parser.add_argument("--rate-limits", action="store_true", help="keep the free-tier rate limits")
+    parser.add_argument("--compact", action="store_true", help="measure with TOOL_OUTPUT_MODE=compact")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Before the providers are imported: dummy keys enable every tool, and a
+    # throwaway bar and FRED store makes each run start cold.
+    for key in _API_KEYS:
+        os.environ.setdefault(key, "replay")
+    scratch = tempfile.mkdtemp(prefix="bench-")
+    os.environ["BAR_STORE_PATH"] = os.path.join(scratch, "bars.sqlite")
+    os.environ["FRED_STORE_PATH"] = os.path.join(scratch, "fred.sqlite")
+    if args.compact:
+        os.environ["TOOL_OUTPUT_MODE"] = "compact"
+
+    import stub_server
+    from providers import get_tools, ratelimit, replay
+
+    server = stub_server.serve(
+        args.fixtures, latency=args.latency / 1000, jitter=args.jitter / 1000,
+        error_rate=args.error_rate, seed=args.seed,
+    )
+    replay.STUB_URL = server.url
+    if not args.rate_limits:
+        for name in ratelimit.DEFAULT_LIMITS:
+            ratelimit.SCHEDULER.configure(name, "")
+
+    wanted = {t.strip() for t in args.tools.split(",") if t.strip()}
+    tools = [t for t in get_tools() if not wanted or t.name in wanted]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    print(
+        f"Replaying {args.fixtures} at {args.latency:.0f}±{args.jitter:.0f} ms, "
+        f"{args.error_rate:.0%} 429s; {args.requests} calls per tool and level"
+    )
+    rows = run(tools, levels, args.requests, clear_cache=not args.keep_cache)
+    print_rows(rows)
+    print(f"\nStub: {dict(server.counts)}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
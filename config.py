@@ -1,3 +1,4 @@
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -13,11 +14,32 @@ LLM_INFO = {
 }
 
 
+def llm_rate_limiter(name):
+    """LangChain rate limiter pacing backend `name` through the shared
+    scheduler (providers.ratelimit), or None if it has no limit."""
+    from langchain_core.rate_limiters import BaseRateLimiter
+    from providers import ratelimit
+
+    if ratelimit.remaining(name) is None:
+        return None
+
+    class SchedulerRateLimiter(BaseRateLimiter):
+        def acquire(self, *, blocking=True):
+            return ratelimit.acquire(name, blocking)
+
+        async def aacquire(self, *, blocking=True):
+            return await asyncio.to_thread(ratelimit.acquire, name, blocking)
+
+    return SchedulerRateLimiter()
+
+
 def get_llm():
     """Create an LLM instance based on LLM_PROVIDER env var.
 
     Priority: explicit LLM_PROVIDER > first available key.
     Free options: 'ollama' (local) or 'groq' (cloud, free tier).
+    Requests are paced by the shared rate-limit scheduler (Groq: 30/min by
+    default; set RATE_LIMIT_<BACKEND> to limit the others).
     """
     provider = os.getenv("LLM_PROVIDER", "").lower()
     openai_key = os.getenv("OPENAI_API_KEY")
@@ -29,39 +51,43 @@ def get_llm():
         from langchain_ollama import ChatOllama
         model = os.getenv("OLLAMA_MODEL", "llama3.1")
         print(f"Using Ollama ({model}) — free, local")
-        return ChatOllama(model=model, temperature=0)
+        return ChatOllama(model=model, temperature=0, rate_limiter=llm_rate_limiter("ollama"))
 
     if provider == "groq" and groq_key:
         from langchain_groq import ChatGroq
         model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
         print(f"Using Groq ({model}) — free tier")
-        return ChatGroq(model=model, temperature=0)
+        return ChatGroq(model=model, temperature=0, rate_limiter=llm_rate_limiter("groq"))
 
     if provider == "anthropic" and anthropic_key:
         from langchain_anthropic import ChatAnthropic
         print("Using Anthropic (claude-sonnet-4-5) — ~$0.01-0.04/query")
-        return ChatAnthropic(model="claude-sonnet-4-5-20250929", temperature=0)
+        return ChatAnthropic(
+            model="claude-sonnet-4-5-20250929", temperature=0, rate_limiter=llm_rate_limiter("anthropic")
+        )
 
     if provider == "openai" and openai_key:
         from langchain_openai import ChatOpenAI
         print("Using OpenAI (gpt-4o) — ~$0.01-0.03/query")
-        return ChatOpenAI(model="gpt-4o", temperature=0)
+        return ChatOpenAI(model="gpt-4o", temperature=0, rate_limiter=llm_rate_limiter("openai"))
 
     # Auto-detect: try free options first, then paid
     if groq_key:
         from langchain_groq import ChatGroq
         print("Using Groq (auto-detected) — free tier")
-        return ChatGroq(model="llama-3.3-70b-versatile", temperature=0)
+        return ChatGroq(model="llama-3.3-70b-versatile", temperature=0, rate_limiter=llm_rate_limiter("groq"))
 
     if openai_key:
         from langchain_openai import ChatOpenAI
         print("Using OpenAI (auto-detected) — ~$0.01-0.03/query")
-        return ChatOpenAI(model="gpt-4o", temperature=0)
+        return ChatOpenAI(model="gpt-4o", temperature=0, rate_limiter=llm_rate_limiter("openai"))
 
     if anthropic_key:
         from langchain_anthropic import ChatAnthropic
         print("Using Anthropic (auto-detected) — ~$0.01-0.04/query")
-        return ChatAnthropic(model="claude-sonnet-4-5-20250929", temperature=0)
+        return ChatAnthropic(
+            model="claude-sonnet-4-5-20250929", temperature=0, rate_limiter=llm_rate_limiter("anthropic")
+        )
 
     raise RuntimeError(
         "No LLM configured. Options:\n"
@@ -0,0 +1,29 @@
+"""Fixtures shared by the test modules."""
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def quote_source():
+    """Factory for stub provider modules: an enabled `tool` and a get_quote
+    returning `price` after `delay` seconds, or raising LookupError(error).
+    Each stub counts its calls in `calls`."""
+
+    def make(price, prev=None, volume=None, delay=0.0, error=None):
+        class Source:
+            tool = object()
+            calls = 0
+
+            @classmethod
+            def get_quote(cls, symbol):
+                cls.calls += 1
+                time.sleep(delay)
+                if error:
+                    raise LookupError(error)
+                return {"price": price, "prev_close": prev, "volume": volume}
+
+        return Source
+
+    return make
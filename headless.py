@@ -0,0 +1,190 @@
+"""Headless batch mode: run a file of queries through one shared agent.
+
+Reads queries as JSONL — {"id": ..., "query": ...} per line; the
+request_id/title/body shape of requests.jsonl works too, and a line that
+isn't JSON is taken as the query itself — from a file or stdin. Runs them
+concurrently on one agent, each with its own empty chat history, and writes
+one JSONL result per query as it finishes: the answer, total seconds, and
+a breakdown of LLM calls and tool calls with their timings. A summary with
+throughput and latency percentiles goes to stderr, and with METRICS_FILE
+set the Prometheus metrics (providers/metrics.py) are written there.
+
+Run:  python headless.py queries.jsonl -o results.jsonl --concurrency 8
+      echo '{"query": "BTC price?"}' | python headless.py -
+      HTTP_STUB_URL=http://127.0.0.1:8765 python headless.py queries.jsonl   # against the replay stub
+
+Exits non-zero if any query failed, so cron and pipelines notice.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import sys
+import time
+
+from benchmark import percentile
+
+logger = logging.getLogger(__name__)
+
+
+def read_queries(lines):
+    """Yield {"id", "query"} dicts from JSONL (or plain text) lines."""
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = line
+        if isinstance(record, str):
+            record = {"query": record}
+        query = record.get("query") or record.get("body") or record.get("title")
+        if not query:
+            raise ValueError(f"line {n}: no 'query' field")
+        yield {"id": str(record.get("id") or record.get("request_id") or n), "query": query}
+
+
+def _timings():
+    """A LangChain callback handler recording the LLM and tool calls of one query."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class Timings(BaseCallbackHandler):
+        run_inline = True  # called on the event loop, so timings aren't skewed by a thread hop
+
+        def __init__(self):
+            self.tools = []
+            self.llm = {"calls": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0}
+            self._started = {}
+
+        def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+            self._started[run_id] = (time.perf_counter(), serialized.get("name"), input_str)
+
+        def _tool_done(self, run_id, **fields):
+            started, name, tool_input = self._started.pop(run_id, (None, None, None))
+            if started is not None:
+                self.tools.append({
+                    "tool": name, "input": tool_input,
+                    "seconds": round(time.perf_counter() - started, 4), **fields,
+                })
+
+        def on_tool_end(self, output, *, run_id, **kwargs):
+            text = str(getattr(output, "content", output))
+            self._tool_done(run_id, chars=len(text))
+
+        def on_tool_error(self, error, *, run_id, **kwargs):
+            self._tool_done(run_id, error=str(error))
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._started[run_id] = (time.perf_counter(), None, None)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            started, _, _ = self._started.pop(run_id, (None, None, None))
+            if started is None:
+                return
+            self.llm["calls"] += 1
+            self.llm["seconds"] = round(self.llm["seconds"] + time.perf_counter() - started, 4)
+            for generations in response.generations:
+                usage = getattr(getattr(generations[0], "message", None), "usage_metadata", None) or {}
+                self.llm["input_tokens"] += usage.get("input_tokens", 0)
+                self.llm["output_tokens"] += usage.get("output_tokens", 0)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._started.pop(run_id, None)
+
+    return Timings()
+
+
+async def run_one(executor, item, timeout=None):
+    """Run one query; return its result record (never raises)."""
+    timings = _timings()
+    started = time.perf_counter()
+    record = {"id": item["id"], "query": item["query"]}
+    try:
+        result = await asyncio.wait_for(
+            executor.ainvoke({"input": item["query"], "chat_history": []}, config={"callbacks": [timings]}),
+            timeout,
+        )
+        record.update(ok=True, answer=result.get("output", ""))
+    except asyncio.TimeoutError:
+        record.update(ok=False, error=f"timed out after {timeout}s")
+    except Exception as e:
+        record.update(ok=False, error=f"{type(e).__name__}: {e}")
+    record.update(seconds=round(time.perf_counter() - started, 4), llm=timings.llm, tools=timings.tools)
+    return record
+
+
+async def run(executor, items, concurrency, out, timeout=None):
+    """Run `items` with at most `concurrency` in flight, writing each result
+    line to `out` as it finishes. Returns the records in completion order."""
+    limit = asyncio.Semaphore(concurrency)
+    records = []
+
+    async def bounded(item):
+        async with limit:
+            record = await run_one(executor, item, timeout)
+        out.write(json.dumps(record, default=str) + "\n")
+        out.flush()
+        records.append(record)
+
+    await asyncio.gather(*(bounded(item) for item in items))
+    return records
+
+
+def summarize(records, wall):
+    """One-paragraph throughput and latency summary."""
+    if not records:
+        return "No queries."
+    latencies = [r["seconds"] for r in records]
+    failed = sum(not r["ok"] for r in records)
+    tools = [t for r in records for t in r["tools"]]
+    by_tool = {}
+    for t in tools:
+        by_tool.setdefault(t["tool"], []).append(t["seconds"])
+    lines = [
+        f"{len(records)} queries ({failed} failed) in {wall:.1f}s: {len(records) / wall:.2f} queries/s",
+        f"latency p50={percentile(latencies, 50):.2f}s p95={percentile(latencies, 95):.2f}s "
+        f"max={max(latencies):.2f}s; LLM {sum(r['llm']['seconds'] for r in records):.1f}s "
+        f"over {sum(r['llm']['calls'] for r in records)} calls; {len(tools)} tool calls",
+    ]
+    for name, seconds in sorted(by_tool.items()):
+        lines.append(f"  {name:24s} calls={len(seconds)} p50={percentile(seconds, 50) * 1000:.0f}ms")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", nargs="?", default="-", help="JSONL query file, or - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file, or - for stdout (default)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="queries in flight at once")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per query")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.queries == "-" else open(args.queries, encoding="utf-8")
+    with source:
+        items = list(read_queries(source))
+
+    import main as repl
+
+    with contextlib.redirect_stdout(sys.stderr):  # stdout may be the results stream
+        executor = repl.warm_up()
+    executor.verbose = False
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started = time.perf_counter()
+    try:
+        records = asyncio.run(run(executor, items, max(1, args.concurrency), out, args.timeout))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(summarize(records, time.perf_counter() - started), file=sys.stderr)
+    from providers import metrics
+
+    metrics.write()
+    return 0 if all(r["ok"] for r in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
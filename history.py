@@ -0,0 +1,165 @@
+"""Bounded chat history for the REPL.
+
+Instead of resending every message of the session, the agent gets:
+  - a sliding window of the most recent turns (at most HISTORY_MAX_TURNS),
+    each with the tool data it used, so follow-ups can reuse it without
+    calling the tools again,
+  - a running summary of the turns that fell out of the window, passed in
+    the system prompt.
+The window is kept under HISTORY_MAX_TOKENS: tool data is deduplicated
+(only the newest answer per tool and input is kept), then dropped from the
+oldest turns, and only then are whole turns rolled into the summary.
+
+The summary is extractive by default (question plus the answer's first
+line). HISTORY_SUMMARIZER=llm has the chat model rewrite it instead; the
+REPL runs that in the background while the next query is typed.
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+
+from providers.output import count_tokens
+
+MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "2000"))
+MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "6"))
+SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "300"))
+SUMMARIZER = os.getenv("HISTORY_SUMMARIZER", "extractive").lower()  # extractive | llm
+
+_SUMMARY_PROMPT = """\
+Update the running summary of a market-data chat session with the turns below.
+Keep tickers, figures, dates and conclusions the user may refer back to; drop pleasantries.
+Answer with the summary only, at most {words} words.
+
+Current summary:
+{summary}
+
+Turns to add:
+{turns}"""
+
+
+@dataclass
+class Turn:
+    query: str
+    answer: str
+    tool_data: list = field(default_factory=list)  # [(tool, tool input, output)]
+
+    def text(self):
+        """The turn's AI message: the answer plus the tool data it used."""
+        if not self.tool_data:
+            return self.answer
+        data = "\n\n".join(f"[{tool}({tool_input})]\n{output}" for tool, tool_input, output in self.tool_data)
+        return f"{self.answer}\n\nData used for this answer:\n{data}"
+
+    def tokens(self):
+        return count_tokens(self.query) + count_tokens(self.text())
+
+
+def _clip(text, limit):
+    line = text.strip().splitlines()[0] if text.strip() else ""
+    return line if len(line) <= limit else line[:limit - 1].rstrip() + "…"
+
+
+def extractive_summary(summary, turns, max_tokens=SUMMARY_TOKENS):
+    """Append one line per turn to the summary, dropping its oldest lines past `max_tokens`."""
+    lines = summary.splitlines() if summary else []
+    lines += [f"- Q: {_clip(t.query, 120)} -> A: {_clip(t.answer, 200)}" for t in turns]
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def llm_summarizer(llm, max_tokens=SUMMARY_TOKENS):
+    """A summarize(summary, turns) function that asks the chat model, falling
+    back to the extractive summary if the call fails."""
+
+    def summarize(summary, turns):
+        turns_text = "\n".join(f"User: {t.query}\nAssistant: {t.answer}" for t in turns)
+        prompt = _SUMMARY_PROMPT.format(words=max_tokens * 3 // 4, summary=summary or "(none)", turns=turns_text)
+        try:
+            return str(llm.invoke(prompt).content).strip()
+        except Exception:
+            return extractive_summary(summary, turns, max_tokens)
+
+    return summarize
+
+
+class ChatHistory:
+    """Sliding window of turns plus a running summary, under a token cap."""
+
+    def __init__(self, max_tokens=MAX_TOKENS, max_turns=MAX_TURNS, summarize=extractive_summary):
+        self.max_tokens = max_tokens
+        self.max_turns = max_turns
+        self.summarize = summarize
+        self.turns = []
+        self.summary = ""
+        self.summarized = 0  # turns rolled into the summary so far
+        self.log = []        # per-turn prompt stats, see add()
+        self._lock = threading.Lock()
+
+    def tokens(self):
+        """Tokens the history adds to the next prompt (window + summary)."""
+        return sum(t.tokens() for t in self.turns) + count_tokens(self.summary)
+
+    def add(self, query, answer, steps=(), prompt_tokens=None):
+        """Record a finished turn and trim the window back under the cap.
+
+        `steps` are the agent's (tool, tool input, output) calls for the
+        turn; `prompt_tokens` is what the turn's prompt cost, for the log.
+        """
+        with self._lock:
+            turn = Turn(query, answer, [(tool, str(tool_input), str(out)) for tool, tool_input, out in steps])
+            self._dedupe(turn)
+            self.turns.append(turn)
+            self._trim()
+            self.log.append({
+                "turn": self.summarized + len(self.turns),
+                "prompt_tokens": prompt_tokens,
+                "history_tokens": self.tokens(),
+                "window": len(self.turns),
+                "summarized": self.summarized,
+            })
+
+    def _dedupe(self, new):
+        """Drop older copies of tool data the new turn fetched again."""
+        seen = {(tool, tool_input) for tool, tool_input, _ in new.tool_data}
+        for turn in self.turns:
+            turn.tool_data = [d for d in turn.tool_data if (d[0], d[1]) not in seen]
+        unique = {}
+        for tool, tool_input, out in new.tool_data:
+            unique[(tool, tool_input)] = out  # within a turn, the last call wins
+        new.tool_data = [(tool, tool_input, out) for (tool, tool_input), out in unique.items()]
+
+    def _trim(self):
+        evicted = []
+        while len(self.turns) > self.max_turns:
+            evicted.append(self.turns.pop(0))
+        while sum(t.tokens() for t in self.turns) > self.max_tokens:
+            with_data = next((t for t in self.turns if t.tool_data), None)
+            if with_data is not None:
+                with_data.tool_data = []  # oldest tool data goes first
+            elif len(self.turns) > 1:
+                evicted.append(self.turns.pop(0))
+            else:
+                break
+        if evicted:
+            self.summary = self.summarize(self.summary, evicted)
+            self.summarized += len(evicted)
+
+    def messages(self):
+        """The window as LangChain messages, oldest first."""
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        with self._lock:
+            out = []
+            for turn in self.turns:
+                out.append(HumanMessage(content=turn.query))
+                out.append(AIMessage(content=turn.text()))
+            return out
+
+    def summary_prompt(self):
+        """Text for the system prompt's {history_summary} slot ('' when there is none)."""
+        with self._lock:
+            if not self.summary:
+                return ""
+            return f"\n\nSummary of the earlier conversation ({self.summarized} turns):\n{self.summary}"
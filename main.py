@@ -2,19 +2,35 @@
 
 Initializes a LangChain agent with market data provider tools
 and runs an interactive REPL for trading analysis queries.
+
+The prompt comes up before the agent is ready: LangChain, the LLM backend
+and the provider modules load in the background while the first query is
+typed. `python main.py --startup-time` prints where start-up time goes.
 """
 
-import logging
+import time
+
+_STARTED = time.perf_counter()  # before the other imports, for --startup-time
 
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+import asyncio
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
+import answer_cache
+import history
+import streaming
 from config import get_llm
-from providers import get_tools
+from providers import cache, get_tools, metrics, output, ratelimit, registry
+from startup import BUDGET_MS, Timeline, import_profile, package_report
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
+TIMELINE = Timeline(_STARTED)
+
+_BACKEND_MODULES = ("langchain_ollama", "langchain_groq", "langchain_anthropic", "langchain_openai")
+
 
 # ─── System Prompt ──────────────────────────────────────────────────
 # TODO: Implement your agent's system prompt below.
@@ -38,33 +54,193 @@ You are a helpful market data assistant. Answer the user's questions using the t
 
 
 def build_agent():
-    llm = get_llm()
-    tools = get_tools()
+    # LangChain is imported here rather than at the top: this runs in the
+    # background warm-up, not on the way to the prompt.
+    with TIMELINE.phase("import langchain"):
+        from langchain.agents import AgentExecutor, create_tool_calling_agent
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    with TIMELINE.phase("LLM backend"):
+        llm = get_llm()
+        llm.callbacks = [metrics.llm_handler()]  # time and tokens of every LLM call, for /stats
+    with TIMELINE.phase("register tools"):
+        tools = get_tools()
 
     if not tools:
         raise RuntimeError("No market data tools available. Check your .env file.")
 
     logger.info(f"Agent initialized with {len(tools)} tools")
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", SYSTEM_PROMPT),
-        MessagesPlaceholder("chat_history"),
-        ("human", "{input}"),
-        MessagesPlaceholder("agent_scratchpad"),
-    ])
+    with TIMELINE.phase("create agent"):
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", SYSTEM_PROMPT + "{history_summary}"),
+            MessagesPlaceholder("chat_history"),
+            ("human", "{input}"),
+            MessagesPlaceholder("agent_scratchpad"),
+        ]).partial(history_summary="")
+
+        agent = create_tool_calling_agent(llm, tools, prompt)
+        # Not verbose: the REPL streams tokens and tool calls itself (stream_answer)
+        return AgentExecutor(
+            agent=agent, tools=tools, handle_parsing_errors=True, return_intermediate_steps=True,
+        )
+
+
+def agent_llm(executor):
+    """The chat model inside an agent from build_agent, metrics callback and all."""
+    from langchain_core.language_models import BaseLanguageModel
+
+    for step in executor.agent.runnable.steps:
+        step = getattr(step, "bound", step)  # llm.bind_tools(...) wraps it
+        if isinstance(step, BaseLanguageModel):
+            return step
+    raise ValueError("agent has no bound chat model")
+
+
+def fixed_prompt_tokens(executor):
+    """Tokens every prompt carries regardless of history: system prompt and tool schemas."""
+    return output.count_tokens(SYSTEM_PROMPT) + sum(
+        output.count_tokens(f"{t.name} {t.description} {t.args}") for t in executor.tools
+    )
+
+
+async def stream_answer(executor, inputs):
+    """Run the agent, printing LLM tokens, tool calls and tool durations as
+    they arrive. Returns (answer event, seconds to the first token)."""
+    started = time.perf_counter()
+    answer = first_token = None
+    fresh_line = True  # nothing printed on the current line yet
+    final_streamed = False  # tokens since the last tool call, i.e. the answer itself
+    print()
+    async for event in streaming.events(executor, inputs):
+        kind = event["type"]
+        if kind == "token":
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            print(event["text"], end="", flush=True)
+            fresh_line = event["text"].endswith("\n")
+            final_streamed = True
+        elif kind == "tool_start":
+            if not fresh_line:
+                print()
+            print(f"  -> {event['tool']}({event['input']})", flush=True)
+            fresh_line, final_streamed = True, False
+        elif kind == "tool_end":
+            seconds = event["seconds"]
+            took = f"{seconds * 1000:.0f}ms" if seconds is not None else "done"
+            print(f"  <- {event['tool']} {took}, {len(event['output'])} chars", flush=True)
+        elif kind == "answer":
+            answer = event
+    if answer is not None and not final_streamed:
+        print(answer["text"], end="")  # the backend didn't stream the final answer
+    print()
+    return answer, first_token
+
+
+def warm_up():
+    """Build the agent, then import the provider modules ahead of their first call."""
+    executor = build_agent()
+    with TIMELINE.phase("load provider modules"):
+        try:
+            registry.preload()
+        except Exception as e:
+            logger.warning(f"Provider preload failed ({e}); providers will load on first use")
+    return executor
+
+
+def print_startup_report(warmup):
+    """Print the start-up breakdown; return True if time to prompt is within budget."""
+    warmup.result()
+    print("\nStart-up timeline (interpreter start-up not included):")
+    print(TIMELINE.report())
 
-    agent = create_tool_calling_agent(llm, tools, prompt)
-    return AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+    print("\nImports on the way to the prompt (python -X importtime):")
+    print(package_report(import_profile(["main"])))
+    background = ["langchain.agents", *(m for m in _BACKEND_MODULES if m in sys.modules)]
+    background += [s.module for s in registry.SPECS if registry.enabled(s)]
+    print("\nImports in the background warm-up:")
+    print(package_report(import_profile(background)))
+
+    to_prompt = TIMELINE.elapsed("prompt shown") * 1000
+    within = to_prompt <= BUDGET_MS
+    print(f"\nTime to prompt: {to_prompt:.0f}ms (budget {BUDGET_MS:.0f}ms){'' if within else ' — over budget'}")
+    return within
+
+
+def print_cache_stats(answers):
+    a = answers.stats()
+    print(
+        f"\nAnswer cache ({a['match']} match): {a['hits']} hits, {a['misses']} misses "
+        f"({a['hit_rate']:.0%} hit rate), {a['entries']} entries"
+    )
+    s = cache.stats()
+    print(
+        f"Response cache: {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.0%} hit rate), "
+        f"{s['entries']} entries, {s['bytes'] / 1024:.0f} KiB / {s['max_bytes'] / 1024:.0f} KiB, "
+        f"{s['evictions']} evictions"
+    )
+    for provider, counts in sorted(s["providers"].items()):
+        print(f"  {provider:15s} hits={counts['hits']} misses={counts['misses']}")
+
+
+def print_budget():
+    print(f"\nRate limits ({ratelimit.SINGLE_FLIGHT.coalesced} requests coalesced):")
+    for name, b in sorted(ratelimit.budget().items()):
+        print(
+            f"  {name:15s} {b['limit']:20s} remaining={b['remaining']} requests={b.get('requests', 0)} "
+            f"waits={b.get('waits', 0)} ({b.get('wait_seconds', 0.0):.1f}s) rejected={b.get('rejected', 0)}"
+        )
+
+
+def print_token_stats():
+    s = output.stats()
+    raw, sent = sum(t["raw"] for t in s.values()), sum(t["sent"] for t in s.values())
+    print(
+        f"\nTool output tokens ({output.MODE} mode, {output.COUNTER} counter): "
+        f"{sent} sent of {raw} raw ({1 - sent / raw if raw else 0:.0%} saved)"
+    )
+    for name, t in sorted(s.items()):
+        limit = output.budget(name)
+        print(
+            f"  {name:24s} calls={t['calls']} raw={t['raw']} sent={t['sent']} "
+            f"avg={t['sent'] / t['calls']:.0f} budget={limit or '-'} truncated={t['truncated']}"
+        )
+
+
+def print_history(chat):
+    print(
+        f"\nChat history: {len(chat.turns)} turns in the window, {chat.summarized} summarized, "
+        f"{chat.tokens()} tokens (cap {chat.max_tokens}, {chat.max_turns} turns)"
+    )
+    for entry in chat.log:
+        print(
+            f"  turn {entry['turn']:3d}  prompt={entry['prompt_tokens']}  history after={entry['history_tokens']}  "
+            f"window={entry['window']}  summarized={entry['summarized']}"
+        )
 
 
 def main():
+    warmup = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warmup").submit(warm_up)
+
     print("=" * 60)
     print("  Market Data Trading Agent")
-    print("  Type your query or 'quit' to exit")
+    print("  Type your query, '/stats', '/cache', '/budget', '/tokens' or '/history' for stats, or 'quit' to exit")
     print("=" * 60)
+    TIMELINE.mark("prompt shown")
+    if "--startup-time" in sys.argv[1:]:
+        sys.exit(0 if print_startup_report(warmup) else 1)
 
-    executor = build_agent()
-    chat_history = []
+    executor = None
+    fixed_tokens = 0
+    chat = history.ChatHistory()
+    answers = answer_cache.AnswerCache()
+    # Recording a turn (and summarizing what falls out of the window) runs
+    # while the next query is typed.
+    recorder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+    recorded = None
+    # One event loop for the whole session: tool calls the model emits in the
+    # same turn are awaited together, and async LLM clients stay bound to it.
+    loop = asyncio.new_event_loop()
 
     while True:
         try:
@@ -78,19 +254,79 @@ def main():
         if query.lower() in ("quit", "exit", "q"):
             print("Goodbye!")
             break
+        if query.lower() == "/stats":
+            print(f"\n{metrics.report()}")
+            continue
+        if query.lower() == "/cache":
+            print_cache_stats(answers)
+            continue
+        if query.lower() == "/budget":
+            print_budget()
+            continue
+        if query.lower() == "/tokens":
+            print_token_stats()
+            continue
+        if query.lower() == "/history":
+            if recorded is not None:
+                recorded.result()
+            print_history(chat)
+            continue
 
+        hit = answers.get(query)
+        if hit is not None:
+            now = time.monotonic()
+            print(f"\n{hit.answer}")
+            logger.info(
+                f"Answered from the answer cache ({now - hit.created:.0f}s old, data fresh for "
+                f"{hit.expires - now:.0f}s more)"
+            )
+            if recorded is not None:
+                recorded.result()
+            recorded = recorder.submit(chat.add, query, hit.answer, hit.steps, 0)
+            continue
+
+        if executor is None:
+            try:
+                executor = warmup.result()  # usually finished while the user typed
+            except Exception as e:
+                print(f"\nError: {e}")
+                break
+            fixed_tokens = fixed_prompt_tokens(executor)
+            if history.SUMMARIZER == "llm":
+                chat.summarize = history.llm_summarizer(agent_llm(executor))
+
+        if recorded is not None:
+            recorded.result()  # the previous turn is in the history
         try:
-            result = executor.invoke({"input": query, "chat_history": chat_history})
-            output = result.get("output", "No response.")
-            print(f"\n{output}")
-
-            # Maintain conversation history
-            from langchain_core.messages import HumanMessage, AIMessage
-            chat_history.append(HumanMessage(content=query))
-            chat_history.append(AIMessage(content=output))
+            summary, messages = chat.summary_prompt(), chat.messages()
+            prompt_tokens = fixed_tokens + output.count_tokens(query + summary) + sum(
+                output.count_tokens(m.content) for m in messages
+            )
+            inputs = {"input": query, "chat_history": messages, "history_summary": summary}
+            started, before = time.perf_counter(), metrics.totals()
+            with cache.trace() as expiries:
+                result, first_token = loop.run_until_complete(stream_answer(executor, inputs))
+            if result is None:
+                raise RuntimeError("the agent returned no answer")
+            answer, steps = result["text"] or "No response.", result["steps"]
+            spent = {k: v - before[k] for k, v in metrics.totals().items()}
+            logger.info(
+                f"Prompt ~{prompt_tokens} tokens ({prompt_tokens - fixed_tokens} history and query, "
+                f"{len(chat.turns)} turns{', summary' if summary else ''})"
+                + (f"; first token after {first_token * 1000:.0f}ms" if first_token is not None else "")
+                + f"; {time.perf_counter() - started:.1f}s total: LLM {spent['llm']:.1f}s, "
+                f"tools {spent['tools']:.1f}s (HTTP {spent['http']:.1f}s)"
+            )
+            metrics.write()
+
+            answers.put(query, answer, steps, expiries)
+            recorded = recorder.submit(chat.add, query, answer, steps, prompt_tokens)
         except Exception as e:
             print(f"\nError: {e}")
 
+    recorder.shutdown(wait=False)
+    loop.close()
+
 
 if __name__ == "__main__":
     main()
@@ -4,27 +4,62 @@ Requires ALPHA_VANTAGE_API_KEY.
 """
 
 import os
-import requests
 from langchain.tools import Tool
 
+from providers import indicators, registry
+from providers.batch import fan_out, split_query
+from providers.ratelimit import RateLimited
+from providers.transport import get_json, to_coroutine
+
 API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
 BASE_URL = "https://www.alphavantage.co/query"
 
 
+def _number(value):
+    """Alpha Vantage sends numbers as strings, and 'None' or '-' when missing."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_fundamentals(symbol):
+    """Company overview fields for the router's fundamentals need (see providers.router)."""
+    params = {"function": "OVERVIEW", "symbol": symbol, "apikey": API_KEY}
+    data = get_json("alpha_vantage", BASE_URL, params, "profile", ok=lambda d: "Symbol" in d)
+    if "Symbol" not in data:
+        raise LookupError(data.get("Note") or data.get("Information") or f"no overview for {symbol}")
+    return {
+        "name": data.get("Name"),
+        "sector": data.get("Sector"),
+        "industry": data.get("Industry"),
+        "market_cap": _number(data.get("MarketCapitalization")),
+        "price": None,
+        "pe": _number(data.get("PERatio")),
+        "eps": _number(data.get("EPS")),
+        "beta": _number(data.get("Beta")),
+        "dividend_yield": _number(data.get("DividendYield")),
+    }
+
+
 def query_alpha_vantage(query: str) -> str:
     """Fetch technical indicators from Alpha Vantage.
 
     Query format: 'SYMBOL INDICATOR' e.g. 'AAPL RSI' or just 'AAPL' for overview.
-    Supported indicators: RSI, SMA, EMA, MACD, BBANDS.
+    Supported indicators: RSI, SMA, EMA, MACD, BBANDS. Several comma-separated
+    symbols ('AAPL,MSFT RSI') are queried one by one. When the quota is spent
+    the indicator is computed locally (providers.indicators) instead.
     """
-    parts = query.strip().upper().split()
-    symbol = parts[0]
-    indicator = parts[1] if len(parts) > 1 else "OVERVIEW"
+    symbols, rest = split_query(query.upper())
+    if len(symbols) > 1:
+        return fan_out(query_alpha_vantage, symbols, rest)
+    symbol = symbols[0]
+    indicator = rest.split()[0] if rest else "OVERVIEW"
 
     try:
         if indicator == "OVERVIEW":
             params = {"function": "OVERVIEW", "symbol": symbol, "apikey": API_KEY}
-            data = requests.get(BASE_URL, params=params, timeout=10).json()
+            data = get_json("alpha_vantage", BASE_URL, params, "profile", ok=lambda d: "Symbol" in d)
             if "Symbol" not in data:
                 return f"No overview data for {symbol}"
             lines = [f"Alpha Vantage overview for {symbol}:"]
@@ -45,9 +80,18 @@ def query_alpha_vantage(query: str) -> str:
 
         func_name, extra_params = func_map[indicator]
         params = {"function": func_name, "symbol": symbol, "interval": "daily", "apikey": API_KEY, **extra_params}
-        data = requests.get(BASE_URL, params=params, timeout=10).json()
+        try:
+            data = get_json(
+                "alpha_vantage", BASE_URL, params, "indicator",
+                ok=lambda d: any(k.startswith("Technical Analysis") for k in d),
+            )
+        except RateLimited:
+            return indicators.fallback("Alpha Vantage", symbol, indicator)
 
         tech_key = [k for k in data if k.startswith("Technical Analysis")]
+        if not tech_key and ("Note" in data or "Information" in data):
+            # Alpha Vantage reports a spent quota as a Note/Information message
+            return indicators.fallback("Alpha Vantage", symbol, indicator)
         if not tech_key:
             return f"No {indicator} data returned for {symbol}. Response: {list(data.keys())}"
 
@@ -67,8 +111,6 @@ if API_KEY:
     tool = Tool(
         name="alpha_vantage",
         func=query_alpha_vantage,
-        description=(
-            "Fetch technical indicators (RSI, SMA, EMA, MACD, BBANDS) and company overview from Alpha Vantage. "
-            "Input format: 'SYMBOL INDICATOR' e.g. 'AAPL RSI' or 'TSLA MACD'. Just a symbol gives an overview."
-        ),
+        coroutine=to_coroutine(query_alpha_vantage),
+        description=registry.spec("alpha_vantage").description,
     )
@@ -0,0 +1,284 @@
+"""Multi-asset analytics — returns, volatility, drawdown, correlation and beta.
+
+Loads daily series for several assets at once: stocks and ETFs through the
+router's daily_bars sources (Yahoo Finance, Tiingo, Polygon, Twelve Data),
+crypto through crypto_bars (Binance, then CoinGecko), and FRED series from
+the local FRED store. The bar store, bar archive and response cache serve
+whatever they already hold. The series are joined on their common dates
+into one (days x assets) NumPy matrix, and every statistic is computed for
+all assets in one vectorized pass, so the model gets a compact table
+instead of rows of prices to do arithmetic on.
+
+Prices are compared on daily log returns. FRED series quoted in percent
+(yields, rates, spreads) are compared on daily changes in points, so
+"BTC vs 10Y yields" correlates BTC returns with yield moves. FRED series
+that update less often than daily are carried forward to each market date.
+"""
+
+import contextvars
+import functools
+import math
+import os
+import re
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from langchain.tools import Tool
+
+from providers import bar_store, coingecko, fred, fred_store, registry, router
+from providers.transport import to_coroutine
+
+WINDOW = int(os.getenv("ANALYTICS_WINDOW", "60"))
+SPAN_DAYS = int(os.getenv("ANALYTICS_SPAN_DAYS", "365"))
+MAX_ASSETS = 12
+
+# Own pool: a load waits on sub-requests of its own (FRED syncs gather on
+# the transport fan-out pool, bars go through the router's pool), so loads
+# must not occupy those pools themselves.
+_executor = ThreadPoolExecutor(max_workers=MAX_ASSETS, thread_name_prefix="analytics")
+
+_WINDOW_ARG = re.compile(r"\bwindow\s+(\d+)\b", re.IGNORECASE)
+_VS_ARG = re.compile(r"\b(?:vs\.?|versus|benchmark)\s+([^\s,]+)", re.IGNORECASE)
+
+
+@dataclass
+class Series:
+    name: str
+    source: str
+    ts: np.ndarray      # UTC-midnight epoch seconds, ascending
+    values: np.ndarray
+    rate: bool = False  # compared on changes in points rather than log returns
+    daily: bool = True  # sets the calendar; other series are carried forward onto it
+
+
+def _kind(term):
+    """('fred', series ID), ('crypto', USDT pair) or ('equity', symbol) for a query term."""
+    q = term.strip().upper()
+    if q.startswith("FRED:"):
+        return "fred", q[5:]
+    if q in fred.SERIES_ALIASES or q in fred.SERIES_ALIASES.values():
+        return "fred", fred_store.resolve(q, fred.SERIES_ALIASES)
+    if q.endswith("USDT") or q in coingecko.COIN_MAP:
+        return "crypto", q if q.endswith("USDT") else q + "USDT"
+    return "equity", q
+
+
+def load(term, start):
+    """The Series for one query term from epoch second `start` on.
+
+    Raises LookupError if no source has it.
+    """
+    kind, key = _kind(term)
+    days = (bar_store.day_ts(datetime.now(timezone.utc).timestamp()) - start) // 86400 + 1
+    if kind == "fred":
+        if fred.tool is None:
+            raise LookupError("FRED_API_KEY is not set")
+        meta, rows = fred.get_series(key, bar_store.format_date(start))
+        if meta is None:
+            raise LookupError(f"FRED series {key} not found")
+        rows = [(bar_store.parse_date(d), v) for d, v in rows if v is not None]
+        if not rows:
+            raise LookupError(f"no FRED observations for {key}")
+        ts, values = np.array(rows, dtype=np.float64).T
+        return Series(
+            term, "fred", ts.astype(np.int64), values,
+            rate="percent" in str(meta.get("units", "")).lower(),
+            daily=str(meta.get("frequency", "")).lower().startswith("daily"),
+        )
+    if kind == "crypto":
+        routed = router.route("crypto_bars", key, days)
+    else:
+        routed = router.route("daily_bars", key, days * 5 // 7 + 5)  # trading days, with room for holidays
+    bars = routed.value
+    keep = (bars.ts >= start) & ~np.isnan(bars.close)
+    if not keep.any():
+        raise LookupError(f"no closes for {key} since {bar_store.format_date(start)}")
+    return Series(term, routed.source, bars.ts[keep], bars.close[keep])
+
+
+def align(series):
+    """(ts, matrix) of the series' values on their common dates, one column each.
+
+    The calendar is the dates every daily series has; the others take their
+    latest value on or before each date. Dates before every column has a
+    value are dropped.
+    """
+    daily = [s for s in series if s.daily] or series
+    ts = functools.reduce(np.intersect1d, (s.ts for s in daily))
+    columns = []
+    for s in series:
+        i = np.searchsorted(s.ts, ts, "right") - 1
+        columns.append(np.where(i >= 0, s.values[np.maximum(i, 0)], np.nan))
+    matrix = np.column_stack(columns)
+    ok = ~np.isnan(matrix).any(axis=1)
+    return ts[ok], matrix[ok]
+
+
+def _rolling_sums(x, window):
+    c = np.cumsum(np.vstack([np.zeros((1, x.shape[1])), x]), axis=0)
+    return c[window:] - c[:-window]
+
+
+def analyze(ts, prices, rate, benchmark=0, window=WINDOW):
+    """Per-asset statistics for a (days x assets) matrix, all columns at once.
+
+    `rate` marks the columns compared on changes rather than log returns;
+    `benchmark` is the column beta and correlation are measured against.
+    Returns a dict of arrays (one value per asset) plus the correlation
+    matrix and the rolling window actually used.
+    """
+    rate = np.asarray(rate, dtype=bool)
+    returns = np.diff(prices, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # flat windows and all-NaN columns give NaN
+        returns[:, ~rate] = np.diff(np.log(prices[:, ~rate]), axis=0)
+        total = np.where(rate, prices[-1] - prices[0], prices[-1] / prices[0] - 1)
+        years = (ts[-1] - ts[0]) / (365.25 * 86400)
+        per_year = len(returns) / years if years > 0 else 252.0
+
+        cov = np.atleast_2d(np.cov(returns, rowvar=False))
+        sd = np.sqrt(np.diag(cov))
+        corr = cov / np.outer(sd, sd)
+        beta = cov[:, benchmark] / cov[benchmark, benchmark]
+
+        drawdown = prices / np.maximum.accumulate(prices, axis=0) - 1
+        trough = drawdown.argmin(axis=0)
+        max_dd = np.where(rate, np.nan, drawdown.min(axis=0))
+
+        w = min(window, len(returns))
+        sx, sxx = _rolling_sums(returns, w), _rolling_sums(returns**2, w)
+        y = returns[:, [benchmark]]
+        sy, syy, sxy = _rolling_sums(y, w), _rolling_sums(y**2, w), _rolling_sums(returns * y, w)
+        var_x, var_y = sxx / w - (sx / w) ** 2, syy / w - (sy / w) ** 2
+        rolling = (sxy / w - sx * sy / w**2) / np.sqrt(var_x * var_y)
+        rolling_vol = np.sqrt(np.maximum(var_x[-1], 0) * w / max(w - 1, 1) * per_year)
+        corr_min, corr_max = np.nanmin(rolling, axis=0), np.nanmax(rolling, axis=0)
+
+    return {
+        "total": total,
+        "vol": sd * math.sqrt(per_year),
+        "max_dd": max_dd,
+        "trough": ts[trough],
+        "beta": beta,
+        "corr": corr,
+        "window": w,
+        "corr_now": rolling[-1],
+        "corr_min": corr_min,
+        "corr_max": corr_max,
+        "vol_now": rolling_vol,
+    }
+
+
+def _fmt(x, rate, sign="+"):
+    if x != x:
+        return "N/A"
+    return f"{x:{sign}.2f}pt" if rate else f"{x * 100:{sign}.1f}%"
+
+
+def _parse(query):
+    """(terms, benchmark term or None, start epoch second, window)."""
+    window = WINDOW
+    match = _WINDOW_ARG.search(query)
+    if match:
+        window = int(match.group(1))
+        query = query[:match.start()] + query[match.end():]
+    benchmark = None
+    match = _VS_ARG.search(query)
+    if match:
+        benchmark = match.group(1).upper()
+        query = query[:match.start()] + query[match.end():]
+    query, since = fred._parse_span(query)
+    today = datetime.now(timezone.utc).date()
+    start = bar_store.parse_date(since or (today - timedelta(days=SPAN_DAYS)).isoformat())
+    separator = "," if "," in query else None
+    terms = [t.strip().upper() for t in query.split(separator) if t.strip()]
+    return list(dict.fromkeys(terms)), benchmark, start, max(window, 5)
+
+
+def query_analytics(query: str) -> str:
+    """Compare several assets over a common period.
+
+    Query format: comma- or space-separated assets, optionally followed by
+    'vs BENCHMARK', a span ('2y', 'last 6 months', 'since 2020') and
+    'window N' for the rolling correlation, e.g. 'BTC, QQQ, DGS10 vs QQQ 2y'.
+    Stocks/ETFs, crypto (BTC, ETH, ... or USDT pairs) and FRED series
+    (IDs like DGS10, aliases like CPI, or 'FRED:ID') can be mixed.
+    """
+    terms, benchmark, start, window = _parse(query)
+    if benchmark and benchmark not in terms:
+        terms.insert(0, benchmark)
+    if not terms:
+        return "Analytics error: no assets given. Try 'BTC, QQQ, DGS10 1y'."
+    if len(terms) > MAX_ASSETS:
+        return f"Analytics error: at most {MAX_ASSETS} assets per query."
+
+    def attempt(term):
+        try:
+            return load(term, start)
+        except Exception as e:
+            return e
+
+    futures = [_executor.submit(contextvars.copy_context().run, attempt, t) for t in terms]
+    loaded = [f.result() for f in futures]
+    series = [s for s in loaded if isinstance(s, Series)]
+    failed = [f"{t} ({r})" for t, r in zip(terms, loaded) if not isinstance(r, Series)]
+    if not series:
+        return "Analytics error: no data for " + "; ".join(failed)
+
+    ts, prices = align(series)
+    if len(ts) < 3:
+        return (
+            f"Analytics error: only {len(ts)} common dates for {', '.join(s.name for s in series)} "
+            f"since {bar_store.format_date(start)}."
+        )
+    names = [s.name for s in series]
+    b = names.index(benchmark) if benchmark in names else 0
+    rate = [s.rate for s in series]
+    stats = analyze(ts, prices, rate, b, window)
+
+    lines = [
+        f"Analytics for {', '.join(names)}: {bar_store.format_date(ts[0])} to {bar_store.format_date(ts[-1])}, "
+        f"{len(ts)} common dates, benchmark {names[b]}"
+    ]
+    width = max(5, *(len(n) for n in names))
+    lines.append(
+        f"  {'Asset':<{width}}  {'Source':<13} {'Return':>8} {'Vol/yr':>8} {'Vol ' + str(stats['window']) + 'd':>8}"
+        f"  {'Max DD (trough)':<21} {'Beta':>6} {'Corr':>6}  Corr {stats['window']}d now [min, max]"
+    )
+    for i, s in enumerate(series):
+        dd = _fmt(stats["max_dd"][i], s.rate, "")
+        if stats["max_dd"][i] < 0:
+            dd += f" ({bar_store.format_date(stats['trough'][i])})"
+        lines.append(
+            f"  {s.name:<{width}}  {s.source:<13} {_fmt(stats['total'][i], s.rate):>8} "
+            f"{_fmt(stats['vol'][i], s.rate, ''):>8} {_fmt(stats['vol_now'][i], s.rate, ''):>8}  {dd:<21} "
+            f"{stats['beta'][i]:>6.2f} {stats['corr'][i, b]:>6.2f}  "
+            f"{stats['corr_now'][i]:+.2f} [{stats['corr_min'][i]:+.2f}, {stats['corr_max'][i]:+.2f}]"
+        )
+
+    if len(series) > 2:
+        lines.append("\nCorrelation of daily returns:")
+        lines.append("  " + " " * width + "".join(f" {n[:7]:>7}" for n in names))
+        for i, n in enumerate(names):
+            lines.append(f"  {n:<{width}}" + "".join(f" {c:>7.2f}" for c in stats["corr"][i]))
+
+    rates = [s.name for s in series if s.rate]
+    if rates:
+        lines.append(f"\n{', '.join(rates)} in percent: compared on daily changes, shown in points.")
+    carried = [s.name for s in series if not s.daily]
+    if carried:
+        lines.append(f"{', '.join(carried)} updated less often than daily: carried forward between releases.")
+    if failed:
+        lines.append(f"Skipped: {'; '.join(failed)}")
+    return "\n".join(lines)
+
+
+tool = Tool(
+    name="asset_analytics",
+    func=query_analytics,
+    coroutine=to_coroutine(query_analytics),
+    description=registry.spec("asset_analytics").description,
+)
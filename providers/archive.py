@@ -0,0 +1,165 @@
+"""Memory-mapped local archive of OHLCV bars.
+
+One file per provider, symbol and interval,
+ARCHIVE_DIR/<provider>/<interval>/<SYMBOL>.bars, holding fixed-width little-endian records (`RECORD`: int64 ts and float64
+open/high/low/close/volume, 48 bytes each) sorted by ts, with no header.
+A file is mapped with numpy.memmap on first read, so nothing is loaded
+until a range is touched and the OS page cache is shared between
+processes.
+
+The timestamps are the date index: record i starts at byte 48 * i, so a
+range query is two binary searches over an in-memory copy of the ts
+column plus a slice of the mapping. The Bars it returns are views into the
+mapping, not copies, and a multi-year lookback takes microseconds.
+
+bar_store.sync and bar_store.history read a provider's own archived
+series before asking it for bars, so each provider only ever serves bars
+it produced. backfill.py --archive fills it, or call `write`.
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from providers.bars import COLUMNS, Bars
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = Path(os.getenv(
+    "BAR_ARCHIVE_DIR",
+    Path(__file__).resolve().parent.parent / "data" / "archive",
+))
+# An archive whose newest bar is at most this many seconds old is served
+# without asking the provider for a tail; older ones are topped up from it.
+MAX_AGE = float(os.getenv("BAR_ARCHIVE_MAX_AGE", "86400"))
+
+RECORD = np.dtype([("ts", "<i8"), *((c, "<f8") for c in COLUMNS[1:])])
+
+
+class _Series:
+    """One mapped file and its ts index, valid while the file's size, mtime and inode hold."""
+
+    __slots__ = ("stamp", "records", "index")
+
+    def __init__(self, path, stamp):
+        self.stamp = stamp
+        count = stamp[0] // RECORD.itemsize  # a torn trailing record is ignored
+        if count:
+            self.records = np.memmap(path, dtype=RECORD, mode="r", shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD)
+        self.index = np.array(self.records["ts"])  # contiguous, for searchsorted
+
+    def bars(self, lo, hi):
+        r = self.records[lo:hi]
+        return Bars(*(r[c] for c in COLUMNS))
+
+
+class Archive:
+    """Per-(provider, symbol, interval) files of `RECORD`s under `root`, read back as Bars."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._series = {}  # path -> _Series
+
+    def path(self, provider, symbol, interval):
+        return self.root / provider / interval / f"{symbol.replace('/', '_')}.bars"
+
+    def _open(self, provider, symbol, interval):
+        """The mapped series, remapped if the file changed; None if there is no file."""
+        path = self.path(provider, symbol, interval)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_size, st.st_mtime_ns, st.st_ino)
+        with self._lock:
+            series = self._series.get(path)
+            if series is None or series.stamp != stamp:
+                series = self._series[path] = _Series(path, stamp)
+            return series
+
+    def range(self, provider, symbol, interval, start=None, end=None):
+        """Archived bars in [start, end], oldest first, as views into the file."""
+        series = self._open(provider, symbol, interval)
+        if series is None:
+            return Bars.empty()
+        lo = 0 if start is None else int(np.searchsorted(series.index, start, "left"))
+        hi = len(series.index) if end is None else int(np.searchsorted(series.index, end, "right"))
+        return series.bars(lo, max(lo, hi))
+
+    def recent(self, provider, symbol, interval, n):
+        """The newest n archived bars, oldest first."""
+        series = self._open(provider, symbol, interval)
+        if series is None:
+            return Bars.empty()
+        count = len(series.index)
+        return series.bars(count - min(n, count), count)
+
+    def last_ts(self, provider, symbol, interval):
+        """Timestamp of the newest archived bar, or None."""
+        series = self._open(provider, symbol, interval)
+        return int(series.index[-1]) if series is not None and len(series.index) else None
+
+    def write(self, provider, symbol, interval, bars):
+        """Add bars to a series; a bar at an archived timestamp replaces the old one.
+
+        Bars newer than everything archived are appended in place. Anything
+        else rewrites the file through a temporary copy and a rename, so
+        readers (and existing mappings) never see a partial file.
+        """
+        bars = Bars.from_rows(bars)
+        if not bars:
+            return
+        order = np.argsort(bars.ts, kind="stable")
+        records = np.empty(len(bars), dtype=RECORD)
+        for c in COLUMNS:
+            records[c] = getattr(bars, c)[order]
+        path = self.path(provider, symbol, interval)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        series = self._open(provider, symbol, interval)
+        archived = np.empty(0, dtype=RECORD) if series is None else series.records
+        if not len(archived) or records["ts"][0] > archived["ts"][-1]:
+            with open(path, "ab") as f:
+                f.truncate(archived.nbytes)  # drop a torn record left by an interrupted append
+                f.write(_dedupe(records).tobytes())
+            return
+        merged = np.concatenate([archived, records])
+        merged = _dedupe(merged[np.argsort(merged["ts"], kind="stable")])
+        tmp = path.with_suffix(".tmp")
+        merged.tofile(tmp)
+        os.replace(tmp, path)
+
+    def symbols(self, provider, interval):
+        """A provider's archived symbols for an interval, sorted."""
+        return sorted(p.stem for p in (self.root / provider / interval).glob("*.bars"))
+
+
+def _dedupe(records):
+    """Sorted records with only the last of each run of equal timestamps."""
+    keep = np.ones(len(records), dtype=bool)
+    keep[:-1] = records["ts"][1:] != records["ts"][:-1]
+    return records if keep.all() else records[keep]
+
+
+ARCHIVE = Archive()
+
+
+def current(bars, max_age=None):
+    """True if archived bars reach within `max_age` seconds (default MAX_AGE) of now."""
+    max_age = MAX_AGE if max_age is None else max_age
+    return bool(bars) and time.time() - int(bars.ts[-1]) <= max_age
+
+
+def recent(provider, symbol, interval, n):
+    """ARCHIVE.recent, or empty Bars (with a warning) if the archive can't be read."""
+    try:
+        return ARCHIVE.recent(provider, symbol, interval, n)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Bar archive unreadable for {symbol} ({e}); skipping it")
+        return Bars.empty()
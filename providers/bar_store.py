@@ -0,0 +1,275 @@
+"""Persistent on-disk store for historical OHLCV bars.
+
+Bars live in a local SQLite database keyed by (provider, symbol, interval),
+so history survives restarts and providers only fetch the tail since the
+last stored bar. Daily bars are stored with their timestamp normalized to
+UTC midnight of the trading date. Reads return `Bars` (providers/bars.py).
+
+`sync` and `history` look in the provider's series in the memory-mapped
+bar archive (providers/archive.py) first: archived bars are served from
+disk and only the bars after the archive's newest one come from the
+provider. `subscribe` registers a listener for the bars each sync stores.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from providers import archive
+from providers.bars import Bars
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = Path(os.getenv(
+    "BAR_STORE_PATH",
+    Path(__file__).resolve().parent.parent / "data" / "bars.sqlite",
+))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    provider TEXT NOT NULL,
+    symbol   TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts       INTEGER NOT NULL,
+    open     REAL,
+    high     REAL,
+    low      REAL,
+    close    REAL,
+    volume   REAL,
+    PRIMARY KEY (provider, symbol, interval, ts)
+) WITHOUT ROWID
+"""
+
+
+def day_ts(ts):
+    """Truncate an epoch timestamp (seconds) to UTC midnight."""
+    return int(ts) // 86400 * 86400
+
+
+def parse_date(value):
+    """Epoch seconds at UTC midnight for an ISO date or datetime string."""
+    d = datetime.strptime(value[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return int(d.timestamp())
+
+
+def format_date(ts):
+    """Render a stored bar timestamp as YYYY-MM-DD."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class BarStore:
+    """SQLite-backed bar table of (ts, open, high, low, close, volume) rows, read back as Bars."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def last_ts(self, provider, symbol, interval):
+        """Timestamp of the newest stored bar, or None if nothing is stored."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT MAX(ts) FROM bars WHERE provider=? AND symbol=? AND interval=?",
+                (provider, symbol, interval),
+            ).fetchone()
+        return row[0]
+
+    def first_ts(self, provider, symbol, interval):
+        """Timestamp of the oldest stored bar, or None if nothing is stored."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT MIN(ts) FROM bars WHERE provider=? AND symbol=? AND interval=?",
+                (provider, symbol, interval),
+            ).fetchone()
+        return row[0]
+
+    def upsert(self, provider, symbol, interval, rows):
+        """Insert or replace bars (a Bars or rows). Re-sent bars overwrite the stored copy."""
+        if not len(rows):
+            return
+        rows = Bars.from_rows(rows).rows()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(provider, symbol, interval, *row) for row in rows],
+                )
+
+    def load(self, provider, symbol, interval, start=None, end=None):
+        """Bars in [start, end], oldest first."""
+        sql = "SELECT ts, open, high, low, close, volume FROM bars WHERE provider=? AND symbol=? AND interval=?"
+        args = [provider, symbol, interval]
+        if start is not None:
+            sql += " AND ts >= ?"
+            args.append(start)
+        if end is not None:
+            sql += " AND ts <= ?"
+            args.append(end)
+        with self._lock:
+            return Bars.from_rows(self._connect().execute(sql + " ORDER BY ts", args).fetchall())
+
+    def delete(self, provider, symbol, interval):
+        """Drop every stored bar for one series."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "DELETE FROM bars WHERE provider=? AND symbol=? AND interval=?",
+                    (provider, symbol, interval),
+                )
+
+    def recent(self, provider, symbol, interval, n):
+        """The newest n bars, oldest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT ts, open, high, low, close, volume FROM bars "
+                "WHERE provider=? AND symbol=? AND interval=? ORDER BY ts DESC LIMIT ?",
+                (provider, symbol, interval, n),
+            ).fetchall()
+        return Bars.from_rows(rows[::-1])
+
+
+STORE = BarStore()
+
+_listeners = []
+
+
+def subscribe(listener):
+    """Call `listener(provider, symbol, interval, bars, restated)` with the
+    bars each sync stores; `restated` means the stored series was rebuilt."""
+    _listeners.append(listener)
+
+
+def _notify(provider, symbol, interval, bars, restated):
+    for listener in _listeners:
+        try:
+            listener(provider, symbol, interval, bars, restated)
+        except Exception as e:
+            logger.warning(f"Bar listener failed for {symbol} ({e})")
+
+
+def last_quote(bars):
+    """Last close, prior close and last volume from daily Bars."""
+    if not bars:
+        raise LookupError("no bars")
+    return {
+        "price": bars[-1][4],
+        "prev_close": bars[-2][4] if len(bars) > 1 else None,
+        "volume": bars[-1][5],
+    }
+
+
+def _same_bar(a, b):
+    """True if two rows for the same timestamp agree on the close."""
+    if a[4] is None or b[4] is None:
+        return a[4] == b[4]
+    return abs(a[4] - b[4]) <= 1e-6 * max(abs(a[4]), abs(b[4]), 1.0)
+
+
+def sync(provider, symbol, interval, fetch_tail, n=5):
+    """Bring the stored series up to date and return its newest n bars.
+
+    `fetch_tail(since)` returns Bars (oldest first) starting at `since`,
+    or a default recent window when nothing is stored yet (since=None).
+    `since` is the second-newest stored bar: the newest may have been
+    incomplete, and the overlapping complete bar shows whether the provider
+    has restated history (split/dividend adjustment), in which case the
+    stored series is dropped and rebuilt. If the store is unusable the
+    fetched rows are returned directly.
+
+    If the provider's archived series holds n bars and is current (see
+    archive.MAX_AGE), those are returned without calling `fetch_tail`;
+    callers that also need the provider's live response must fetch it
+    themselves in that case.
+    """
+    archived = archive.recent(provider, symbol, interval, n)
+    if len(archived) >= n and archive.current(archived):
+        return archived
+    return _sync(provider, symbol, interval, fetch_tail, n)
+
+
+def _sync(provider, symbol, interval, fetch_tail, n):
+    try:
+        tail = STORE.recent(provider, symbol, interval, 2)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Bar store unavailable ({e}); fetching {symbol} directly")
+        return Bars.from_rows(fetch_tail(None)).tail(n)
+
+    since = tail[0][0] if tail else None
+    rows = Bars.from_rows(fetch_tail(since))
+    restated = len(tail) == 2 and rows and rows[0][0] == since and not _same_bar(rows[0], tail[0])
+    if restated:
+        logger.info(f"{provider} restated {symbol} history; rebuilding stored bars")
+        rows = Bars.from_rows(fetch_tail(None))
+    try:
+        if restated:
+            STORE.delete(provider, symbol, interval)
+        STORE.upsert(provider, symbol, interval, rows)
+        _notify(provider, symbol, interval, rows, restated)
+        return STORE.recent(provider, symbol, interval, n)
+    except sqlite3.Error as e:
+        logger.warning(f"Bar store write failed ({e})")
+        return rows.tail(n)
+
+
+def _after_archive(provider, symbol, interval, fetch_tail, archived):
+    """Stored bars newer than the archive's last one, fetching the gap between them once.
+
+    The archive's last bar is stored as an anchor if the provider has no
+    bar at that date, so later calls only sync the tail.
+    """
+    end = int(archived.ts[-1])
+    _sync(provider, symbol, interval, fetch_tail, 1)
+    try:
+        first = STORE.first_ts(provider, symbol, interval)
+        if first is None or first > end:
+            STORE.upsert(provider, symbol, interval, archived[-1:])
+            STORE.upsert(provider, symbol, interval, fetch_tail(end))
+        return STORE.load(provider, symbol, interval, start=end + 1)
+    except sqlite3.Error as e:
+        logger.warning(f"Bar store unavailable ({e}); fetching {symbol} directly")
+        rows = Bars.from_rows(fetch_tail(end))
+        return rows[rows.ts > end]
+
+
+def history(provider, symbol, interval, fetch_tail, n, days_per_bar=1.5):
+    """Sync the series and return its newest n bars, backfilling if needed.
+
+    Archived bars (providers/archive.py) cover as much of the lookback as
+    they can, and only the bars after the archive's newest one are synced.
+    Otherwise, when fewer than n bars are stored, `fetch_tail` is asked
+    once for everything since roughly n bars ago (`days_per_bar` calendar
+    days per bar: ~1.5 for equities with weekends and holidays, 1 for
+    crypto).
+    """
+    archived = archive.recent(provider, symbol, interval, n)
+    if archived:
+        if len(archived) >= n and archive.current(archived):
+            return archived
+        bars = Bars.concat([archived, _after_archive(provider, symbol, interval, fetch_tail, archived)])
+        if len(bars) >= n:
+            return bars.tail(n)
+    bars = _sync(provider, symbol, interval, fetch_tail, n)
+    if len(bars) >= n:
+        return bars
+    rows = Bars.from_rows(fetch_tail(day_ts(time.time() - n * days_per_bar * 86400)))
+    try:
+        STORE.upsert(provider, symbol, interval, rows)
+        return STORE.recent(provider, symbol, interval, n)
+    except sqlite3.Error as e:
+        logger.warning(f"Bar store write failed ({e})")
+        return rows.tail(n)
@@ -0,0 +1,130 @@
+"""Columnar OHLCV bars on NumPy arrays.
+
+Every provider parses its price history into a `Bars` before rendering, so
+the bar store, indicators and comparison code share one compact
+representation instead of lists of per-row dicts and tuples: an int64
+epoch-second `ts` column and float64 `open/high/low/close/volume` columns,
+with NaN for missing values. Slices are views, not copies.
+
+For code that reads bars row by row, a `Bars` also behaves like the bar
+store's old list of rows: `bars[i]` and iteration give
+(ts, open, high, low, close, volume) tuples with None for missing values.
+"""
+
+import os
+
+import numpy as np
+
+COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+
+
+def _value(x):
+    return None if x != x else float(x)  # NaN -> None
+
+
+class Bars:
+    """OHLCV bars, oldest first."""
+
+    __slots__ = COLUMNS
+
+    def __init__(self, ts, open, high, low, close, volume):
+        self.ts = np.asarray(ts, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    @classmethod
+    def empty(cls):
+        return cls(*([],) * len(COLUMNS))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Bars from (ts, open, high, low, close, volume) rows; values may be
+        None or numeric strings. A Bars is returned unchanged."""
+        if isinstance(rows, Bars):
+            return rows
+        data = np.array(rows, dtype=np.float64).reshape(-1, len(COLUMNS)).T.copy()
+        return cls(*data)
+
+    @classmethod
+    def from_records(cls, records, keys, parse_ts=int):
+        """Bars from a list of dicts, e.g. Polygon `results` or Tiingo `prices`.
+
+        `keys` names the (ts, open, high, low, close, volume) fields;
+        `parse_ts` turns a raw ts value into epoch seconds.
+        """
+        ts_key, *value_keys = keys
+        ts = [parse_ts(r[ts_key]) for r in records]
+        return cls(ts, *(np.array([r.get(k) for r in records], dtype=np.float64) for k in value_keys))
+
+    @classmethod
+    def concat(cls, parts):
+        parts = [Bars.from_rows(p) for p in parts]
+        if not parts:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(p, c) for p in parts]) for c in COLUMNS))
+
+    @classmethod
+    def from_npz(cls, path):
+        """Bars saved by `to_npz` (extra metadata arrays in the file are ignored)."""
+        with np.load(path) as data:
+            return cls(*(data[c] for c in COLUMNS))
+
+    def to_npz(self, path, **meta):
+        """Save the columns, plus `meta` values, as a compressed .npz.
+
+        Written to a temporary file and renamed, so a reader (or a resumed
+        backfill) never sees a partial file.
+        """
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **{c: getattr(self, c) for c in COLUMNS}, **meta)
+        os.replace(tmp, path)
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __bool__(self):
+        return len(self.ts) > 0
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return (int(self.ts[key]), *(_value(getattr(self, c)[key]) for c in COLUMNS[1:]))
+        return Bars(*(getattr(self, c)[key] for c in COLUMNS))
+
+    def __iter__(self):
+        return iter(self.rows())
+
+    def __reversed__(self):
+        return reversed(self.rows())
+
+    def __eq__(self, other):
+        if not isinstance(other, Bars):
+            return NotImplemented
+        return all(np.array_equal(getattr(self, c), getattr(other, c), equal_nan=c != "ts") for c in COLUMNS)
+
+    def __repr__(self):
+        return f"Bars({len(self)} bars, {self.nbytes} bytes)"
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, c).nbytes for c in COLUMNS)
+
+    def rows(self):
+        """Plain (ts, open, high, low, close, volume) tuples, None for missing values."""
+        values = [getattr(self, c).tolist() for c in COLUMNS[1:]]
+        return [
+            (ts, *(None if x != x else x for x in row))
+            for ts, row in zip(self.ts.tolist(), zip(*values))
+        ]
+
+    def tail(self, n):
+        """The newest n bars (a view)."""
+        return self[len(self) - min(n, len(self)):]
+
+    def complete(self):
+        """Bars whose high, low and close are all present."""
+        ok = ~(np.isnan(self.high) | np.isnan(self.low) | np.isnan(self.close))
+        return self if ok.all() else self[ok]
@@ -0,0 +1,55 @@
+"""Multi-symbol query helpers shared by the providers.
+
+Tools accept comma-separated symbol lists ('AAPL, MSFT, NVDA' or
+'AAPL,MSFT RSI'). Providers with a native batch endpoint use it; the rest
+fan the symbols out over a bounded pool with `fan_out()`.
+"""
+
+import contextvars
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+
+def split_query(query):
+    """Split 'AAPL, MSFT RSI' into (['AAPL', 'MSFT'], 'RSI').
+
+    Symbols are upper-cased and de-duplicated in order; everything after the
+    symbol list is returned untouched as the shared arguments.
+    """
+    normalized = re.sub(r"\s*,\s*", ",", query.strip())
+    head, _, rest = normalized.partition(" ")
+    symbols = list(dict.fromkeys(s.upper() for s in head.split(",") if s))
+    return symbols, rest.strip()
+
+
+def chunks(items, size):
+    """Yield successive slices of at most `size` items."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def fan_out(func, symbols, rest="", max_workers=None):
+    """Run a single-symbol query function for each symbol, at most
+    `max_workers` at a time, and join the outputs in input order.
+
+    Uses its own short-lived pool: the query functions themselves fan out
+    sub-requests on the shared transport pool, which must not be starved.
+    """
+    queries = [f"{symbol} {rest}".strip() for symbol in symbols]
+    workers = min(max_workers or MAX_CONCURRENCY, len(queries)) or 1
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        runs = [pool.submit(contextvars.copy_context().run, func, q) for q in queries]  # keep the tool's context
+        return "\n\n".join(r.result() for r in runs)
+
+
+def fmt_num(value, spec=",.2f"):
+    """Format a number for table output; N/A for missing values."""
+    if value in (None, ""):
+        return "N/A"
+    try:
+        return format(float(value), spec)
+    except (TypeError, ValueError):
+        return str(value)
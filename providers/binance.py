@@ -1,32 +1,242 @@
 """Binance — crypto spot prices, klines, order book.
 
-Public endpoints, no API key needed.
+Public endpoints, no API key needed. With BINANCE_STREAM_SYMBOLS set,
+those pairs are answered from the live WebSocket stream
+(providers/binance_stream.py) and REST is only the fallback.
 """
 
+import functools
+import json
+
 import requests
 from langchain.tools import Tool
 
-# Use binance.us for US-based users; fall back to binance.com for others
+from providers import bar_store, binance_stream, cache, health, registry
+from providers.bars import Bars
+from providers.batch import fan_out, fmt_num, split_query
+from providers.transport import gather, get_json, to_coroutine
+
+# binance.us for US-based users, binance.com for others; whichever answers
+# fastest from here is tried first (see _base_urls)
 BASE_URLS = [
     "https://api.binance.us/api/v3",
     "https://api.binance.com/api/v3",
 ]
+# Days per fetch_range request: klines returns at most 1,000 candles
+RANGE_DAYS = 1000
+
+
+def _base_urls():
+    """BASE_URLS, fastest reachable first — probed once via /ping, then remembered."""
+    return health.fastest("binance", BASE_URLS)
+
+
+def _pair(symbol):
+    """'btc', 'BTC/USDT' or 'BTC-USDT' -> 'BTCUSDT'."""
+    symbol = symbol.strip().upper().replace("/", "").replace("-", "")
+    return symbol if symbol.endswith("USDT") else symbol + "USDT"
+
+
+# Background WebSocket streamer for BINANCE_STREAM_SYMBOLS (None if unset)
+STREAM = binance_stream.from_env(_pair)
+
+
+def _live(symbol):
+    """Fresh in-memory snapshot of a streamed pair, or None."""
+    live = STREAM.snapshot(symbol) if STREAM is not None else None
+    if live is not None:
+        cache.note(cache.TTLS["quote"])  # an answer from it ages like a REST quote
+    return live
+
+
+def _format_live(symbol, live):
+    base = symbol.replace("USDT", "")
+    lines = [f"Binance live data for {symbol} (WebSocket stream, updated {live['age']:.1f}s ago):"]
+    trade = live["last_trade"]
+    if trade:
+        side = "sell" if trade["sell"] else "buy"
+        lines.append(f"  Last Trade: ${trade['price']:.2f} ({trade['qty']:g} {base}, {side})")
+    if live["best_bid"] and live["best_ask"]:
+        (bid, bid_qty), (ask, ask_qty) = live["best_bid"], live["best_ask"]
+        spread_bp = (ask - bid) / ((ask + bid) / 2) * 10000
+        lines.append(
+            f"  Bid/Ask: ${bid:.2f} x {bid_qty:g} / ${ask:.2f} x {ask_qty:g} (spread {spread_bp:.1f} bp)"
+        )
+    t = live["ticker"]
+    if t:
+        change = (t["close"] - t["open"]) / t["open"] * 100 if t["open"] else 0.0
+        lines.append(f"  24h High: ${t['high']:.2f}")
+        lines.append(f"  24h Low: ${t['low']:.2f}")
+        lines.append(f"  24h Change: {change:+.2f}%")
+        lines.append(f"  24h Volume: {t['volume']:,.2f} {base}")
+        lines.append(f"  24h Quote Volume: ${t['quote_volume']:,.0f} USDT")
+    k = live["kline"]
+    if k:
+        state = "closed" if k["closed"] else "open"
+        lines.append(
+            f"  1m Candle ({state}): O={k['open']:.2f} H={k['high']:.2f} L={k['low']:.2f} "
+            f"C={k['close']:.2f} V={k['volume']:g}"
+        )
+    r = live["recent"]
+    if r:
+        lines.append(
+            f"  Last 60s: {r['count']} trades, {r['volume']:g} {base}, VWAP ${r['vwap']:.2f}, "
+            f"range ${r['low']:.2f}-${r['high']:.2f}, {r['buy_share'] * 100:.0f}% buys"
+        )
+    if live["bids"] and live["asks"]:
+        lines.append(f"\nOrder book (top 5 of {len(live['bids'])}, imbalance {live['imbalance']:+.2f}):")
+        lines.append("  Bids: " + ", ".join(f"{p:.2f} x {q:g}" for p, q in live["bids"][:5]))
+        lines.append("  Asks: " + ", ".join(f"{p:.2f} x {q:g}" for p, q in live["asks"][:5]))
+    return "\n".join(lines)
+
+
+def _fetch_klines(base_url, symbol, since):
+    """Daily klines since `since` (or the last 5 on a cold start) as Bars."""
+    if since is None:
+        kline_params = {"symbol": symbol, "interval": "1d", "limit": 5}
+    else:
+        kline_params = {"symbol": symbol, "interval": "1d", "startTime": since * 1000, "limit": 1000}
+    klines = get_json(
+        "binance", f"{base_url}/klines", kline_params, "bars",
+        ok=lambda d: isinstance(d, list),
+    )
+    if not isinstance(klines, list):
+        return Bars.empty()
+    return Bars.from_rows([(k[0] // 1000, *k[1:6]) for k in klines])
+
+
+def fetch_range(symbol, start, end):
+    """Daily candles dated start..end (UTC-midnight epoch seconds), for bulk backfills.
+
+    Bypasses the response cache: years of bars would crowd out everything else.
+    """
+    symbol = _pair(symbol)
+    params = {"symbol": symbol, "interval": "1d", "startTime": start * 1000, "endTime": end * 1000, "limit": 1000}
+    for base_url in _base_urls():
+        try:
+            klines = get_json("binance", f"{base_url}/klines", params)
+        except requests.RequestException:
+            health.demote("binance", base_url)
+            continue
+        if not isinstance(klines, list):
+            raise LookupError(klines.get("msg", f"no klines for {symbol}"))
+        return Bars.from_rows([(k[0] // 1000, *k[1:6]) for k in klines])
+    raise LookupError(f"all Binance endpoints unreachable for {symbol}")
+
+
+def history(symbol, n):
+    """The newest n daily candles for a pair, backfilled into the bar store as needed."""
+    symbol = _pair(symbol)
+    for base_url in _base_urls():
+        try:
+            bars = bar_store.history(
+                "binance", symbol, "1d", functools.partial(_fetch_klines, base_url, symbol), n, days_per_bar=1,
+            )
+        except requests.RequestException:
+            health.demote("binance", base_url)
+            continue
+        if bars:
+            return bars
+    return Bars.empty()
+
+
+def get_quote(symbol):
+    """Last price, price 24h ago and 24h volume for the router's crypto_price need."""
+    symbol = _pair(symbol)
+    live = _live(symbol)
+    if live is not None and live["ticker"]:
+        t = live["ticker"]
+        return {"price": t["close"], "prev_close": t["open"], "volume": t["volume"]}
+    for base_url in _base_urls():
+        try:
+            ticker = get_json(
+                "binance", f"{base_url}/ticker/24hr", {"symbol": symbol}, "quote",
+                ok=lambda d: "code" not in d and "msg" not in d,
+            )
+        except requests.RequestException:
+            health.demote("binance", base_url)
+            continue
+        if "code" in ticker or "msg" in ticker:
+            raise LookupError(ticker.get("msg", f"no ticker for {symbol}"))
+        price = float(ticker["lastPrice"])
+        return {
+            "price": price,
+            "prev_close": price / (1 + float(ticker["priceChangePercent"]) / 100),
+            "volume": float(ticker["volume"]),
+        }
+    raise LookupError(f"all Binance endpoints unreachable for {symbol}")
+
+
+def _query_many(symbols):
+    """24h stats for several pairs in one request via ticker/24hr?symbols=[...].
+
+    Binance rejects the whole batch if any pair is unknown, so that case
+    falls back to one request per pair.
+    """
+    pairs = list(dict.fromkeys(_pair(s) for s in symbols))
+    live = {p: _live(p) for p in pairs}
+    if all(s and s["ticker"] for s in live.values()):
+        lines = [f"Binance 24h stats for {len(pairs)} pairs (WebSocket stream):"]
+        for p in pairs:
+            t = live[p]["ticker"]
+            change = (t["close"] - t["open"]) / t["open"] * 100 if t["open"] else 0.0
+            lines.append(
+                f"  {p}: Last=${t['close']:g} High=${t['high']:g} Low=${t['low']:g} "
+                f"Chg={change:.3f}% QuoteVol=${t['quote_volume']:,.0f}"
+            )
+        return "\n".join(lines)
+
+    param = json.dumps(pairs, separators=(",", ":"))
+    for base_url in _base_urls():
+        try:
+            tickers = get_json(
+                "binance", f"{base_url}/ticker/24hr", {"symbols": param}, "quote",
+                ok=lambda d: isinstance(d, list),
+            )
+        except requests.RequestException:
+            health.demote("binance", base_url)
+            continue
+        if not isinstance(tickers, list):
+            continue
+
+        lines = [f"Binance 24h stats for {len(tickers)} pairs:"]
+        for t in sorted(tickers, key=lambda t: pairs.index(t["symbol"])):
+            lines.append(
+                f"  {t['symbol']}: Last=${t['lastPrice']} High=${t['highPrice']} Low=${t['lowPrice']} "
+                f"Chg={t['priceChangePercent']}% QuoteVol=${fmt_num(t['quoteVolume'], ',.0f')}"
+            )
+        return "\n".join(lines)
+
+    return fan_out(query_binance, pairs)
 
 
 def query_binance(query: str) -> str:
     """Fetch crypto data from Binance.
 
     Query should be a trading pair like 'BTCUSDT' or just a symbol like 'BTC'
-    (USDT is appended automatically).
+    (USDT is appended automatically). A comma-separated list like
+    'BTC, ETH, SOL' returns 24h stats for every pair in one request.
     """
-    symbol = query.strip().upper().replace("/", "").replace("-", "")
-    if not symbol.endswith("USDT"):
-        symbol = symbol + "USDT"
+    symbols, _ = split_query(query)
+    if len(symbols) > 1:
+        return _query_many(symbols)
+    symbol = _pair(symbols[0])
+    live = _live(symbol)
+    if live is not None:
+        return _format_live(symbol, live)
 
     # Try each base URL (binance.us first for US users)
-    for base_url in BASE_URLS:
+    for base_url in _base_urls():
+        fetch_tail = functools.partial(_fetch_klines, base_url, symbol)
         try:
-            ticker = requests.get(f"{base_url}/ticker/24hr", params={"symbol": symbol}, timeout=10).json()
+            # 24h ticker and daily candles, fetched concurrently
+            ticker, candles = gather(
+                lambda: get_json(
+                    "binance", f"{base_url}/ticker/24hr", {"symbol": symbol}, "quote",
+                    ok=lambda d: "code" not in d and "msg" not in d,
+                ),
+                lambda: bar_store.sync("binance", symbol, "1d", fetch_tail),
+            )
             if "code" in ticker or "msg" in ticker:
                 continue
 
@@ -38,21 +248,14 @@ def query_binance(query: str) -> str:
             lines.append(f"  24h Volume: {ticker['volume']} {symbol.replace('USDT', '')}")
             lines.append(f"  24h Quote Volume: ${float(ticker['quoteVolume']):,.0f} USDT")
 
-            klines = requests.get(
-                f"{base_url}/klines",
-                params={"symbol": symbol, "interval": "1d", "limit": 5},
-                timeout=10,
-            ).json()
-
-            if klines and isinstance(klines, list):
+            if candles:
                 lines.append("\nDaily candles (last 5):")
-                for k in klines:
-                    from datetime import datetime
-                    ts = datetime.fromtimestamp(k[0] / 1000).strftime("%Y-%m-%d")
-                    lines.append(f"  {ts}: O={float(k[1]):.2f} H={float(k[2]):.2f} L={float(k[3]):.2f} C={float(k[4]):.2f}")
+                for ts, o, h, l, c, _ in candles:
+                    lines.append(f"  {bar_store.format_date(ts)}: O={o:.2f} H={h:.2f} L={l:.2f} C={c:.2f}")
 
             return "\n".join(lines)
         except requests.RequestException:
+            health.demote("binance", base_url)
             continue
 
     return f"Binance error for {symbol}: all endpoints unreachable. Try e.g. 'BTC', 'ETH', 'SOL'."
@@ -61,9 +264,6 @@ def query_binance(query: str) -> str:
 tool = Tool(
     name="binance",
     func=query_binance,
-    description=(
-        "Fetch crypto spot prices, 24h stats, and daily candles from Binance. "
-        "Input should be a crypto symbol like 'BTC', 'ETH', 'SOL' (USDT pair assumed). "
-        "Free, no API key needed. Best for crypto, not stocks."
-    ),
+    coroutine=to_coroutine(query_binance),
+    description=registry.spec("binance").description,
 )
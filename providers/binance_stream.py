@@ -0,0 +1,230 @@
+"""Binance WebSocket streamer — live trades, top of book and candles in memory.
+
+Optional: set BINANCE_STREAM_SYMBOLS (e.g. 'BTC,ETH,SOL') and a background
+thread subscribes to the combined stream for those pairs (trade, bookTicker,
+kline_1m, depth<N>@100ms and miniTicker). Each pair keeps a ring buffer of
+recent trades, a depth-limited order book, the current 1m candle and
+rolling 24h stats, so `query_binance` can answer from memory and only
+falls back to REST when the stream is stale or not configured.
+
+Needs the `websockets` package.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SYMBOLS = [s.strip() for s in os.getenv("BINANCE_STREAM_SYMBOLS", "").split(",") if s.strip()]
+STREAM_URL = os.getenv("BINANCE_STREAM_URL", "wss://stream.binance.us:9443")
+DEPTH = int(os.getenv("BINANCE_STREAM_DEPTH", "20"))          # 5, 10 or 20 levels
+TRADE_BUFFER = int(os.getenv("BINANCE_STREAM_TRADES", "4096"))  # trades kept per pair
+MAX_AGE = float(os.getenv("BINANCE_STREAM_MAX_AGE", "10"))      # seconds before falling back to REST
+
+_TRADE = np.dtype([("ts", "f8"), ("price", "f8"), ("qty", "f8"), ("sell", "?")])
+
+
+class TradeRing:
+    """Fixed-size ring buffer of trades in one preallocated NumPy array."""
+
+    def __init__(self, capacity=TRADE_BUFFER):
+        self.data = np.zeros(capacity, dtype=_TRADE)
+        self.count = 0  # trades ever appended
+
+    def append(self, ts, price, qty, sell):
+        self.data[self.count % len(self.data)] = (ts, price, qty, sell)
+        self.count += 1
+
+    def recent(self):
+        """Buffered trades, oldest first (a copy)."""
+        n = min(self.count, len(self.data))
+        start = self.count % len(self.data) if self.count > len(self.data) else 0
+        return np.concatenate((self.data[start:n], self.data[:start]))
+
+    def stats(self, since):
+        """Count, volume, VWAP, high, low and buy share of trades at or after `since`."""
+        trades = self.recent()
+        trades = trades[trades["ts"] >= since]
+        if not len(trades):
+            return None
+        volume = trades["qty"].sum()
+        return {
+            "count": len(trades),
+            "volume": volume,
+            "vwap": (trades["price"] * trades["qty"]).sum() / volume if volume else trades["price"][-1],
+            "high": trades["price"].max(),
+            "low": trades["price"].min(),
+            "buy_share": trades["qty"][~trades["sell"]].sum() / volume if volume else 0.0,
+        }
+
+
+class OrderBook:
+    """Depth-limited book from partial depth snapshots, with the best bid/ask
+    kept current from the (faster) bookTicker stream."""
+
+    def __init__(self):
+        self.bids = []  # [(price, qty)], best first
+        self.asks = []
+        self.best_bid = None  # (price, qty)
+        self.best_ask = None
+        self.update_id = 0
+
+    def apply_depth(self, data):
+        self.bids = [(float(p), float(q)) for p, q in data.get("bids", [])]
+        self.asks = [(float(p), float(q)) for p, q in data.get("asks", [])]
+        update_id = data.get("lastUpdateId", 0)
+        if update_id >= self.update_id:
+            self.update_id = update_id
+            self.best_bid = self.bids[0] if self.bids else None
+            self.best_ask = self.asks[0] if self.asks else None
+
+    def apply_book_ticker(self, data):
+        update_id = data.get("u", 0)
+        if update_id >= self.update_id:
+            self.update_id = update_id
+            self.best_bid = (float(data["b"]), float(data["B"]))
+            self.best_ask = (float(data["a"]), float(data["A"]))
+
+    def imbalance(self, levels=5):
+        """(bid qty - ask qty) / total over the top levels, in [-1, 1]."""
+        bid = sum(q for _, q in self.bids[:levels])
+        ask = sum(q for _, q in self.asks[:levels])
+        return (bid - ask) / (bid + ask) if bid + ask else 0.0
+
+
+class SymbolState:
+    """Everything the stream knows about one pair."""
+
+    def __init__(self, trades=TRADE_BUFFER):
+        self.lock = threading.Lock()
+        self.trades = TradeRing(trades)
+        self.book = OrderBook()
+        self.kline = None    # current 1m candle
+        self.ticker = None   # rolling 24h stats
+        self.updated = 0.0   # time.time() of the last message
+
+
+class Streamer:
+    """Background reader of the Binance combined stream for a set of pairs."""
+
+    def __init__(self, symbols, url=STREAM_URL, depth=DEPTH, trades=TRADE_BUFFER):
+        self.symbols = [s.upper() for s in symbols]
+        self.url = url.rstrip("/")
+        self.depth = depth
+        self.states = {s: SymbolState(trades) for s in self.symbols}
+        self.messages = 0
+        self.reconnects = 0
+        self._stop = threading.Event()
+        self._ws = None
+        self._thread = None
+
+    @property
+    def stream_url(self):
+        kinds = ("trade", "bookTicker", "kline_1m", f"depth{self.depth}@100ms", "miniTicker")
+        streams = "/".join(f"{s.lower()}@{kind}" for s in self.symbols for kind in kinds)
+        return f"{self.url}/stream?streams={streams}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="binance-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._ws is not None:
+            self._ws.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        try:
+            from websockets.sync.client import connect
+        except ImportError:
+            logger.warning("BINANCE_STREAM_SYMBOLS is set but the websockets package is not installed")
+            return
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                with connect(self.stream_url, open_timeout=10, max_size=2 ** 22) as ws:
+                    self._ws = ws
+                    logger.info(f"Binance stream connected ({', '.join(self.symbols)})")
+                    backoff = 1.0
+                    for raw in ws:
+                        self.handle(json.loads(raw))
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning(f"Binance stream error ({e}); reconnecting in {backoff:.0f}s")
+            finally:
+                self._ws = None
+            if self._stop.wait(backoff):
+                break
+            self.reconnects += 1
+            backoff = min(backoff * 2, 30.0)
+
+    def handle(self, msg):
+        """Apply one combined-stream message ({'stream': ..., 'data': ...})."""
+        symbol, _, kind = msg.get("stream", "").partition("@")
+        state = self.states.get(symbol.upper())
+        data = msg.get("data")
+        if state is None or not data:
+            return
+        self.messages += 1
+        with state.lock:
+            if kind == "trade":
+                state.trades.append(data["T"] / 1000, float(data["p"]), float(data["q"]), data["m"])
+            elif kind == "bookTicker":
+                state.book.apply_book_ticker(data)
+            elif kind.startswith("kline"):
+                k = data["k"]
+                state.kline = {
+                    "start": k["t"] / 1000, "open": float(k["o"]), "high": float(k["h"]),
+                    "low": float(k["l"]), "close": float(k["c"]), "volume": float(k["v"]), "closed": k["x"],
+                }
+            elif kind.startswith("depth"):
+                state.book.apply_depth(data)
+            elif kind == "miniTicker":
+                state.ticker = {
+                    "open": float(data["o"]), "high": float(data["h"]), "low": float(data["l"]),
+                    "close": float(data["c"]), "volume": float(data["v"]), "quote_volume": float(data["q"]),
+                }
+            state.updated = time.time()
+
+    def snapshot(self, symbol, window=60, max_age=MAX_AGE):
+        """Point-in-time view of one pair, or None if it isn't streamed or is stale."""
+        state = self.states.get(symbol.upper())
+        if state is None:
+            return None
+        with state.lock:
+            age = time.time() - state.updated
+            if age > max_age:
+                return None
+            trades = state.trades
+            last = trades.data[(trades.count - 1) % len(trades.data)] if trades.count else None
+            return {
+                "age": age,
+                "last_trade": None if last is None else {
+                    "ts": float(last["ts"]), "price": float(last["price"]),
+                    "qty": float(last["qty"]), "sell": bool(last["sell"]),
+                },
+                "recent": trades.stats(time.time() - window),
+                "best_bid": state.book.best_bid,
+                "best_ask": state.book.best_ask,
+                "bids": list(state.book.bids),
+                "asks": list(state.book.asks),
+                "imbalance": state.book.imbalance(),
+                "kline": dict(state.kline) if state.kline else None,
+                "ticker": dict(state.ticker) if state.ticker else None,
+            }
+
+
+def from_env(pair):
+    """A started Streamer for BINANCE_STREAM_SYMBOLS (normalized with `pair`), or None."""
+    if not SYMBOLS:
+        return None
+    return Streamer(list(dict.fromkeys(pair(s) for s in SYMBOLS))).start()
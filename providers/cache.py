@@ -0,0 +1,203 @@
+"""Shared TTL response cache for provider queries.
+
+Every provider routes its HTTP lookups through `cached()`, keyed by
+(provider, endpoint, normalized params). Entries expire after a TTL chosen
+by data class and are LRU-evicted once the cache exceeds CACHE_MAX_BYTES.
+
+`trace()` collects when the data read inside a block goes stale, so an
+answer built from it can be cached for exactly that long.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# TTL in seconds per data class. Override any of them with CACHE_TTL_<CLASS>,
+# e.g. CACHE_TTL_QUOTE=30.
+TTLS = {
+    "quote": 15,              # live prices, 24h tickers
+    "bars": 60,               # daily bars (the last bar still moves intraday)
+    "indicator": 300,         # remote technical indicators
+    "news": 300,
+    "trending": 300,
+    "series": 3600,           # FRED observations
+    "series_meta": 6 * 3600,  # FRED series info
+    "profile": 6 * 3600,      # FMP / Alpha Vantage company profiles
+    "fundamentals": 6 * 3600, # income statements
+    "details": 24 * 3600,     # Tiingo metadata, Polygon ticker details
+}
+for _cls in TTLS:
+    _override = os.getenv(f"CACHE_TTL_{_cls.upper()}")
+    if _override:
+        TTLS[_cls] = float(_override)
+
+MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Credentials never become part of a cache key
+_SECRET_PARAMS = {"api_key", "apikey", "token"}
+
+
+def make_key(provider, endpoint, params=None):
+    """Build a hashable cache key from provider, endpoint and params."""
+    items = ()
+    if params:
+        items = tuple(sorted(
+            (str(k), str(v)) for k, v in params.items()
+            if str(k).lower() not in _SECRET_PARAMS
+        ))
+    return (provider, endpoint, items)
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and a memory cap."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._by_provider = {}  # provider -> [hits, misses]
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                self._drop(key)
+                entry = None
+            counts = self._by_provider.setdefault(key[0], [0, 0])
+            if entry is None:
+                self.misses += 1
+                counts[1] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            counts[0] += 1
+            return entry[2]
+
+    def set(self, key, value, ttl):
+        """Store value under key for ttl seconds, evicting LRU entries as needed."""
+        size = _approx_size(value)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def expires(self, key):
+        """time.monotonic() at which key's entry expires, or None if it isn't cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and memory usage."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "providers": {p: {"hits": h, "misses": m} for p, (h, m) in self._by_provider.items()},
+            }
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+def _approx_size(value):
+    """Rough in-memory footprint of a JSON-like value, in bytes."""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+CACHE = TTLCache()
+
+
+def cached(provider, endpoint, params, data_class, fetch, ok=None):
+    """Return the cached response for this request, calling fetch() on a miss.
+
+    `fetch` is a zero-argument callable returning the parsed response.
+    `ok`, if given, decides whether a fresh response is worth caching —
+    providers use it to keep rate-limit notices and error payloads out.
+    """
+    key = make_key(provider, endpoint, params)
+    value = CACHE.get(key)
+    if value is None:
+        value = fetch()
+        if ok is None or ok(value):
+            CACHE.set(key, value, TTLS[data_class])
+    if _traces:
+        # Not cached (an error payload) counts as stale already
+        expires = CACHE.expires(key)
+        _record(time.monotonic() if expires is None else expires)
+    return value
+
+
+# ─── Freshness tracing ──────────────────────────────────────────────
+
+_traces = []  # expiry lists of the traces in progress
+_trace_lock = threading.Lock()
+
+
+def _record(expires):
+    with _trace_lock:
+        for expiries in _traces:
+            expiries.append(expires)
+
+
+@contextmanager
+def trace():
+    """Collect the expiry (time.monotonic()) of every cached response read
+    while the block runs, on any thread, into the list it yields.
+
+    Concurrent traces each see every read, which can only make the data
+    behind an answer look staler than it is.
+    """
+    expiries = []
+    with _trace_lock:
+        _traces.append(expiries)
+    try:
+        yield expiries
+    finally:
+        with _trace_lock:
+            _traces[:] = [t for t in _traces if t is not expiries]
+
+
+def note(seconds):
+    """Tell the traces in progress that data read outside the cache (a local
+    store, a live stream) stays fresh for `seconds` more."""
+    if _traces:
+        _record(time.monotonic() + max(seconds, 0))
+
+
+def stats():
+    """Hit/miss counters for the shared cache."""
+    return CACHE.stats()
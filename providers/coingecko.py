@@ -3,9 +3,13 @@
 Free, no API key required.
 """
 
-import requests
 from langchain.tools import Tool
 
+from providers import bar_store, registry
+from providers.bars import Bars
+from providers.batch import chunks, fmt_num, split_query
+from providers.transport import get_json, to_coroutine
+
 BASE_URL = "https://api.coingecko.com/api/v3"
 
 # Map common symbols to CoinGecko IDs
@@ -28,17 +32,100 @@ COIN_MAP = {
 }
 
 
+def _coin_id(symbol):
+    """CoinGecko ID for BTC, BTCUSDT or an ID like 'bitcoin'."""
+    symbol = symbol.strip().upper()
+    symbol = symbol[:-4] if symbol.endswith("USDT") else symbol
+    return COIN_MAP.get(symbol, symbol.lower())
+
+
+def get_quote(symbol):
+    """Last price, price 24h ago and 24h volume (USD) for the router's crypto_price need."""
+    coin_id = _coin_id(symbol)
+    params = {"localization": "false", "tickers": "false", "community_data": "false", "developer_data": "false"}
+    resp = get_json("coingecko", f"{BASE_URL}/coins/{coin_id}", params, "quote", ok=lambda d: "error" not in d)
+    price = resp.get("market_data", {}).get("current_price", {}).get("usd")
+    if price is None:
+        raise LookupError(resp.get("error", f"no price for {coin_id}"))
+    market = resp["market_data"]
+    change = market.get("price_change_percentage_24h")
+    return {
+        "price": price,
+        "prev_close": price / (1 + change / 100) if change is not None else None,
+        "volume": market.get("total_volume", {}).get("usd"),
+    }
+
+
+def history(symbol, n):
+    """The newest n daily USD closes as Bars, for the router's crypto_bars need.
+
+    The market chart has no OHLC: open, high and low are NaN. Its last
+    point is the current price, which stands in for today's close.
+    """
+    coin_id = _coin_id(symbol)
+    params = {"vs_currency": "usd", "days": n, "interval": "daily"}
+    resp = get_json(
+        "coingecko", f"{BASE_URL}/coins/{coin_id}/market_chart", params, "bars", ok=lambda d: "prices" in d,
+    )
+    if "prices" not in resp:
+        raise LookupError(resp.get("error", f"no market chart for {coin_id}"))
+    days = {bar_store.day_ts(ms // 1000): price for ms, price in resp["prices"]}  # later points win
+    volumes = {bar_store.day_ts(ms // 1000): v for ms, v in resp.get("total_volumes", [])}
+    nan = float("nan")
+    return Bars.from_rows([(ts, nan, nan, nan, close, volumes.get(ts)) for ts, close in days.items()]).tail(n)
+
+
+def _query_many(symbols):
+    """Market data for several coins via /coins/markets (up to 250 ids per request)."""
+    ids = list(dict.fromkeys(COIN_MAP.get(s, s.lower()) for s in symbols))
+    coins = []
+    for chunk in chunks(ids, 250):
+        params = {
+            "vs_currency": "usd",
+            "ids": ",".join(chunk),
+            "per_page": 250,
+            "price_change_percentage": "24h,7d,30d",
+        }
+        resp = get_json("coingecko", f"{BASE_URL}/coins/markets", params, "quote", ok=lambda d: isinstance(d, list))
+        if not isinstance(resp, list):
+            return f"CoinGecko error: {resp.get('error', resp.get('status', resp))}"
+        coins.extend(resp)
+
+    found = {c["id"]: c for c in coins}
+    lines = [f"CoinGecko market data for {len(found)} coins:"]
+    for coin_id in ids:
+        c = found.get(coin_id)
+        if c is None:
+            continue
+        lines.append(
+            f"  #{c.get('market_cap_rank', '?')} {c.get('name', coin_id)} ({c.get('symbol', '').upper()}): "
+            f"Price=${fmt_num(c.get('current_price'))} "
+            f"24h={fmt_num(c.get('price_change_percentage_24h_in_currency'), '+.2f')}% "
+            f"7d={fmt_num(c.get('price_change_percentage_7d_in_currency'), '+.2f')}% "
+            f"30d={fmt_num(c.get('price_change_percentage_30d_in_currency'), '+.2f')}% "
+            f"MCap=${fmt_num(c.get('market_cap'), ',.0f')} Vol=${fmt_num(c.get('total_volume'), ',.0f')}"
+        )
+    missing = [coin_id for coin_id in ids if coin_id not in found]
+    if missing:
+        lines.append(f"  Not found: {', '.join(missing)}")
+    return "\n".join(lines)
+
+
 def query_coingecko(query: str) -> str:
     """Fetch crypto data from CoinGecko.
 
     Query can be a symbol (BTC, ETH) or CoinGecko ID (bitcoin, ethereum),
-    or 'trending' to see trending coins.
+    a comma-separated list of either, or 'trending' to see trending coins.
     """
     q = query.strip().upper()
 
     try:
+        symbols, _ = split_query(q)
+        if len(symbols) > 1:
+            return _query_many(symbols)
+
         if q == "TRENDING":
-            resp = requests.get(f"{BASE_URL}/search/trending", timeout=10).json()
+            resp = get_json("coingecko", f"{BASE_URL}/search/trending", None, "trending", ok=lambda d: "coins" in d)
             coins = resp.get("coins", [])
             lines = ["CoinGecko trending coins:"]
             for item in coins[:10]:
@@ -52,11 +139,8 @@ def query_coingecko(query: str) -> str:
         # Resolve symbol to ID
         coin_id = COIN_MAP.get(q, q.lower())
 
-        resp = requests.get(
-            f"{BASE_URL}/coins/{coin_id}",
-            params={"localization": "false", "tickers": "false", "community_data": "false", "developer_data": "false"},
-            timeout=10,
-        ).json()
+        params = {"localization": "false", "tickers": "false", "community_data": "false", "developer_data": "false"}
+        resp = get_json("coingecko", f"{BASE_URL}/coins/{coin_id}", params, "quote", ok=lambda d: "error" not in d)
 
         if "error" in resp:
             return f"CoinGecko: coin '{coin_id}' not found. Try 'BTC', 'ETH', 'SOL', or 'trending'."
@@ -81,9 +165,6 @@ def query_coingecko(query: str) -> str:
 tool = Tool(
     name="coingecko",
     func=query_coingecko,
-    description=(
-        "Fetch crypto prices, market cap, volume, and trends from CoinGecko. "
-        "Input: crypto symbol (BTC, ETH, SOL) or 'trending' for top trending coins. "
-        "Free, no API key needed. Best for crypto overview and market cap data."
-    ),
+    coroutine=to_coroutine(query_coingecko),
+    description=registry.spec("coingecko").description,
 )
@@ -0,0 +1,102 @@
+"""Consensus quote — one tool call that races every enabled equity provider.
+
+Queries Yahoo Finance, Finnhub, Polygon.io, Twelve Data and Tiingo in
+parallel, each under a shared deadline, and merges last price, prior close
+and volume into one table with the spread between sources. Sources whose
+rate-limit budget is spent are skipped rather than queued behind.
+"""
+
+import os
+import statistics
+import time
+
+from langchain.tools import Tool
+
+from providers import finnhub, polygon, ratelimit, registry, tiingo, twelve_data, yahoo_finance
+from providers.transport import race, to_coroutine
+
+TIMEOUT = float(os.getenv("CONSENSUS_TIMEOUT", "4"))
+
+# (tool name, provider module) — a provider takes part when its tool is enabled
+SOURCES = [
+    ("yahoo_finance", yahoo_finance),
+    ("finnhub", finnhub),
+    ("polygon", polygon),
+    ("twelve_data", twelve_data),
+    ("tiingo", tiingo),
+]
+
+
+def _fmt(value, spec=".2f"):
+    return "N/A" if value is None else format(value, spec)
+
+
+def query_consensus(query: str) -> str:
+    """Compare one ticker's quote across all enabled equity providers.
+
+    Query format: 'SYMBOL' to wait for every source (up to the deadline), or
+    'SYMBOL FIRST N' to return as soon as N sources have answered.
+    """
+    parts = query.strip().upper().split()
+    symbol = parts[0]
+    first = None
+    if "FIRST" in parts[1:]:
+        i = parts.index("FIRST")
+        first = int(parts[i + 1]) if i + 1 < len(parts) and parts[i + 1].isdigit() else 1
+
+    enabled = {name: module for name, module in SOURCES if module.tool is not None}
+    no_budget = [name for name in enabled if not ratelimit.has_capacity(name)]
+    for name in no_budget:
+        del enabled[name]
+    start = time.perf_counter()
+    results, errors = race(
+        {name: (lambda m=module: m.get_quote(symbol)) for name, module in enabled.items()},
+        timeout=TIMEOUT,
+        first=first,
+    )
+    elapsed = time.perf_counter() - start
+
+    quotes = {name: q for name, q in results.items() if q.get("price") is not None}
+    if not quotes:
+        detail = "; ".join(f"{name}: {e}" for name, e in errors.items()) or "no source answered in time"
+        if no_budget:
+            detail += f" (no budget left: {', '.join(no_budget)})"
+        return f"Consensus quote error for {symbol}: {detail}"
+
+    median = statistics.median(q["price"] for q in quotes.values())
+    lines = [f"Consensus quote for {symbol} ({len(quotes)}/{len(enabled)} sources in {elapsed:.2f}s):"]
+    lines.append(f"  {'Source':14s} {'Last':>10s} {'Prev Close':>11s} {'Chg%':>7s} {'Volume':>14s} {'vs Median':>10s}")
+    for name, q in sorted(quotes.items(), key=lambda item: item[1]["price"]):
+        price, prev = q["price"], q.get("prev_close")
+        change = (price / prev - 1) * 100 if prev else None
+        deviation = (price / median - 1) * 10_000
+        lines.append(
+            f"  {name:14s} {price:>10.2f} {_fmt(prev):>11s} {_fmt(change, '+.2f'):>7s} "
+            f"{_fmt(q.get('volume'), ',.0f'):>14s} {deviation:>+8.1f}bp"
+        )
+
+    prices = [q["price"] for q in quotes.values()]
+    spread = max(prices) - min(prices)
+    lines.append(f"\n  Median last: {median:.2f}")
+    lines.append(f"  Last price spread: {spread:.2f} ({spread / median * 100:.2f}%)")
+    prevs = [q["prev_close"] for q in quotes.values() if q.get("prev_close") is not None]
+    if len(prevs) > 1:
+        lines.append(f"  Prev close spread: {max(prevs) - min(prevs):.2f}")
+
+    missing = [name for name in enabled if name not in results and name not in errors]
+    if missing:
+        label = "Not awaited" if first else "Timed out"
+        lines.append(f"  {label}: {', '.join(missing)}")
+    if no_budget:
+        lines.append(f"  No budget left: {', '.join(no_budget)}")
+    if errors:
+        lines.append("  Errors: " + "; ".join(f"{name} ({e})" for name, e in errors.items()))
+    return "\n".join(lines)
+
+
+tool = Tool(
+    name="consensus_quote",
+    func=query_consensus,
+    coroutine=to_coroutine(query_consensus),
+    description=registry.spec("consensus_quote").description,
+)
@@ -5,24 +5,55 @@ Requires FINNHUB_API_KEY.
 
 import os
 from datetime import datetime, timedelta
-import requests
 from langchain.tools import Tool
 
+from providers import registry
+from providers.batch import fan_out, split_query
+from providers.transport import gather, get_json, to_coroutine
+
 API_KEY = os.getenv("FINNHUB_API_KEY")
 BASE_URL = "https://finnhub.io/api/v1"
 
 
+def _fetch_quote(symbol):
+    return get_json(
+        "finnhub", f"{BASE_URL}/quote", {"symbol": symbol}, "quote",
+        headers={"X-Finnhub-Token": API_KEY}, ok=lambda d: "error" not in d,
+    )
+
+
+def get_quote(symbol):
+    """Last price, prior close and volume for the consensus tool."""
+    quote = _fetch_quote(symbol)
+    if not quote.get("c"):
+        raise LookupError(quote.get("error", f"no quote for {symbol}"))
+    return {"price": quote["c"], "prev_close": quote.get("pc"), "volume": None}
+
+
 def query_finnhub(query: str) -> str:
     """Fetch real-time quote and recent news from Finnhub.
 
-    Query should be a stock ticker symbol like AAPL.
+    Query should be a stock ticker symbol like AAPL. Several comma-separated
+    symbols are fetched concurrently, one block per symbol.
     """
-    symbol = query.strip().upper().split()[0]
+    symbols, _ = split_query(query)
+    if len(symbols) > 1:
+        return fan_out(query_finnhub, symbols)
+    symbol = symbols[0]
     headers = {"X-Finnhub-Token": API_KEY}
 
     try:
-        # Real-time quote
-        quote = requests.get(f"{BASE_URL}/quote", params={"symbol": symbol}, headers=headers, timeout=10).json()
+        # Real-time quote and recent news (last 7 days), fetched concurrently
+        today = datetime.now().strftime("%Y-%m-%d")
+        week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+        news_params = {"symbol": symbol, "from": week_ago, "to": today}
+        quote, news = gather(
+            lambda: _fetch_quote(symbol),
+            lambda: get_json(
+                "finnhub", f"{BASE_URL}/company-news", news_params, "news",
+                headers=headers, ok=lambda d: isinstance(d, list),
+            ),
+        )
         lines = [f"Finnhub data for {symbol}:"]
         lines.append(f"  Current: ${quote.get('c', 'N/A')}")
         lines.append(f"  Open: ${quote.get('o', 'N/A')}")
@@ -32,16 +63,6 @@ def query_finnhub(query: str) -> str:
         change = quote.get('dp', 0)
         lines.append(f"  Change: {change}%")
 
-        # Recent news (last 7 days)
-        today = datetime.now().strftime("%Y-%m-%d")
-        week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-        news = requests.get(
-            f"{BASE_URL}/company-news",
-            params={"symbol": symbol, "from": week_ago, "to": today},
-            headers=headers,
-            timeout=10,
-        ).json()
-
         if news and isinstance(news, list):
             lines.append(f"\nRecent news ({min(len(news), 3)} headlines):")
             for article in news[:3]:
@@ -57,8 +78,6 @@ if API_KEY:
     tool = Tool(
         name="finnhub",
         func=query_finnhub,
-        description=(
-            "Fetch real-time stock quotes and recent company news from Finnhub. "
-            "Input should be a stock ticker symbol like AAPL, TSLA. Good for current price and news sentiment."
-        ),
+        coroutine=to_coroutine(query_finnhub),
+        description=registry.spec("finnhub").description,
     )
@@ -4,29 +4,96 @@ Requires FMP_API_KEY.
 """
 
 import os
-import requests
 from langchain.tools import Tool
 
+from providers import registry
+from providers.batch import chunks, fan_out, fmt_num, split_query
+from providers.transport import get_json, to_coroutine
+
 API_KEY = os.getenv("FMP_API_KEY")
 BASE_URL = "https://financialmodelingprep.com/stable"
 
 
+def get_fundamentals(symbol):
+    """Company profile fields for the router's fundamentals need (see providers.router)."""
+    resp = get_json(
+        "fmp", f"{BASE_URL}/profile", {"symbol": symbol, "apikey": API_KEY}, "profile",
+        ok=lambda d: isinstance(d, list) and bool(d),
+    )
+    if not isinstance(resp, list) or not resp:
+        message = resp.get("Error Message") if isinstance(resp, dict) else None
+        raise LookupError(message or f"no profile for {symbol}")
+    p = resp[0]
+    return {
+        "name": p.get("companyName"),
+        "sector": p.get("sector"),
+        "industry": p.get("industry"),
+        "market_cap": p.get("mktCap", p.get("marketCap")),
+        "price": p.get("price"),
+        "pe": None,
+        "eps": None,
+        "beta": p.get("beta"),
+        "dividend_yield": None,
+    }
+
+
+def _query_many(symbols):
+    """Snapshot rows for several symbols via the batch-quote endpoint.
+
+    The stable /profile endpoint takes one symbol per call, so batches use
+    /batch-quote, which covers the price/market-cap side of the profile.
+    """
+    rows = {}
+    for chunk in chunks(symbols, 100):
+        params = {"symbols": ",".join(chunk), "apikey": API_KEY}
+        resp = get_json(
+            "fmp", f"{BASE_URL}/batch-quote", params, "quote",
+            ok=lambda d: isinstance(d, list) and bool(d),
+        )
+        if not isinstance(resp, list):
+            return f"FMP error: {resp.get('Error Message', resp) if isinstance(resp, dict) else resp}"
+        rows.update((q.get("symbol"), q) for q in resp)
+
+    lines = [f"FMP quotes for {len(symbols)} symbols:"]
+    for symbol in symbols:
+        q = rows.get(symbol)
+        if q is None:
+            lines.append(f"  {symbol}: no data")
+            continue
+        lines.append(
+            f"  {symbol}: {q.get('name', '')} | Price=${fmt_num(q.get('price'))} "
+            f"Chg={fmt_num(q.get('changePercentage'), '+.2f')}% "
+            f"MktCap=${fmt_num(q.get('marketCap'), ',.0f')} Vol={fmt_num(q.get('volume'), ',.0f')} "
+            f"52W={fmt_num(q.get('yearLow'))}-{fmt_num(q.get('yearHigh'))}"
+        )
+    return "\n".join(lines)
+
+
 def query_fmp(query: str) -> str:
     """Fetch fundamentals and earnings from Financial Modeling Prep.
 
     Query format: 'SYMBOL' for company profile, or 'SYMBOL earnings' for earnings data.
+    Several comma-separated symbols ('AAPL,MSFT') return a batch quote table,
+    or one income statement block per symbol with 'earnings'.
     """
-    parts = query.strip().split()
-    symbol = parts[0].upper()
-    mode = parts[1].lower() if len(parts) > 1 else "profile"
+    symbols, rest = split_query(query)
+    mode = rest.split()[0].lower() if rest else "profile"
+    if len(symbols) > 1:
+        if mode == "earnings":
+            return fan_out(query_fmp, symbols, mode)
+        try:
+            return _query_many(symbols)
+        except Exception as e:
+            return f"FMP error: {e}"
+    symbol = symbols[0]
 
     try:
         if mode == "earnings":
-            resp = requests.get(
-                f"{BASE_URL}/income-statement",
-                params={"symbol": symbol, "apikey": API_KEY, "limit": 4},
-                timeout=10,
-            ).json()
+            params = {"symbol": symbol, "apikey": API_KEY, "limit": 4}
+            resp = get_json(
+                "fmp", f"{BASE_URL}/income-statement", params, "fundamentals",
+                ok=lambda d: isinstance(d, list) and bool(d),
+            )
 
             if not resp or isinstance(resp, dict):
                 return f"No earnings data for {symbol}"
@@ -41,11 +108,11 @@ def query_fmp(query: str) -> str:
             return "\n".join(lines)
 
         # Company profile
-        resp = requests.get(
-            f"{BASE_URL}/profile",
-            params={"symbol": symbol, "apikey": API_KEY},
-            timeout=10,
-        ).json()
+        params = {"symbol": symbol, "apikey": API_KEY}
+        resp = get_json(
+            "fmp", f"{BASE_URL}/profile", params, "profile",
+            ok=lambda d: isinstance(d, list) and bool(d),
+        )
 
         if not resp:
             return f"No FMP profile data for {symbol}"
@@ -73,9 +140,6 @@ if API_KEY:
     tool = Tool(
         name="financial_modeling_prep",
         func=query_fmp,
-        description=(
-            "Fetch company fundamentals, profiles, and earnings from Financial Modeling Prep. "
-            "Input: 'SYMBOL' for company profile or 'SYMBOL earnings' for income statements. "
-            "Good for fundamental analysis — revenue, net income, EPS, market cap, DCF."
-        ),
+        coroutine=to_coroutine(query_fmp),
+        description=registry.spec("financial_modeling_prep").description,
     )
@@ -2,12 +2,22 @@
 
 Macro data: interest rates, CPI, GDP, unemployment.
 Requires FRED_API_KEY.
+
+Series are kept in a local store (providers/fred_store.py): the full
+history is downloaded once and later questions only fetch new or revised
+observations, so long spans like 'CPI last 20 years' come from disk.
 """
 
+import math
 import os
-import requests
+import re
+from datetime import date, timedelta
 from langchain.tools import Tool
 
+from providers import fred_store, registry
+from providers.batch import fan_out
+from providers.transport import get_json, to_coroutine
+
 API_KEY = os.getenv("FRED_API_KEY")
 BASE_URL = "https://api.stlouisfed.org/fred"
 
@@ -31,50 +41,117 @@ SERIES_ALIASES = {
 }
 
 
+# 'last 20 years', 'past 6 months', '10y', 'since 2005' or 'since 2019-06'
+_SPAN = re.compile(
+    r"\b(?:(?:over|in|for|during)\s+)?(?:the\s+)?(?:last|past)\s+(\d+)\s*(year|yr|month|week|day|[ymwd])s?\b"
+    r"|\b(\d+)([ymwd])\b"
+    r"|\bsince\s+(\d{4}(?:-\d{2}){0,2})\b",
+    re.IGNORECASE,
+)
+_DAYS_PER = {"y": 365.25, "m": 30.4375, "w": 7, "d": 1}
+_SAMPLE_ROWS = 24
+
+
+def _parse_span(query):
+    """(query without the span, ISO start date or None)."""
+    match = _SPAN.search(query)
+    if not match:
+        return query, None
+    count, unit, short_count, short_unit, since = match.groups()
+    rest = (query[:match.start()] + query[match.end():]).strip()
+    if since:
+        return rest, (since + "-01-01")[:10] if len(since) == 4 else (since + "-01")[:10]
+    days = int(count or short_count) * _DAYS_PER[(unit or short_unit)[0].lower()]
+    return rest, (date.today() - timedelta(days=days)).isoformat()
+
+
+def _fetch_meta(series_id):
+    info_params = {"series_id": series_id, "api_key": API_KEY, "file_type": "json"}
+    serieses = get_json("fred", f"{BASE_URL}/series", info_params).get("seriess") or []
+    return serieses[0] if serieses else None
+
+
+def _fetch_observations(series_id, start):
+    """(date, value, realtime_start) rows from `start` on, or the full history."""
+    obs_params = {"series_id": series_id, "api_key": API_KEY, "file_type": "json", "sort_order": "asc"}
+    if start is not None:
+        obs_params["observation_start"] = start
+    resp = get_json("fred", f"{BASE_URL}/series/observations", obs_params)
+    if "observations" not in resp:
+        raise LookupError(resp.get("error_message", "no observations returned"))
+    return [
+        (obs["date"], fred_store.parse_value(obs["value"]), obs.get("realtime_start"))
+        for obs in resp["observations"]
+    ]
+
+
+def get_series(series_id, start=None):
+    """(metadata, [(date, value)]) from ISO date `start` on, through the local FRED store."""
+    return fred_store.series(
+        series_id, lambda: _fetch_meta(series_id), lambda since: _fetch_observations(series_id, since), start,
+    )
+
+
+def _fmt(value):
+    return "." if value is None else f"{value:g}"
+
+
+def _span_lines(rows):
+    """Summary plus a sample of at most _SAMPLE_ROWS observations."""
+    values = [(d, v) for d, v in rows if v is not None]
+    if not values:
+        return ["\n  No observations in this period."]
+    (first_date, first), (last_date, last) = values[0], values[-1]
+    high = max(values, key=lambda r: r[1])
+    low = min(values, key=lambda r: r[1])
+    lines = [f"\n  {len(rows)} observations from {rows[0][0]} to {rows[-1][0]}:"]
+    change = f"    Change: {last - first:+g}"
+    if first:
+        change += f" ({(last / first - 1) * 100:+.1f}%)"
+    years = (date.fromisoformat(last_date) - date.fromisoformat(first_date)).days / 365.25
+    if years >= 1 and first > 0 and last > 0:
+        change += f", {((last / first) ** (1 / years) - 1) * 100:+.2f}% per year"
+    lines.append(f"    First: {first_date} = {_fmt(first)}   Last: {last_date} = {_fmt(last)}")
+    lines.append(change)
+    lines.append(f"    High: {_fmt(high[1])} on {high[0]}   Low: {_fmt(low[1])} on {low[0]}")
+
+    step = math.ceil(len(rows) / _SAMPLE_ROWS)
+    sampled = rows[::-1][::step]
+    lines.append("\n  Observations" + (f" (every {step}th):" if step > 1 else ":"))
+    for d, v in sampled:
+        lines.append(f"    {d}: {_fmt(v)}")
+    return lines
+
+
 def query_fred(query: str) -> str:
     """Fetch macroeconomic data from FRED.
 
     Query can be a FRED series ID (e.g. 'FEDFUNDS') or a keyword
-    like 'CPI', 'GDP', 'unemployment', 'federal funds rate'.
+    like 'CPI', 'GDP', 'unemployment', 'federal funds rate'. Several
+    comma-separated series ('CPI, GDP, unemployment') are fetched concurrently.
+    Add a span ('CPI last 20 years', 'UNRATE 5y', 'GDP since 2000') for a
+    summary of that period instead of the latest observations.
     """
-    q = query.strip().upper()
-    series_id = SERIES_ALIASES.get(q, q.split()[0])
+    if "," in query:
+        return fan_out(query_fred, [term.strip() for term in query.split(",") if term.strip()])
+    term, start = _parse_span(query)
+    series_id = fred_store.resolve(term, SERIES_ALIASES)
 
     try:
-        # Get series info
-        info_resp = requests.get(
-            f"{BASE_URL}/series",
-            params={"series_id": series_id, "api_key": API_KEY, "file_type": "json"},
-            timeout=10,
-        ).json()
-
-        serieses = info_resp.get("seriess", [])
-        if not serieses:
+        meta, rows = get_series(series_id, start)
+        if meta is None:
             return f"FRED series '{series_id}' not found. Try keywords like: CPI, GDP, unemployment, federal funds rate, treasury"
 
-        meta = serieses[0]
         lines = [f"FRED data for {meta.get('title', series_id)} ({series_id}):"]
         lines.append(f"  Units: {meta.get('units', 'N/A')}")
         lines.append(f"  Frequency: {meta.get('frequency', 'N/A')}")
 
-        # Get recent observations
-        obs_resp = requests.get(
-            f"{BASE_URL}/series/observations",
-            params={
-                "series_id": series_id,
-                "api_key": API_KEY,
-                "file_type": "json",
-                "sort_order": "desc",
-                "limit": 6,
-            },
-            timeout=10,
-        ).json()
-
-        observations = obs_resp.get("observations", [])
-        if observations:
+        if start:
+            lines.extend(_span_lines(rows))
+        elif rows:
             lines.append("\n  Recent observations:")
-            for obs in observations:
-                lines.append(f"    {obs['date']}: {obs['value']}")
+            for d, v in reversed(rows):
+                lines.append(f"    {d}: {_fmt(v)}")
 
         return "\n".join(lines)
     except Exception as e:
@@ -86,10 +163,6 @@ if API_KEY:
     tool = Tool(
         name="fred",
         func=query_fred,
-        description=(
-            "Fetch macroeconomic data from FRED (Federal Reserve). "
-            "Input can be a series ID like 'FEDFUNDS' or keywords like 'CPI', 'GDP', "
-            "'unemployment', 'federal funds rate', 'treasury', 'mortgage', 'money supply'. "
-            "Best for macro/economic indicators, not individual stocks."
-        ),
+        coroutine=to_coroutine(query_fred),
+        description=registry.spec("fred").description,
     )
@@ -0,0 +1,272 @@
+"""Persistent on-disk store for FRED series.
+
+A series' full observation history is downloaded once into a local SQLite
+database. Later syncs only ask for the observations since the last few
+stored dates: the overlap picks up revised values, and each row keeps the
+`realtime_start` of the vintage it came from. Series metadata is kept in
+its own table with its own refresh interval. A local alias index maps
+keywords like 'CPI' to series IDs, and titles of stored series count as
+aliases too.
+
+Observations are re-synced after cache.TTLS["series"] seconds and metadata
+after cache.TTLS["series_meta"], so a question about a stored series is
+answered from disk, and a refresh is one small request.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from providers import cache
+from providers.transport import gather
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = Path(os.getenv(
+    "FRED_STORE_PATH",
+    Path(__file__).resolve().parent.parent / "data" / "fred.sqlite",
+))
+
+# Trailing stored observations re-requested on each sync to catch revisions
+REVISION_WINDOW = int(os.getenv("FRED_REVISION_WINDOW", "12"))
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS series (
+        series_id    TEXT PRIMARY KEY,
+        title        TEXT,
+        units        TEXT,
+        frequency    TEXT,
+        last_updated TEXT,
+        fetched      REAL  -- time.time() of the metadata request
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS observations (
+        series_id      TEXT NOT NULL,
+        date           TEXT NOT NULL,
+        value          REAL,  -- NULL for FRED's '.' (missing)
+        realtime_start TEXT,
+        PRIMARY KEY (series_id, date)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS synced (
+        series_id TEXT PRIMARY KEY,
+        at        REAL NOT NULL  -- time.time() of the last observation sync
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS aliases (
+        alias     TEXT PRIMARY KEY,
+        series_id TEXT NOT NULL
+    )
+    """,
+)
+
+_META_FIELDS = ("title", "units", "frequency", "last_updated")
+
+
+def parse_value(value):
+    """FRED observation value string -> float, or None for '.'."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FredStore:
+    """SQLite-backed series metadata, observations and alias index."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = None
+        self.seeded = False  # built-in aliases added to the index
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    def meta(self, series_id):
+        """Stored metadata dict (with 'fetched'), or None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT title, units, frequency, last_updated, fetched FROM series WHERE series_id=?",
+                (series_id,),
+            ).fetchone()
+        return dict(zip(_META_FIELDS + ("fetched",), row)) if row else None
+
+    def put_meta(self, series_id, meta, fetched):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?)",
+                    (series_id, *(meta.get(f) for f in _META_FIELDS), fetched),
+                )
+
+    def synced_at(self, series_id):
+        """time.time() of the last observation sync, or None if never synced."""
+        with self._lock:
+            row = self._connect().execute("SELECT at FROM synced WHERE series_id=?", (series_id,)).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, series_id, rows, synced):
+        """Insert or replace (date, value, realtime_start) rows and record the sync time."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?)",
+                    [(series_id, *row) for row in rows],
+                )
+                conn.execute("INSERT OR REPLACE INTO synced VALUES (?, ?)", (series_id, synced))
+
+    def load(self, series_id, start=None):
+        """[(date, value)] on or after `start` (ISO date), oldest first."""
+        sql = "SELECT date, value FROM observations WHERE series_id=?"
+        args = [series_id]
+        if start is not None:
+            sql += " AND date >= ?"
+            args.append(start)
+        with self._lock:
+            return self._connect().execute(sql + " ORDER BY date", args).fetchall()
+
+    def recent(self, series_id, n):
+        """The newest n (date, value) observations, oldest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT date, value FROM observations WHERE series_id=? ORDER BY date DESC LIMIT ?",
+                (series_id, n),
+            ).fetchall()
+        return rows[::-1]
+
+    def add_aliases(self, aliases):
+        """Add {alias: series_id} entries to the index (existing ones are kept)."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO aliases VALUES (?, ?)",
+                    [(alias.upper(), series_id) for alias, series_id in aliases.items()],
+                )
+
+    def lookup(self, term):
+        """Series ID for a keyword from the alias index, a stored ID or a stored title."""
+        term = term.strip().upper()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT series_id FROM aliases WHERE alias=?", (term,)).fetchone()
+            if row is None:
+                row = conn.execute("SELECT series_id FROM series WHERE series_id=?", (term,)).fetchone()
+            if row is None and term:
+                # Every word of the term in a stored title, e.g. 'consumer price'
+                words = term.split()
+                sql = "SELECT series_id FROM series WHERE " + " AND ".join(["UPPER(title) LIKE ?"] * len(words))
+                row = conn.execute(sql + " ORDER BY series_id LIMIT 1", [f"%{w}%" for w in words]).fetchone()
+        return row[0] if row else None
+
+
+STORE = FredStore()
+
+
+def resolve(term, aliases):
+    """Series ID for a query term: the alias index (seeded with `aliases`),
+    then stored series, then the term's first word taken as an ID."""
+    try:
+        if not STORE.seeded:
+            STORE.add_aliases(aliases)
+            STORE.seeded = True
+        series_id = STORE.lookup(term)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"FRED store unavailable ({e}); resolving {term!r} from the built-in aliases")
+        series_id = None
+    q = term.strip().upper()
+    return series_id or aliases.get(q) or q.split()[0]
+
+
+def sync(series_id, fetch_meta, fetch_observations, now=None):
+    """Bring a stored series up to date; return its metadata, or None if FRED
+    doesn't know it.
+
+    `fetch_meta()` returns the /series record (or None) and
+    `fetch_observations(start)` returns (date, value, realtime_start) rows
+    from ISO date `start` on, or the full history when start is None. Both
+    are only called when their refresh interval has passed, concurrently;
+    an observations error for a series whose metadata came back empty is
+    dropped, since FRED rejects observation requests for unknown series.
+    """
+    now = time.time() if now is None else now
+    meta = STORE.meta(series_id)
+    synced = STORE.synced_at(series_id)
+    need_meta = meta is None or now - meta["fetched"] > cache.TTLS["series_meta"]
+    need_obs = synced is None or now - synced > cache.TTLS["series"]
+
+    start = None
+    if need_obs and synced is not None:
+        window = STORE.recent(series_id, REVISION_WINDOW)
+        start = window[0][0] if window else None
+
+    calls = []
+    if need_meta:
+        calls.append(fetch_meta)
+    if need_obs:
+        calls.append(lambda: _outcome(lambda: fetch_observations(start)))
+    results = gather(*calls) if calls else []
+
+    if need_meta:
+        fetched = results.pop(0)
+        if not fetched:
+            return None
+        STORE.put_meta(series_id, fetched, now)
+        meta = STORE.meta(series_id)
+    if need_obs:
+        rows, error = results.pop(0)
+        if error is not None:
+            raise error
+        STORE.upsert(series_id, rows, now)
+        logger.debug(f"FRED {series_id}: synced {len(rows)} observations since {start or 'the start'}")
+        synced = now
+    cache.note(cache.TTLS["series"] - (now - synced))
+    return meta
+
+
+def _outcome(call):
+    """(result, None), or (None, exception) if `call` raised."""
+    try:
+        return call(), None
+    except Exception as e:
+        return None, e
+
+
+def series(series_id, fetch_meta, fetch_observations, start=None, n=6):
+    """(metadata, [(date, value)]) for a series: the observations on or after
+    ISO date `start`, or the newest n. Metadata is None for unknown series.
+
+    Syncs first (see `sync`). If the store is unusable the series is
+    fetched directly.
+    """
+    try:
+        meta = sync(series_id, fetch_meta, fetch_observations)
+        if meta is None:
+            return None, []
+        return meta, STORE.load(series_id, start) if start else STORE.recent(series_id, n)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"FRED store unavailable ({e}); fetching {series_id} directly")
+        meta, (rows, error) = gather(fetch_meta, lambda: _outcome(lambda: fetch_observations(None)))
+        if not meta:
+            return None, []
+        if error is not None:
+            raise error
+        rows = [(date, value) for date, value, _ in rows if start is None or date >= start]
+        return meta, rows if start else rows[-n:]
@@ -0,0 +1,209 @@
+"""Provider health — rolling latency/error windows and circuit breakers.
+
+transport.get_json records every HTTP request here, per provider and
+endpoint path; the router (providers/router.py) records whole source
+calls per data need and ranks sources from those windows. A provider whose
+requests keep failing trips its breaker and is left alone for a cool-down.
+
+Also picks the fastest reachable base URL for providers with mirrors
+(Binance), probing once and remembering the order.
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+from providers.ratelimit import SINGLE_FLIGHT
+
+WINDOW = int(os.getenv("ROUTER_WINDOW", "100"))
+BREAKER_FAILURES = int(os.getenv("ROUTER_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("ROUTER_BREAKER_COOLDOWN", "30"))
+PROBE_TIMEOUT = float(os.getenv("ROUTER_PROBE_TIMEOUT", "2"))
+
+
+class Health:
+    """The last `window` calls of one endpoint: (seconds, ok) pairs."""
+
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.samples.append((seconds, ok))
+
+    def __len__(self):
+        return len(self.samples)
+
+    def latencies(self):
+        """Latencies of the successful calls in the window, sorted."""
+        with self._lock:
+            return sorted(s for s, ok in self.samples if ok)
+
+    def percentile(self, pct):
+        """Nearest-rank latency percentile of the successful calls, or None."""
+        ordered = self.latencies()
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+    def error_rate(self):
+        with self._lock:
+            if not self.samples:
+                return 0.0
+            return sum(not ok for _, ok in self.samples) / len(self.samples)
+
+    def stats(self):
+        return {
+            "calls": len(self),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "error_rate": self.error_rate(),
+        }
+
+
+class Breaker:
+    """Circuit breaker: opens after `failures` failures in a row.
+
+    Once `cooldown` seconds have passed it is half-open: one trial call is
+    let through, and its outcome closes the breaker or re-opens it. Other
+    callers are turned away meanwhile, unless the trial has not reported
+    back within another `cooldown` (its caller never made the request).
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive = 0
+        self.opened = None  # monotonic time the breaker opened, None while closed
+        self.trips = 0
+        self.probe = None  # monotonic time the half-open trial call was admitted
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened >= self.cooldown else "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened < self.cooldown:
+                return False
+            if self.probe is not None and now - self.probe < self.cooldown:
+                return False  # a trial call is in flight
+            self.probe = now
+            return True
+
+    def record(self, ok):
+        with self._lock:
+            self.probe = None
+            if ok:
+                self.consecutive, self.opened = 0, None
+                return
+            self.consecutive += 1
+            half_open = self.opened is not None and time.monotonic() - self.opened >= self.cooldown
+            if half_open or (self.opened is None and self.consecutive >= self.failures):
+                self.opened = time.monotonic()
+                self.trips += 1
+
+
+_lock = threading.Lock()
+_health = {}  # (provider, endpoint) -> Health
+_breakers = {}  # provider -> Breaker
+_fastest = {}  # provider -> base URLs, fastest first
+
+
+def health(provider, endpoint):
+    with _lock:
+        h = _health.get((provider, endpoint))
+        if h is None:
+            h = _health[(provider, endpoint)] = Health()
+        return h
+
+
+def breaker(provider):
+    with _lock:
+        b = _breakers.get(provider)
+        if b is None:
+            b = _breakers[provider] = Breaker()
+        return b
+
+
+def observe(provider, endpoint, seconds, ok):
+    """Record one HTTP request; failures count towards the provider's breaker."""
+    health(provider, endpoint).record(seconds, ok)
+    breaker(provider).record(ok)
+
+
+def snapshot():
+    """{provider: {"breaker": state, "endpoints": {endpoint: stats}}}."""
+    with _lock:
+        windows = dict(_health)
+        breakers = dict(_breakers)
+    out = {}
+    for (provider, endpoint), h in sorted(windows.items()):
+        if not len(h):
+            continue
+        entry = out.setdefault(provider, {"breaker": "closed", "trips": 0, "endpoints": {}})
+        entry["endpoints"][endpoint] = h.stats()
+    for provider, b in breakers.items():
+        entry = out.setdefault(provider, {"breaker": "closed", "trips": 0, "endpoints": {}})
+        entry["breaker"], entry["trips"] = b.state, b.trips
+    return out
+
+
+def reset():
+    """Forget all windows, breakers and base URL choices (for tests)."""
+    with _lock:
+        _health.clear()
+        _breakers.clear()
+        _fastest.clear()
+
+
+def _ping(url):
+    from providers import transport  # transport records into this module
+
+    start = time.perf_counter()
+    transport.get(url, timeout=PROBE_TIMEOUT).raise_for_status()
+    return time.perf_counter() - start
+
+
+def _probe(urls, path):
+    from providers import transport
+
+    results, _ = transport.race(
+        {url: functools.partial(_ping, url + path) for url in urls}, timeout=PROBE_TIMEOUT,
+    )
+    reachable = sorted(results, key=results.get)
+    return reachable + [url for url in urls if url not in results]
+
+
+def fastest(provider, urls, path="/ping"):
+    """`urls` ordered fastest-first by one concurrent probe of `path`.
+
+    The probe runs on first use only; URLs that don't answer keep their
+    given order after the reachable ones. `demote` moves a URL that fails
+    later to the back.
+    """
+    with _lock:
+        order = _fastest.get(provider)
+    if order is None:
+        order = SINGLE_FLIGHT.do(("fastest", provider), lambda: _probe(urls, path))
+        with _lock:
+            order = _fastest.setdefault(provider, order)
+    return list(order)
+
+
+def demote(provider, url):
+    """Move a base URL that just failed behind the others."""
+    with _lock:
+        order = _fastest.get(provider)
+        if order and url in order and order[-1] != url:
+            order.remove(url)
+            order.append(url)
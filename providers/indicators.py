@@ -0,0 +1,558 @@
+"""Local technical indicators — computed from stored bars, no API quota.
+
+Vectorized NumPy versions of the indicators Alpha Vantage and Twelve Data
+serve (SMA, EMA, RSI, MACD, BBANDS, STOCH, ATR, ADX), with any period and
+lookback, computed over daily bars from the bar store (Yahoo Finance,
+Tiingo, Polygon or Binance). Conventions follow TA-Lib: EMA and Wilder
+averages are seeded with the simple mean of their first `period` inputs.
+
+Close-only indicators use every bar with a close, so close-only sources
+such as CoinGecko (NaN open/high/low) still serve them; STOCH, ATR and ADX
+need bars with a high and low too.
+
+Each indicator also has a streaming class (`STREAMING`) whose `update(row)`
+folds in one new bar in O(1). The latest value of every indicator for a
+series (`live`) is kept by those: bar_store.sync hands each bar it stores
+to them, so the summary only recomputes anything for a series it has not
+seen yet. The remote indicator tools fall back to `describe()` when their
+provider is rate-limited.
+"""
+
+import copy
+import os
+import threading
+from collections import deque
+
+import numpy as np
+from langchain.tools import Tool
+
+from providers import bar_store, registry, router
+from providers.bars import Bars
+from providers.batch import fan_out, split_query
+from providers.transport import to_coroutine
+
+# Minimum bars loaded per series, so EMA/Wilder values have converged
+HISTORY_BARS = int(os.getenv("INDICATOR_HISTORY_BARS", "300"))
+
+# Values per evaluation block of the recursive averages (see _recurse)
+_BLOCK = 64
+
+
+# ─── Vectorized indicators ──────────────────────────────────────────
+# Every function returns arrays as long as its input, NaN during warm-up.
+
+def _recurse(x, alpha, seed):
+    """y[0] = seed, then y[t] = y[t-1] + alpha * (x[t] - y[t-1]).
+
+    Evaluated a block at a time in closed form,
+    y[t] = d^t * (y[0] + alpha * sum(x[i] / d^i for i in 1..t)) with d = 1 - alpha,
+    so the Python loop runs once per _BLOCK values instead of once per value.
+    """
+    out = np.empty(len(x))
+    out[0] = seed
+    decay = 1.0 - alpha
+    for lo in range(1, len(x), _BLOCK):
+        chunk = x[lo:lo + _BLOCK]
+        if decay == 0:
+            out[lo:lo + len(chunk)] = chunk
+            continue
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out[lo:lo + len(chunk)] = powers * (out[lo - 1] + alpha * np.cumsum(chunk / powers))
+    return out
+
+
+def _smooth(x, period, alpha, start=0):
+    """Recursive average of x[start:], seeded with the mean of its first `period` values."""
+    out = np.full(len(x), np.nan)
+    seed_at = start + period - 1
+    if seed_at < len(x):
+        out[seed_at:] = _recurse(x[seed_at:], alpha, x[start:seed_at + 1].mean())
+    return out
+
+
+def _rolling_mean(x, period, start=0):
+    out = np.full(len(x), np.nan)
+    if start + period <= len(x):
+        sums = np.cumsum(np.concatenate(([0.0], x[start:])))
+        out[start + period - 1:] = (sums[period:] - sums[:-period]) / period
+    return out
+
+
+def _windows(x, period):
+    return np.lib.stride_tricks.sliding_window_view(x, period)
+
+
+def _true_range(high, low, close):
+    tr = np.full(len(close), np.nan)
+    prev = close[:-1]
+    tr[1:] = np.maximum(high[1:] - low[1:], np.maximum(abs(high[1:] - prev), abs(low[1:] - prev)))
+    return tr
+
+
+def _ratio(num, den, empty):
+    """100 * num / den, or `empty` where den is 0 (NaN stays NaN)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(den > 0, 100.0 * num / den, empty)
+    out[np.isnan(den)] = np.nan
+    return out
+
+
+def sma(close, period=20):
+    return _rolling_mean(close, period)
+
+
+def ema(close, period=20):
+    return _smooth(close, period, 2.0 / (period + 1))
+
+
+def rsi(close, period=14):
+    """Wilder's RSI; first value at index `period`."""
+    delta = np.concatenate(([np.nan], np.diff(close)))
+    gain = _smooth(np.clip(delta, 0, None), period, 1.0 / period, start=1)
+    loss = _smooth(np.clip(-delta, 0, None), period, 1.0 / period, start=1)
+    return _ratio(gain, gain + loss, 50.0)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """(MACD line, signal line, histogram)."""
+    line = ema(close, fast) - ema(close, slow)
+    sig = _smooth(line, signal, 2.0 / (signal + 1), start=slow - 1)
+    return line, sig, line - sig
+
+
+def bbands(close, period=20, k=2.0):
+    """(upper, middle, lower) bands, k population standard deviations wide."""
+    middle = sma(close, period)
+    std = np.full(len(close), np.nan)
+    if len(close) >= period:
+        std[period - 1:] = _windows(close, period).std(axis=1)
+    return middle + k * std, middle, middle - k * std
+
+
+def stoch(high, low, close, k_period=14, d_period=3):
+    """(%K, %D): fast stochastic and its d_period SMA."""
+    k = np.full(len(close), np.nan)
+    if len(close) >= k_period:
+        hh = _windows(high, k_period).max(axis=1)
+        ll = _windows(low, k_period).min(axis=1)
+        k[k_period - 1:] = _ratio(close[k_period - 1:] - ll, hh - ll, 0.0)
+    return k, _rolling_mean(k, d_period, start=k_period - 1)
+
+
+def atr(high, low, close, period=14):
+    """Wilder's average true range; first value at index `period`."""
+    return _smooth(_true_range(high, low, close), period, 1.0 / period, start=1)
+
+
+def adx(high, low, close, period=14):
+    """(ADX, +DI, -DI); ADX's first value is at index 2 * period - 1."""
+    up = np.concatenate(([np.nan], np.diff(high)))
+    down = np.concatenate(([np.nan], -np.diff(low)))
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+    alpha = 1.0 / period
+    tr = _smooth(_true_range(high, low, close), period, alpha, start=1)
+    plus_di = _ratio(_smooth(plus_dm, period, alpha, start=1), tr, 0.0)
+    minus_di = _ratio(_smooth(minus_dm, period, alpha, start=1), tr, 0.0)
+    dx = _ratio(abs(plus_di - minus_di), plus_di + minus_di, 0.0)
+    return _smooth(dx, period, alpha, start=period), plus_di, minus_di
+
+
+# name: (function, default params, output columns, needs high/low)
+INDICATORS = {
+    "SMA": (sma, (20,), ("SMA",), False),
+    "EMA": (ema, (20,), ("EMA",), False),
+    "RSI": (rsi, (14,), ("RSI",), False),
+    "MACD": (macd, (12, 26, 9), ("MACD", "Signal", "Hist"), False),
+    "BBANDS": (bbands, (20, 2.0), ("Upper", "Middle", "Lower"), False),
+    "STOCH": (stoch, (14, 3), ("K", "D"), True),
+    "ATR": (atr, (14,), ("ATR",), True),
+    "ADX": (adx, (14,), ("ADX", "+DI", "-DI"), True),
+}
+
+
+def to_arrays(bars, needs_hl=True):
+    """(ts, high, low, close) arrays from Bars (or rows), skipping bars without
+    a close or, if `needs_hl`, without a high and low."""
+    bars = Bars.from_rows(bars)
+    bars = bars.complete() if needs_hl else bars[~np.isnan(bars.close)]
+    return bars.ts, bars.high, bars.low, bars.close
+
+
+def compute(name, bars, params=()):
+    """Evaluate indicator `name` over Bars.
+
+    Returns (ts, {column: values}). `params` override the leading defaults,
+    e.g. compute("MACD", bars, (5, 35)) keeps the default signal period.
+    """
+    func, defaults, columns, needs_hl = INDICATORS[name]
+    params = _params(defaults, params)
+    ts, high, low, close = to_arrays(bars, needs_hl)
+    values = func(high, low, close, *params) if needs_hl else func(close, *params)
+    if len(columns) == 1:
+        values = (values,)
+    return ts, dict(zip(columns, values))
+
+
+def _params(defaults, params):
+    params = tuple(params) + tuple(defaults[len(params):])
+    return tuple(type(d)(p) for d, p in zip(defaults, params))
+
+
+# ─── Streaming indicators ───────────────────────────────────────────
+# update(row) takes one (ts, open, high, low, close, volume) bar in O(1)
+# and returns the indicator's current value(s), or None during warm-up.
+
+class _Smoother:
+    """Scalar counterpart of _smooth()."""
+
+    def __init__(self, period, alpha):
+        self.period = period
+        self.alpha = alpha
+        self.count = 0
+        self.value = 0.0  # running sum until seeded
+
+    def push(self, x):
+        self.count += 1
+        if self.count < self.period:
+            self.value += x
+            return None
+        if self.count == self.period:
+            self.value = (self.value + x) / self.period
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class _Window:
+    """Running sum (and sum of squares) over the last `period` values."""
+
+    def __init__(self, period):
+        self.period = period
+        self.values = deque()
+        self.sum = 0.0
+        self.sumsq = 0.0
+
+    def push(self, x):
+        self.values.append(x)
+        self.sum += x
+        self.sumsq += x * x
+        if len(self.values) > self.period:
+            old = self.values.popleft()
+            self.sum -= old
+            self.sumsq -= old * old
+        return len(self.values) == self.period
+
+
+class _Extremum:
+    """Rolling max (or min) over the last `period` values via a monotonic deque."""
+
+    def __init__(self, period, better):
+        self.period = period
+        self.better = better
+        self.items = deque()  # (index, value), values monotonic
+        self.index = 0
+
+    def push(self, x):
+        while self.items and not self.better(self.items[-1][1], x):
+            self.items.pop()
+        self.items.append((self.index, x))
+        if self.items[0][0] <= self.index - self.period:
+            self.items.popleft()
+        self.index += 1
+        return self.items[0][1]
+
+
+class SMA:
+    def __init__(self, period=20):
+        self.window = _Window(period)
+
+    def update(self, row):
+        return self.window.sum / self.window.period if self.window.push(row[4]) else None
+
+
+class EMA:
+    def __init__(self, period=20):
+        self.smoother = _Smoother(period, 2.0 / (period + 1))
+
+    def update(self, row):
+        return self.smoother.push(row[4])
+
+
+class RSI:
+    def __init__(self, period=14):
+        self.gain = _Smoother(period, 1.0 / period)
+        self.loss = _Smoother(period, 1.0 / period)
+        self.prev = None
+
+    def update(self, row):
+        close, prev, self.prev = row[4], self.prev, row[4]
+        if prev is None:
+            return None
+        gain = self.gain.push(max(close - prev, 0.0))
+        loss = self.loss.push(max(prev - close, 0.0))
+        if gain is None:
+            return None
+        return 100.0 * gain / (gain + loss) if gain + loss > 0 else 50.0
+
+
+class MACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = _Smoother(fast, 2.0 / (fast + 1))
+        self.slow = _Smoother(slow, 2.0 / (slow + 1))
+        self.signal = _Smoother(signal, 2.0 / (signal + 1))
+
+    def update(self, row):
+        fast, slow = self.fast.push(row[4]), self.slow.push(row[4])
+        if slow is None:
+            return None
+        line = fast - slow
+        sig = self.signal.push(line)
+        return None if sig is None else (line, sig, line - sig)
+
+
+class BBands:
+    def __init__(self, period=20, k=2.0):
+        self.window = _Window(period)
+        self.k = k
+
+    def update(self, row):
+        if not self.window.push(row[4]):
+            return None
+        n = self.window.period
+        mean = self.window.sum / n
+        std = max(self.window.sumsq / n - mean * mean, 0.0) ** 0.5
+        return mean + self.k * std, mean, mean - self.k * std
+
+
+class Stoch:
+    def __init__(self, k_period=14, d_period=3):
+        self.high = _Extremum(k_period, lambda kept, new: kept > new)
+        self.low = _Extremum(k_period, lambda kept, new: kept < new)
+        self.k_period = k_period
+        self.d = _Window(d_period)
+        self.count = 0
+
+    def update(self, row):
+        hh, ll = self.high.push(row[2]), self.low.push(row[3])
+        self.count += 1
+        if self.count < self.k_period:
+            return None
+        k = 100.0 * (row[4] - ll) / (hh - ll) if hh > ll else 0.0
+        return (k, self.d.sum / self.d.period) if self.d.push(k) else None
+
+
+class ATR:
+    def __init__(self, period=14):
+        self.smoother = _Smoother(period, 1.0 / period)
+        self.prev = None
+
+    def update(self, row):
+        prev, self.prev = self.prev, row[4]
+        if prev is None:
+            return None
+        return self.smoother.push(max(row[2] - row[3], abs(row[2] - prev), abs(row[3] - prev)))
+
+
+class ADX:
+    def __init__(self, period=14):
+        alpha = 1.0 / period
+        self.tr = _Smoother(period, alpha)
+        self.plus = _Smoother(period, alpha)
+        self.minus = _Smoother(period, alpha)
+        self.dx = _Smoother(period, alpha)
+        self.prev = None
+
+    def update(self, row):
+        prev, self.prev = self.prev, row
+        if prev is None:
+            return None
+        up, down = row[2] - prev[2], prev[3] - row[3]
+        tr = self.tr.push(max(row[2] - row[3], abs(row[2] - prev[4]), abs(row[3] - prev[4])))
+        plus = self.plus.push(up if up > down and up > 0 else 0.0)
+        minus = self.minus.push(down if down > up and down > 0 else 0.0)
+        if tr is None:
+            return None
+        plus_di = 100.0 * plus / tr if tr > 0 else 0.0
+        minus_di = 100.0 * minus / tr if tr > 0 else 0.0
+        total = plus_di + minus_di
+        adx_value = self.dx.push(100.0 * abs(plus_di - minus_di) / total if total > 0 else 0.0)
+        return None if adx_value is None else (adx_value, plus_di, minus_di)
+
+
+STREAMING = {
+    "SMA": SMA, "EMA": EMA, "RSI": RSI, "MACD": MACD,
+    "BBANDS": BBands, "STOCH": Stoch, "ATR": ATR, "ADX": ADX,
+}
+
+
+def streaming(name, params=()):
+    """A streaming indicator with the same parameter handling as compute()."""
+    return STREAMING[name](*_params(INDICATORS[name][1], params))
+
+# ─── Live indicators ────────────────────────────────────────────────
+# Latest values at default settings for stored series that have been asked
+# about, kept current by bar_store.sync: each bar it stores is folded into
+# the streaming states in O(1) instead of recomputing the whole lookback.
+
+class _Live:
+    """Streaming states for one series. A bar at the newest timestamp
+    replaces the previous version of that bar (a day still trading)."""
+
+    def __init__(self):
+        self.states = {name: streaming(name) for name in INDICATORS}
+        self.before = None  # copy of the states before the newest bar
+        self.ts = None
+        self.values = dict.fromkeys(INDICATORS)
+
+    def update(self, row, newest=True):
+        """Fold in one bar; `newest=False` skips keeping the copy that lets it be replaced."""
+        ts, _, high, low, close, _ = row
+        if close is None or (self.ts is not None and ts < self.ts):
+            return
+        if ts == self.ts:
+            if self.before is None:
+                return
+            self.states = self.before
+        self.before = copy.deepcopy(self.states) if newest else None
+        self.ts = ts
+        for name, state in self.states.items():
+            if not INDICATORS[name][3] or (high is not None and low is not None):
+                self.values[name] = state.update(row)
+
+
+_live = {}  # (provider, symbol, interval) -> _Live
+_live_lock = threading.Lock()
+
+
+def _on_bars(provider, symbol, interval, bars, restated):
+    """bar_store listener: fold newly stored bars into a series' live states."""
+    key = (provider, symbol, interval)
+    with _live_lock:
+        if restated:
+            _live.pop(key, None)  # history changed; seed again on the next request
+        elif key in _live:
+            for row in bars.rows():
+                _live[key].update(row)
+
+
+bar_store.subscribe(_on_bars)
+
+
+def live(provider, symbol, interval, bars):
+    """{indicator: latest value} for a series, seeding its streaming states
+    from `bars` the first time and afterwards folding in only bars newer
+    than the ones already seen."""
+    key = (provider, symbol, interval)
+    bars = Bars.from_rows(bars)
+    with _live_lock:
+        state = _live.get(key)
+        if state is None:
+            state = _live[key] = _Live()
+        elif state.ts is not None:
+            bars = bars[bars.ts >= state.ts]  # usually nothing: sync already fed them
+        rows = bars.rows()
+        for i, row in enumerate(rows):
+            state.update(row, newest=i == len(rows) - 1)
+        return dict(state.values)
+
+
+# ─── Tool ───────────────────────────────────────────────────────────
+
+def load_bars(symbol, n):
+    """(source, newest n daily bars) from the fastest source that has the symbol.
+
+    Sources are picked by providers.router: Binance first for USDT pairs.
+    """
+    routed = router.route(_need(symbol), symbol, n)
+    return routed.source, routed.value
+
+
+def _need(symbol):
+    return "crypto_bars" if symbol.endswith("USDT") else "daily_bars"
+
+
+def _bars_needed(params, last):
+    return max(HISTORY_BARS, last + 4 * int(max(params)))
+
+
+def describe(symbol, name, params=(), last=5):
+    """Text block with the last `last` values of one indicator for one symbol."""
+    _, defaults, columns, _ = INDICATORS[name]
+    params = _params(defaults, params)
+    source, bars = load_bars(symbol, _bars_needed(params, last))
+    ts, values = compute(name, bars, params)
+    label = f"{name}({', '.join(format(p, 'g') for p in params)})"
+    lines = [f"Local {label} for {symbol} (from {len(ts)} {source} daily bars, last {last}):"]
+    for i in range(max(len(ts) - last, 0), len(ts)):
+        row = ", ".join(f"{col}={values[col][i]:.2f}" for col in columns if not np.isnan(values[col][i]))
+        lines.append(f"  {bar_store.format_date(ts[i])}: {row or 'N/A (warm-up)'}")
+    return "\n".join(lines)
+
+
+def _summary(symbol):
+    """Latest value of every indicator at default settings, from the series' live states."""
+    source, bars = load_bars(symbol, HISTORY_BARS)
+    ts, _, _, close = to_arrays(bars, needs_hl=False)
+    stored_as = router.source_symbol(_need(symbol), source, symbol)
+    latest_values = live(source, stored_as, "1d", bars)
+    lines = [f"Local technical indicators for {symbol} (from {len(ts)} {source} daily bars):"]
+    lines.append(f"  As of {bar_store.format_date(ts[-1])}, close={close[-1]:.2f}")
+    for name, (_, defaults, columns, _) in INDICATORS.items():
+        value = latest_values[name]
+        value = () if value is None else value if isinstance(value, tuple) else (value,)
+        latest = ", ".join(f"{col}={v:.2f}" for col, v in zip(columns, value))
+        lines.append(f"  {name}({', '.join(format(p, 'g') for p in defaults)}): {latest or 'N/A'}")
+    return "\n".join(lines)
+
+
+def query_indicators(query: str) -> str:
+    """Compute technical indicators locally from daily bars.
+
+    Query format: 'SYMBOL' for the latest value of every indicator, or
+    'SYMBOL INDICATOR [PARAMS...] [LAST N]', e.g. 'AAPL RSI', 'AAPL RSI 7',
+    'AAPL MACD 12 26 9 LAST 10', 'BTCUSDT BBANDS 20 2.5'. Comma-separated
+    symbols ('AAPL,MSFT SMA 50') are computed one by one.
+    """
+    symbols, rest = split_query(query.upper())
+    if len(symbols) > 1:
+        return fan_out(query_indicators, symbols, rest)
+    symbol = symbols[0]
+
+    tokens = rest.split()
+    last = 5
+    if "LAST" in tokens:
+        i = tokens.index("LAST")
+        if i + 1 < len(tokens) and tokens[i + 1].isdigit():
+            last = max(1, int(tokens[i + 1]))
+        tokens = tokens[:i] + tokens[i + 2:]
+
+    try:
+        if not tokens:
+            return _summary(symbol)
+        name, params = tokens[0], tokens[1:]
+        if name not in INDICATORS:
+            return f"Unknown indicator '{name}'. Supported: {', '.join(INDICATORS)}"
+        try:
+            params = [float(p) for p in params]
+        except ValueError:
+            return f"Indicator parameters must be numbers, got '{' '.join(params)}'"
+        return describe(symbol, name, params, last)
+    except Exception as e:
+        return f"Local indicator error for {symbol}: {e}"
+
+
+def fallback(provider, symbol, name, params=()):
+    """Local result for a remote indicator call that was rate-limited."""
+    try:
+        return f"{provider} rate limit reached; computed locally instead.\n" + describe(symbol, name, params)
+    except Exception as e:
+        return f"{provider} rate limit reached, and local computation failed for {symbol}: {e}"
+
+
+tool = Tool(
+    name="technical_indicators",
+    func=query_indicators,
+    coroutine=to_coroutine(query_indicators),
+    description=registry.spec("technical_indicators").description,
+)
@@ -0,0 +1,333 @@
+"""Instrumentation — where each query's seconds go.
+
+Every tool call (see registry.lazy_tool) is timed, and the HTTP requests
+it makes are attributed to it: transport.get_json reports request time,
+payload bytes, retries and cache hits to the call in progress, across the
+fan-out pools (they run with the caller's context). LLM calls are timed by
+a LangChain callback handler (`llm_handler`). Cache, rate-limit and
+breaker state are read from their modules when metrics are rendered.
+
+`render()` gives Prometheus text format (GET /metrics on server.py, or the
+METRICS_FILE the REPL and batch mode rewrite), `report()` the REPL's
+/stats table.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+
+# Histogram buckets (seconds), Prometheus' defaults
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Recent observations kept per series for the percentiles in report()
+RECENT = 200
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name, self.help, self.kind = name, help, "counter"
+        self.values = {}  # label tuple -> value
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, labels=()):
+        return self.values.get(labels, 0)
+
+    def lines(self, label_names):
+        with self._lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_labels(label_names, labels)} {_number(v)}" for labels, v in items]
+
+
+class Histogram:
+    def __init__(self, name, help):
+        self.name, self.help, self.kind = name, help, "histogram"
+        self.series = {}  # label tuple -> [bucket counts, sum, count, recent]
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        with self._lock:
+            s = self.series.get(labels)
+            if s is None:
+                s = self.series[labels] = [[0] * len(BUCKETS), 0.0, 0, deque(maxlen=RECENT)]
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+            s[3].append(value)
+
+    def count(self, labels=()):
+        s = self.series.get(labels)
+        return s[2] if s else 0
+
+    def sum(self, labels=()):
+        s = self.series.get(labels)
+        return s[1] if s else 0.0
+
+    def percentile(self, pct, labels=()):
+        """Nearest-rank percentile of the recent observations, or None."""
+        with self._lock:
+            s = self.series.get(labels)
+            ordered = sorted(s[3]) if s else []
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+    def lines(self, label_names):
+        with self._lock:
+            items = sorted((labels, list(s[0]), s[1], s[2]) for labels, s in self.series.items())
+        out = []
+        for labels, buckets, total, count in items:
+            for bound, n in zip(BUCKETS, buckets):
+                out.append(f"{self.name}_bucket{_labels((*label_names, 'le'), (*labels, _number(bound)))} {n}")
+            out.append(f"{self.name}_bucket{_labels((*label_names, 'le'), (*labels, '+Inf'))} {count}")
+            out.append(f"{self.name}_sum{_labels(label_names, labels)} {_number(total)}")
+            out.append(f"{self.name}_count{_labels(label_names, labels)} {count}")
+        return out
+
+
+def _number(value):
+    return format(value, "g") if isinstance(value, float) else str(value)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+TOOL_CALLS = Counter("agent_tool_calls_total", "Tool calls by outcome (error = the tool answered with an error)")
+TOOL_SECONDS = Histogram("agent_tool_seconds", "Wall time of a tool call")
+TOOL_HTTP_SECONDS = Counter("agent_tool_http_seconds_total", "HTTP request time made on behalf of a tool, summed")
+TOOL_HTTP_BYTES = Counter("agent_tool_http_bytes_total", "Response payload bytes fetched on behalf of a tool")
+TOOL_CACHE = Counter("agent_tool_cache_requests_total", "Response cache lookups made by a tool, by result")
+HTTP_SECONDS = Histogram("agent_http_request_seconds", "Upstream HTTP request time, retries included")
+HTTP_BYTES = Counter("agent_http_response_bytes_total", "Upstream response payload bytes")
+HTTP_RETRIES = Counter("agent_http_retries_total", "Retries made after 429/5xx responses or connection errors")
+HTTP_ERRORS = Counter("agent_http_errors_total", "Requests that failed or ended with a 429/5xx")
+LLM_CALLS = Counter("agent_llm_calls_total", "LLM calls by outcome")
+LLM_SECONDS = Histogram("agent_llm_seconds", "Wall time of an LLM call")
+LLM_TOKENS = Counter("agent_llm_tokens_total", "LLM tokens by direction")
+
+# (metric, label names), in render() order
+_METRICS = [
+    (TOOL_CALLS, ("tool", "outcome")),
+    (TOOL_SECONDS, ("tool",)),
+    (TOOL_HTTP_SECONDS, ("tool",)),
+    (TOOL_HTTP_BYTES, ("tool",)),
+    (TOOL_CACHE, ("tool", "result")),
+    (HTTP_SECONDS, ("provider",)),
+    (HTTP_BYTES, ("provider",)),
+    (HTTP_RETRIES, ("provider",)),
+    (HTTP_ERRORS, ("provider",)),
+    (LLM_CALLS, ("outcome",)),
+    (LLM_SECONDS, ()),
+    (LLM_TOKENS, ("direction",)),
+]
+
+
+# ─── Recording ──────────────────────────────────────────────────────
+
+_current = contextvars.ContextVar("tool_call", default=None)  # name of the tool call in progress
+
+
+def is_error(text):
+    """Tools report failures as text; their first line then says 'error'."""
+    return " error" in f" {text}".split("\n", 1)[0].lower()
+
+
+@contextmanager
+def tool_call(name):
+    """Time one tool call; HTTP requests made inside it are attributed to it.
+
+    Yields a dict; set its "output" to the tool's answer to classify it.
+    """
+    call = {"output": None}
+    token = _current.set(name)
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield call
+        outcome = "error" if is_error(call["output"] or "") else "ok"
+    finally:
+        _current.reset(token)
+        TOOL_SECONDS.observe(time.perf_counter() - start, (name,))
+        TOOL_CALLS.inc((name, outcome))
+
+
+def http_request(provider, seconds, size, retries, ok):
+    """Record one upstream request (called by transport.get_json)."""
+    HTTP_SECONDS.observe(seconds, (provider,))
+    HTTP_BYTES.inc((provider,), size)
+    if retries:
+        HTTP_RETRIES.inc((provider,), retries)
+    if not ok:
+        HTTP_ERRORS.inc((provider,))
+    tool = _current.get()
+    if tool is not None:
+        TOOL_HTTP_SECONDS.inc((tool,), seconds)
+        TOOL_HTTP_BYTES.inc((tool,), size)
+
+
+def cache_lookup(hit):
+    tool = _current.get()
+    if tool is not None:
+        TOOL_CACHE.inc((tool, "hit" if hit else "miss"))
+
+
+def llm_handler():
+    """A LangChain callback handler recording every LLM call's time and tokens."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMMetrics(BaseCallbackHandler):
+        def __init__(self):
+            self._started = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            started = self._started.pop(run_id, None)
+            if started is None:
+                return
+            LLM_SECONDS.observe(time.perf_counter() - started)
+            LLM_CALLS.inc(("ok",))
+            for generations in response.generations:
+                usage = getattr(getattr(generations[0], "message", None), "usage_metadata", None) or {}
+                LLM_TOKENS.inc(("input",), usage.get("input_tokens", 0))
+                LLM_TOKENS.inc(("output",), usage.get("output_tokens", 0))
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                LLM_SECONDS.observe(time.perf_counter() - started)
+            LLM_CALLS.inc(("error",))
+
+    return LLMMetrics()
+
+
+def totals():
+    """Cumulative seconds in LLM calls, tool calls and HTTP, for per-query deltas."""
+    return {
+        "llm": sum(LLM_SECONDS.sum(labels) for labels in list(LLM_SECONDS.series)),
+        "tools": sum(TOOL_SECONDS.sum(labels) for labels in list(TOOL_SECONDS.series)),
+        "http": sum(TOOL_HTTP_SECONDS.values.values()),
+    }
+
+
+# ─── Export ─────────────────────────────────────────────────────────
+
+def _state_lines():
+    """Gauges and counters owned by other modules, read now."""
+    from providers import cache, health, ratelimit
+
+    lines = [
+        "# HELP agent_cache_requests_total Response cache lookups by provider and result",
+        "# TYPE agent_cache_requests_total counter",
+    ]
+    for provider, counts in sorted(cache.stats()["providers"].items()):
+        lines.append(f'agent_cache_requests_total{{provider="{provider}",result="hit"}} {counts["hits"]}')
+        lines.append(f'agent_cache_requests_total{{provider="{provider}",result="miss"}} {counts["misses"]}')
+    lines += [
+        "# HELP agent_ratelimit_remaining Requests the provider's rate limit allows right now",
+        "# TYPE agent_ratelimit_remaining gauge",
+    ]
+    budget = ratelimit.budget()
+    for provider, b in sorted(budget.items()):
+        lines.append(f'agent_ratelimit_remaining{{provider="{provider}"}} {b["remaining"]}')
+    lines += [
+        "# HELP agent_ratelimit_wait_seconds_total Time spent waiting for rate-limit slots",
+        "# TYPE agent_ratelimit_wait_seconds_total counter",
+    ]
+    for provider, b in sorted(budget.items()):
+        seconds = float(b.get("wait_seconds", 0.0))
+        lines.append(f'agent_ratelimit_wait_seconds_total{{provider="{provider}"}} {_number(seconds)}')
+    lines += [
+        "# HELP agent_breaker_open Whether the provider's circuit breaker is open (1) or not (0)",
+        "# TYPE agent_breaker_open gauge",
+    ]
+    for provider, entry in sorted(health.snapshot().items()):
+        lines.append(f'agent_breaker_open{{provider="{provider}"}} {int(entry["breaker"] == "open")}')
+    return lines
+
+
+def render():
+    """All metrics in Prometheus text exposition format."""
+    lines = []
+    for metric, label_names in _METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.lines(label_names))
+    lines.extend(_state_lines())
+    return "\n".join(lines) + "\n"
+
+
+def write(path=None):
+    """Write render() to `path` (default METRICS_FILE) atomically; no-op without a path."""
+    path = path or METRICS_FILE
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def report():
+    """Per-tool, per-provider and LLM timings as a text table."""
+    from providers import cache, ratelimit
+
+    lines = ["Tools:"]
+    lines.append(f"  {'tool':24s} {'calls':>5s} {'errors':>6s} {'p50':>7s} {'p95':>7s} {'avg HTTP':>8s} "
+                 f"{'avg other':>9s} {'KiB':>7s} {'cache hit':>9s}")
+    for (tool,) in sorted(TOOL_SECONDS.series):
+        calls = TOOL_SECONDS.count((tool,))
+        http = TOOL_HTTP_SECONDS.get((tool,))
+        hits, misses = TOOL_CACHE.get((tool, "hit")), TOOL_CACHE.get((tool, "miss"))
+        lines.append(
+            f"  {tool:24s} {calls:>5d} {TOOL_CALLS.get((tool, 'error')):>6d} "
+            f"{_ms(TOOL_SECONDS.percentile(50, (tool,))):>7s} {_ms(TOOL_SECONDS.percentile(95, (tool,))):>7s} "
+            f"{_ms(http / calls):>8s} {_ms(max(0.0, TOOL_SECONDS.sum((tool,)) - http) / calls):>9s} "
+            f"{TOOL_HTTP_BYTES.get((tool,)) / 1024:>7.1f} "
+            f"{(f'{hits / (hits + misses):.0%}' if hits + misses else '-'):>9s}"
+        )
+
+    lines.append("  (HTTP is request time summed over a call's parallel requests; other = the rest of the wall time)")
+
+    budget, by_provider = ratelimit.budget(), cache.stats()["providers"]
+    lines.append("\nProviders:")
+    lines.append(f"  {'provider':15s} {'requests':>8s} {'p50':>7s} {'p95':>7s} {'errors':>6s} {'retries':>7s} "
+                 f"{'KiB':>8s} {'cache hits':>10s} {'quota left':>10s}")
+    for (provider,) in sorted(HTTP_SECONDS.series):
+        remaining = budget.get(provider, {}).get("remaining")
+        lines.append(
+            f"  {provider:15s} {HTTP_SECONDS.count((provider,)):>8d} "
+            f"{_ms(HTTP_SECONDS.percentile(50, (provider,))):>7s} {_ms(HTTP_SECONDS.percentile(95, (provider,))):>7s} "
+            f"{HTTP_ERRORS.get((provider,)):>6d} {HTTP_RETRIES.get((provider,)):>7d} "
+            f"{HTTP_BYTES.get((provider,)) / 1024:>8.1f} {by_provider.get(provider, {}).get('hits', 0):>10d} "
+            f"{'-' if remaining is None else remaining:>10}"
+        )
+
+    calls = LLM_SECONDS.count()
+    lines.append(
+        f"\nLLM: {calls} calls ({LLM_CALLS.get(('error',))} errors), p50 {_ms(LLM_SECONDS.percentile(50))}, "
+        f"p95 {_ms(LLM_SECONDS.percentile(95))}, {LLM_SECONDS.sum():.1f}s total, "
+        f"{LLM_TOKENS.get(('input',))} tokens in / {LLM_TOKENS.get(('output',))} out"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,208 @@
+"""Tool output shaping: compact mode, per-tool token budgets and a token counter.
+
+Every tool answer is fed back to the model on each later scratchpad turn,
+so its size is prompt latency. With TOOL_OUTPUT_MODE=compact the
+provider text is rewritten before the agent sees it:
+  - runs of 'Key: value' lines become one 'Key=value; Key=value' line,
+  - runs of rows like '2026-10-16: Open=1 High=2 ...' (or '2026-09-01: 327.5')
+    become a CSV block with one header line,
+  - numbers lose thousands separators and trailing zeros, and values of a
+    million or more are abbreviated ($1,319,900,000,000 -> $1.32T),
+  - space-aligned tables (consensus_quote) become CSV,
+  - long free-text values (company descriptions) are cut to
+    TOOL_OUTPUT_MAX_FIELD characters,
+  - indentation and blank lines are dropped.
+Dates, field names and free text are kept as they are.
+
+Independently of the mode, TOOL_TOKEN_BUDGET (default for every tool) and
+TOOL_TOKEN_BUDGET_<TOOL> cap an answer's size; lines past the budget are
+replaced by a note saying how much was cut. 0 means no cap.
+
+Token counts use a tokenizer-like estimate by default. Set
+TOKEN_COUNTER=tiktoken to count with tiktoken's cl100k_base instead, if it
+is installed and its encoding is available.
+"""
+
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+MODE = os.getenv("TOOL_OUTPUT_MODE", "full").lower()  # full | compact
+DEFAULT_BUDGET = int(os.getenv("TOOL_TOKEN_BUDGET", "0"))
+MAX_FIELD = int(os.getenv("TOOL_OUTPUT_MAX_FIELD", "160"))
+COUNTER = os.getenv("TOKEN_COUNTER", "estimate").lower()  # estimate | tiktoken
+
+# Words, 1-3 digit groups, single punctuation marks, line breaks and runs
+# of spaces: close to how BPE tokenizers split the tables tools return.
+_PIECES = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]|\n| {2,}")
+_FIELD = re.compile(r"^([^:=|]{1,40}?): (.*)$")
+_PAIR = re.compile(r"([+-]?[A-Za-z][\w%/.()+-]*)=([^\s,;]+)")
+_PAIRS = re.compile(rf"{_PAIR.pattern}(?:[,;]?\s+{_PAIR.pattern})*")
+_NUMBER = re.compile(r"^([$#]?)(-?\d{1,3}(?:,\d{3})+|-?\d+)(\.\d+)?(%?)$")
+_INLINE_NUMBER = re.compile(r"=(\$?-?\d[\d,]*(?:\.\d+)?%?)(?=[\s;|]|$)")
+_GAP = re.compile(r"\s{2,}")
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_SCALES = ((1e12, "T"), (1e9, "B"), (1e6, "M"))
+
+_encoding = None
+_lock = threading.Lock()
+_stats = defaultdict(lambda: {"calls": 0, "raw": 0, "sent": 0, "truncated": 0})
+
+
+def _tiktoken():
+    global _encoding, COUNTER
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable ({e}); estimating token counts")
+            COUNTER = "estimate"
+            return None
+    return _encoding
+
+
+def count_tokens(text):
+    """Token count of `text` (see TOKEN_COUNTER)."""
+    if COUNTER == "tiktoken":
+        encoding = _tiktoken()
+        if encoding is not None:
+            return len(encoding.encode(text))
+    return len(_PIECES.findall(text))
+
+
+def budget(tool_name):
+    """Token budget for a tool's answers; 0 means unlimited."""
+    return int(os.getenv(f"TOOL_TOKEN_BUDGET_{tool_name.upper()}", DEFAULT_BUDGET))
+
+
+# ─── Compact mode ───────────────────────────────────────────────────
+
+def _clip(value):
+    return value if len(value) <= MAX_FIELD else value[:MAX_FIELD - 1].rstrip() + "…"
+
+
+def _number(value):
+    """'$1,319,900,000,000' -> '$1.32T', '272.80' -> '272.8'; other values unchanged."""
+    match = _NUMBER.match(value)
+    if not match:
+        return value
+    prefix, whole, frac, pct = match.groups()
+    number = float(whole.replace(",", "") + (frac or ""))
+    for scale, suffix in _SCALES:
+        if abs(number) >= scale and not pct:
+            return f"{prefix}{number / scale:.2f}{suffix}"
+    frac = (frac or "").rstrip("0").rstrip(".")
+    return f"{prefix}{whole.replace(',', '')}{frac}{pct}"
+
+
+def _text(line):
+    """A line that isn't a field or row: aligned columns -> CSV, k=v numbers shortened."""
+    if len(_GAP.findall(line)) >= 2:
+        return ",".join(_number(cell) for cell in _GAP.split(line))
+    line = _INLINE_NUMBER.sub(lambda m: "=" + _number(m.group(1)), line)
+    return _clip(line) if len(line) > 2 * MAX_FIELD else line
+
+
+def _classify(line):
+    """('row', label, [(key, value)]), ('field', key, value) or ('text', line, None)."""
+    match = _FIELD.match(line)
+    if match:
+        label, rest = match.groups()
+        if _PAIRS.fullmatch(rest.strip()):
+            return "row", label, _PAIR.findall(rest)
+        if rest and "=" not in rest:
+            return "field", label, rest
+    return "text", line, None
+
+
+def _flush(kind, group, out):
+    if not group:
+        return
+    if kind == "row" and len(group) > 1:
+        keys = [k for k, _ in group[0][1]]
+        first = "date" if _DATE.match(group[0][0]) else "key"
+        out.append(",".join([first, *keys]))
+        out.extend(",".join([label, *(_number(v) for _, v in pairs)]) for label, pairs in group)
+    elif kind == "row":
+        label, pairs = group[0]
+        out.append(f"{label}: " + " ".join(f"{k}={_number(v)}" for k, v in pairs))
+    elif kind == "series":
+        out.append("date,value")
+        out.extend(f"{label},{_number(value)}" for label, value in group)
+    else:
+        out.append("; ".join(f"{key}={_number(_clip(value))}" for key, value in group))
+
+
+def compact(text):
+    """Rewrite a provider answer in the dense form described above."""
+    out, group, kind = [], [], None
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or set(line) <= {"-", "=", "─"}:
+            continue
+        what, label, value = _classify(line)
+        if what == "field" and _DATE.match(label) and " " not in value:
+            what = "series"  # '2026-09-01: 327.5'
+        if what == "row":
+            same = kind == "row" and [k for k, _ in group[0][1]] == [k for k, _ in value]
+            item = (label, value)
+        else:
+            same = kind == what
+            item = (label, value)
+        if not same or what == "text":
+            _flush(kind, group, out)
+            group, kind = [], what
+        if what == "text":
+            out.append(_text(line))
+            kind = None
+        else:
+            group.append(item)
+    _flush(kind, group, out)
+    return "\n".join(out)
+
+
+# ─── Budgets ────────────────────────────────────────────────────────
+
+def fit(text, limit):
+    """`text` cut at a line boundary to at most about `limit` tokens."""
+    if limit <= 0 or count_tokens(text) <= limit:
+        return text, False
+    lines = text.splitlines()
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > limit and kept:
+            break
+        kept.append(line)
+        used += cost
+    dropped = len(lines) - len(kept)
+    kept.append(f"[... {dropped} more lines cut to fit a {limit}-token budget; ask for fewer symbols or a shorter span]")
+    return "\n".join(kept), True
+
+
+def shape(tool_name, text):
+    """Apply the output mode and the tool's budget to one answer, recording token counts."""
+    if not isinstance(text, str):
+        return text
+    raw = count_tokens(text)
+    shaped = compact(text) if MODE == "compact" else text
+    shaped, truncated = fit(shaped, budget(tool_name))
+    with _lock:
+        s = _stats[tool_name]
+        s["calls"] += 1
+        s["raw"] += raw
+        s["sent"] += count_tokens(shaped) if shaped is not text else raw
+        s["truncated"] += truncated
+    return shaped
+
+
+def stats():
+    """{tool: {calls, raw, sent, truncated}} token totals since start-up."""
+    with _lock:
+        return {name: dict(s) for name, s in _stats.items()}
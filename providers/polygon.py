@@ -3,46 +3,96 @@
 Requires POLYGON_API_KEY.
 """
 
+import functools
 import os
 from datetime import datetime, timedelta
-import requests
 from langchain.tools import Tool
 
+from providers import bar_store, registry
+from providers.bars import Bars
+from providers.batch import fan_out, fmt_num, split_query
+from providers.transport import gather, get_json, to_coroutine
+
 API_KEY = os.getenv("POLYGON_API_KEY")
 BASE_URL = "https://api.polygon.io"
+# Calendar days per fetch_range request: ~2,500 trading days, inside one
+# 5,000-result page (bulk backfills split longer ranges)
+RANGE_DAYS = 3650
+
+
+def _fetch_bars(symbol, since):
+    """Daily aggregates since `since` (or the last 10 days on a cold start)."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    if since is None:
+        start = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
+    else:
+        start = bar_store.format_date(since)
+    url = f"{BASE_URL}/v2/aggs/ticker/{symbol}/range/1/day/{start}/{today}"
+    params = {"apiKey": API_KEY, "limit": 5000, "sort": "asc"}
+    resp = get_json("polygon", url, params, "bars", ok=lambda d: d.get("resultsCount", 0) > 0)
+    return Bars.from_records(
+        resp.get("results", []), ("t", "o", "h", "l", "c", "v"), lambda t: bar_store.day_ts(t // 1000),
+    )
+
+
+def fetch_range(symbol, start, end):
+    """Daily Bars dated start..end (UTC-midnight epoch seconds), for bulk backfills.
+
+    Bypasses the response cache: years of bars would crowd out everything else.
+    """
+    url = f"{BASE_URL}/v2/aggs/ticker/{symbol}/range/1/day/{bar_store.format_date(start)}/{bar_store.format_date(end)}"
+    resp = get_json("polygon", url, {"apiKey": API_KEY, "limit": 5000, "sort": "asc"})
+    if resp.get("status") == "ERROR":
+        raise LookupError(resp.get("error", f"no aggregates for {symbol}"))
+    return Bars.from_records(
+        resp.get("results", []), ("t", "o", "h", "l", "c", "v"), lambda t: bar_store.day_ts(t // 1000),
+    )
+
+
+def _load_bars(symbol):
+    return bar_store.sync("polygon", symbol, "1d", functools.partial(_fetch_bars, symbol))
+
+
+def history(symbol, n):
+    """The newest n daily bars, backfilled into the bar store as needed."""
+    return bar_store.history("polygon", symbol, "1d", functools.partial(_fetch_bars, symbol), n)
+
+
+def get_quote(symbol):
+    """Last close, prior close and volume for the consensus tool."""
+    return bar_store.last_quote(_load_bars(symbol))
 
 
 def query_polygon(query: str) -> str:
     """Fetch aggregate price data from Polygon.io.
 
-    Query should be a stock ticker symbol like AAPL.
+    Query should be a stock ticker symbol like AAPL. Several comma-separated
+    symbols are fetched concurrently, one block per symbol.
     """
-    symbol = query.strip().upper().split()[0]
+    symbols, _ = split_query(query)
+    if len(symbols) > 1:
+        return fan_out(query_polygon, symbols)
+    symbol = symbols[0]
 
     try:
-        # Last 5 trading days of daily aggregates
-        today = datetime.now().strftime("%Y-%m-%d")
-        week_ago = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
-        url = f"{BASE_URL}/v2/aggs/ticker/{symbol}/range/1/day/{week_ago}/{today}"
-        resp = requests.get(url, params={"apiKey": API_KEY, "limit": 5, "sort": "desc"}, timeout=10).json()
-
-        if resp.get("resultsCount", 0) == 0:
+        # Aggregates and ticker details, fetched concurrently
+        bars, details = gather(
+            lambda: _load_bars(symbol),
+            lambda: get_json(
+                "polygon", f"{BASE_URL}/v3/reference/tickers/{symbol}", {"apiKey": API_KEY}, "details",
+                ok=lambda d: bool(d.get("results")),
+            ),
+        )
+        if not bars:
             return f"No Polygon data found for {symbol}"
 
         lines = [f"Polygon.io daily aggregates for {symbol}:"]
-        for bar in resp.get("results", []):
-            ts = datetime.fromtimestamp(bar["t"] / 1000).strftime("%Y-%m-%d")
+        for ts, o, h, l, c, v in reversed(bars):
             lines.append(
-                f"  {ts}: Open={bar['o']:.2f} High={bar['h']:.2f} Low={bar['l']:.2f} "
-                f"Close={bar['c']:.2f} Volume={bar['v']}"
+                f"  {bar_store.format_date(ts)}: Open={fmt_num(o, '.2f')} High={fmt_num(h, '.2f')} "
+                f"Low={fmt_num(l, '.2f')} Close={fmt_num(c, '.2f')} Volume={fmt_num(v, '.0f')}"
             )
 
-        # Ticker details
-        details = requests.get(
-            f"{BASE_URL}/v3/reference/tickers/{symbol}",
-            params={"apiKey": API_KEY},
-            timeout=10,
-        ).json()
         result = details.get("results", {})
         if result:
             lines.append(f"\n  Name: {result.get('name', 'N/A')}")
@@ -60,8 +110,6 @@ if API_KEY:
     tool = Tool(
         name="polygon",
         func=query_polygon,
-        description=(
-            "Fetch daily aggregate price bars and ticker details from Polygon.io. "
-            "Input should be a stock ticker symbol like AAPL, TSLA. Good for OHLCV data and market info."
-        ),
+        coroutine=to_coroutine(query_polygon),
+        description=registry.spec("polygon").description,
     )
@@ -0,0 +1,244 @@
+"""Per-provider rate-limit scheduler.
+
+Each provider gets one or more token buckets matching its free-tier
+limits (e.g. Alpha Vantage: 5/min and 25/day). Callers reserve a token
+before each request and sleep until their slot comes up, so bursts queue
+in arrival order instead of coming back as rate-limit errors. A provider
+that throttles anyway (HTTP 429) is held with `back_off` and the request
+queues again. A request
+that would have to wait longer than RATE_LIMIT_MAX_WAIT (typically a
+spent daily quota) fails fast with RateLimited so the agent can use a
+provider with capacity left.
+
+Also provides single-flight coalescing: identical requests already in
+flight share one upstream call.
+"""
+
+import os
+import threading
+import time
+
+MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "30"))
+
+# Free-tier defaults. Override with RATE_LIMIT_<NAME>, e.g.
+# RATE_LIMIT_POLYGON="100/min"; an empty value disables limiting.
+DEFAULT_LIMITS = {
+    "alpha_vantage": "5/min,25/day",
+    "twelve_data": "8/min,800/day",
+    "polygon": "5/min",
+    "finnhub": "60/min",
+    "fmp": "250/day",
+    "tiingo": "50/hour,1000/day",
+    "fred": "120/min",
+    "coingecko": "30/min",
+    # LLM backends (see config.get_llm)
+    "groq": "30/min",
+    "openai": "",
+    "anthropic": "",
+    "ollama": "",
+}
+
+_PERIODS = {"sec": 1, "min": 60, "hour": 3600, "day": 86400}
+
+
+class RateLimited(Exception):
+    """Raised when a request cannot be scheduled within MAX_WAIT."""
+
+
+class TokenBucket:
+    """Token bucket that allows reservations into the negative.
+
+    A caller that takes a token from an empty bucket is told how long to
+    wait; the next caller then waits behind it, which keeps the queue FIFO.
+    """
+
+    def __init__(self, count, period):
+        self.count = count
+        self.period = period
+        self.rate = count / period
+        self.tokens = float(count)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.count, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+def parse_limits(spec):
+    """'5/min,25/day' -> [TokenBucket(5, 60), TokenBucket(25, 86400)]."""
+    buckets = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        count, _, unit = part.partition("/")
+        buckets.append(TokenBucket(int(count), _PERIODS[unit.strip().lower()]))
+    return buckets
+
+
+class Scheduler:
+    """Token buckets per provider, plus wait/rejection counters."""
+
+    def __init__(self, limits=None):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._stats = {}
+        self._holds = {}  # name -> monotonic time before which nothing goes out (after a 429)
+        for name, spec in (limits or {}).items():
+            self.configure(name, spec)
+
+    def configure(self, name, spec):
+        """Set (or clear, with an empty spec) the limits for one provider."""
+        with self._lock:
+            self._buckets[name] = parse_limits(spec) if spec else []
+
+    def acquire(self, name, blocking=True):
+        """Reserve one request slot for `name`, sleeping until it is due.
+
+        Returns True once the request may go out. With blocking=False,
+        returns False instead of waiting. Raises RateLimited if the slot is
+        more than MAX_WAIT seconds away.
+        """
+        with self._lock:
+            buckets = self._buckets.get(name)
+            now = time.monotonic()
+            hold = max(0.0, self._holds.get(name, now) - now)
+            if not buckets and not hold:
+                return True
+            buckets = buckets or []
+            for b in buckets:
+                b.refill(now)
+            wait = max([hold, *(b.wait_time() for b in buckets)])
+            stats = self._stats.setdefault(name, {"requests": 0, "waits": 0, "wait_seconds": 0.0, "rejected": 0})
+            if wait > 0 and not blocking:
+                return False
+            if wait > MAX_WAIT:
+                stats["rejected"] += 1
+                if hold >= wait:
+                    limit = "the provider asked us to back off"
+                else:
+                    tightest = max(buckets, key=lambda b: b.wait_time())
+                    limit = f"{tightest.count} per {_unit(tightest.period)}"
+                raise RateLimited(
+                    f"{name} rate limit reached ({limit}); "
+                    f"next request possible in {wait:.0f}s — try another provider"
+                )
+            for b in buckets:
+                b.tokens -= 1
+            stats["requests"] += 1
+            if wait > 0:
+                stats["waits"] += 1
+                stats["wait_seconds"] += wait
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def back_off(self, name, seconds):
+        """Hold every request for `name` for `seconds`: the provider answered 429."""
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._holds[name] = max(self._holds.get(name, until), until)
+
+    def remaining(self, name):
+        """Requests available right now without waiting, or None if unlimited."""
+        with self._lock:
+            buckets = self._buckets.get(name)
+            if not buckets:
+                return None
+            now = time.monotonic()
+            for b in buckets:
+                b.refill(now)
+            return max(0, int(min(b.tokens for b in buckets)))
+
+    def has_capacity(self, name):
+        """True if a request for `name` could be scheduled within MAX_WAIT."""
+        with self._lock:
+            buckets = self._buckets.get(name) or []
+            now = time.monotonic()
+            for b in buckets:
+                b.refill(now)
+            hold = self._holds.get(name, now) - now
+            return max([hold, *(b.wait_time() for b in buckets)]) <= MAX_WAIT
+
+    def budget(self):
+        """Per-provider limits, remaining budget and wait counters."""
+        with self._lock:
+            names = [n for n, b in self._buckets.items() if b]
+            limits = {n: ", ".join(f"{b.count}/{_unit(b.period)}" for b in self._buckets[n]) for n in names}
+            stats = {n: dict(self._stats.get(n, {})) for n in names}
+        return {
+            n: {"limit": limits[n], "remaining": self.remaining(n), **stats[n]}
+            for n in names
+        }
+
+
+def _unit(period):
+    return next(unit for unit, seconds in _PERIODS.items() if seconds == period)
+
+
+def _limits_from_env():
+    limits = dict(DEFAULT_LIMITS)
+    for name in list(limits):
+        override = os.getenv(f"RATE_LIMIT_{name.upper()}")
+        if override is not None:
+            limits[name] = override
+    return limits
+
+
+SCHEDULER = Scheduler(_limits_from_env())
+
+
+def acquire(name, blocking=True):
+    return SCHEDULER.acquire(name, blocking=blocking)
+
+
+def back_off(name, seconds):
+    SCHEDULER.back_off(name, seconds)
+
+
+def remaining(name):
+    return SCHEDULER.remaining(name)
+
+
+def has_capacity(name):
+    return SCHEDULER.has_capacity(name)
+
+
+def budget():
+    return SCHEDULER.budget()
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> [event, result, error]
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+            else:
+                self.coalesced += 1
+        if not leader:
+            call[0].wait()
+            if call[2] is not None:
+                raise call[2]
+            return call[1]
+        try:
+            call[1] = fn()
+            return call[1]
+        except Exception as e:
+            call[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call[0].set()
+
+
+SINGLE_FLIGHT = SingleFlight()
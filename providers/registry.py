@@ -0,0 +1,217 @@
+"""Lazy provider registry.
+
+Records each tool's metadata — label, tool name, module, required API key
+and description — without importing the provider modules, which pull in
+requests, NumPy, SQLite and LangChain. `get_tools()` returns lightweight
+Tools that import their provider module on first call, so the REPL starts
+without paying for providers the agent never uses.
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderSpec(NamedTuple):
+    label: str
+    name: str                # tool name the agent sees
+    module: str              # module defining `tool`
+    env_key: Optional[str]   # API key the tool requires, if any
+    description: str
+
+
+SPECS = [
+    ProviderSpec(
+        "Yahoo Finance", "yahoo_finance", "providers.yahoo_finance", None,
+        description=(
+            "Fetch stock price history, fundamentals, dividends, and key metrics from Yahoo Finance. "
+            "Input should be a stock ticker symbol like AAPL, or a comma-separated list like 'AAPL, TSLA, MSFT' "
+            "for a quote table. Free, no API key needed."
+        ),
+    ),
+    ProviderSpec(
+        "Alpha Vantage", "alpha_vantage", "providers.alpha_vantage", "ALPHA_VANTAGE_API_KEY",
+        description=(
+            "Fetch technical indicators (RSI, SMA, EMA, MACD, BBANDS) and company overview from Alpha Vantage. "
+            "Input format: 'SYMBOL INDICATOR' e.g. 'AAPL RSI' or 'TSLA MACD'. Just a symbol gives an overview. "
+            "Comma-separate several symbols ('AAPL,MSFT RSI') to query them together."
+        ),
+    ),
+    ProviderSpec(
+        "Finnhub", "finnhub", "providers.finnhub", "FINNHUB_API_KEY",
+        description=(
+            "Fetch real-time stock quotes and recent company news from Finnhub. "
+            "Input should be a stock ticker symbol like AAPL, TSLA, or a comma-separated list. "
+            "Good for current price and news sentiment."
+        ),
+    ),
+    ProviderSpec(
+        "Polygon.io", "polygon", "providers.polygon", "POLYGON_API_KEY",
+        description=(
+            "Fetch daily aggregate price bars and ticker details from Polygon.io. "
+            "Input should be a stock ticker symbol like AAPL, TSLA, or a comma-separated list. "
+            "Good for OHLCV data and market info."
+        ),
+    ),
+    ProviderSpec(
+        "FRED", "fred", "providers.fred", "FRED_API_KEY",
+        description=(
+            "Fetch macroeconomic data from FRED (Federal Reserve). "
+            "Input can be a series ID like 'FEDFUNDS' or keywords like 'CPI', 'GDP', "
+            "'unemployment', 'federal funds rate', 'treasury', 'mortgage', 'money supply'; "
+            "comma-separate several to fetch them together. "
+            "Add a span for a summary of a longer period, e.g. 'CPI last 20 years', 'UNRATE 5y', 'GDP since 2000'. "
+            "Best for macro/economic indicators, not individual stocks."
+        ),
+    ),
+    ProviderSpec(
+        "Binance", "binance", "providers.binance", None,
+        description=(
+            "Fetch crypto spot prices, 24h stats, and daily candles from Binance. "
+            "Input should be a crypto symbol like 'BTC', 'ETH', 'SOL' (USDT pair assumed), "
+            "or a comma-separated list like 'BTC, ETH, SOL' for a 24h stats table. "
+            "Free, no API key needed. Best for crypto, not stocks."
+        ),
+    ),
+    ProviderSpec(
+        "Twelve Data", "twelve_data", "providers.twelve_data", "TWELVE_DATA_API_KEY",
+        description=(
+            "Fetch real-time/historical prices and technical indicators from Twelve Data. "
+            "Input: 'SYMBOL' for price data or 'SYMBOL INDICATOR' for technicals; "
+            "comma-separate several symbols ('AAPL,MSFT,NVDA') to batch them. "
+            "Indicators: RSI, SMA, EMA, MACD, BBANDS, STOCH, ADX, ATR. "
+            "Example: 'AAPL RSI' or 'TSLA MACD'."
+        ),
+    ),
+    ProviderSpec(
+        "Financial Modeling Prep", "financial_modeling_prep", "providers.fmp", "FMP_API_KEY",
+        description=(
+            "Fetch company fundamentals, profiles, and earnings from Financial Modeling Prep. "
+            "Input: 'SYMBOL' for company profile or 'SYMBOL earnings' for income statements; "
+            "comma-separate several symbols ('AAPL,MSFT,NVDA') to batch them. "
+            "Good for fundamental analysis — revenue, net income, EPS, market cap, DCF."
+        ),
+    ),
+    ProviderSpec(
+        "Tiingo", "tiingo", "providers.tiingo", "TIINGO_API_KEY",
+        description=(
+            "Fetch historical EOD prices and stock metadata from Tiingo. "
+            "Input should be a stock ticker symbol like AAPL, TSLA, or a comma-separated list. "
+            "Good for adjusted historical prices and basic stock info."
+        ),
+    ),
+    ProviderSpec(
+        "CoinGecko", "coingecko", "providers.coingecko", None,
+        description=(
+            "Fetch crypto prices, market cap, volume, and trends from CoinGecko. "
+            "Input: crypto symbol (BTC, ETH, SOL), a comma-separated list like 'BTC, ETH, SOL' for a market table, "
+            "or 'trending' for top trending coins. "
+            "Free, no API key needed. Best for crypto overview and market cap data."
+        ),
+    ),
+    ProviderSpec(
+        "Consensus Quote", "consensus_quote", "providers.consensus", None,
+        description=(
+            "Compare a stock's last price, prior close and volume across every available equity provider "
+            "(Yahoo Finance, Finnhub, Polygon, Twelve Data, Tiingo) in a single call, with the spread between sources. "
+            "Input: ticker symbol like AAPL. Add 'first N' (e.g. 'AAPL first 2') to return as soon as N sources answer. "
+            "Use this instead of calling each provider separately when cross-referencing a quote."
+        ),
+    ),
+    ProviderSpec(
+        "Local Indicators", "technical_indicators", "providers.indicators", None,
+        description=(
+            "Compute technical indicators locally from daily price bars (no API quota): "
+            "SMA, EMA, RSI, MACD, BBANDS, STOCH, ATR, ADX with any period. "
+            "Input: 'SYMBOL' for a snapshot of all indicators, or 'SYMBOL INDICATOR [PARAMS] [LAST N]' "
+            "e.g. 'AAPL RSI', 'AAPL SMA 50 LAST 10', 'TSLA MACD 12 26 9', 'BTCUSDT ATR'. "
+            "Works for stocks and crypto pairs; comma-separate several symbols. "
+            "Prefer this over remote indicator tools."
+        ),
+    ),
+    ProviderSpec(
+        "Market Data Router", "market_data", "providers.router", None,
+        description=(
+            "Get a quote, daily bars, crypto price or company fundamentals from whichever provider "
+            "is currently fastest and healthy, with automatic failover. "
+            "Input: 'quote AAPL', 'bars AAPL 30', 'crypto BTC', 'fundamentals AAPL', or just a symbol for a quote. "
+            "Use this when you need the data and don't care which provider it comes from."
+        ),
+    ),
+    ProviderSpec(
+        "Multi-Asset Analytics", "asset_analytics", "providers.analytics", None,
+        description=(
+            "Compare several assets over a period in one call: total return, volatility, max drawdown, "
+            "beta and correlation against a benchmark, rolling correlation, and a correlation matrix. "
+            "Input: comma-separated stocks/ETFs, crypto (BTC, ETH) and FRED series (DGS10, CPI, FEDFUNDS), "
+            "optionally 'vs BENCHMARK', a span ('2y', 'last 6 months', 'since 2020') and 'window N', "
+            "e.g. 'BTC, QQQ, DGS10 vs QQQ 2y'. Use this instead of fetching prices and computing by hand."
+        ),
+    ),
+]
+
+_BY_NAME = {s.name: s for s in SPECS}
+
+
+def spec(name):
+    return _BY_NAME[name]
+
+
+def enabled(s):
+    """True if the provider's API key (if it needs one) is set."""
+    return s.env_key is None or bool(os.getenv(s.env_key))
+
+
+def load(s):
+    """Import the provider module and return its Tool."""
+    return importlib.import_module(s.module).tool
+
+
+def lazy_tool(s):
+    """A Tool for spec `s` that imports the real one on first call.
+
+    Answers pass through providers.output, which applies the compact
+    output mode and the tool's token budget, and every call is timed by
+    providers.metrics.
+    """
+    from langchain.tools import Tool
+
+    def run(query: str) -> str:
+        from providers import metrics, output
+
+        with metrics.tool_call(s.name) as call:
+            call["output"] = output.shape(s.name, load(s).func(query))
+        return call["output"]
+
+    async def arun(query: str) -> str:
+        from providers import metrics, output
+
+        tool = await asyncio.to_thread(load, s)  # a first import can take a while
+        with metrics.tool_call(s.name) as call:
+            call["output"] = output.shape(s.name, await tool.coroutine(query))
+        return call["output"]
+
+    return Tool(name=s.name, func=run, coroutine=arun, description=s.description)
+
+
+def get_tools():
+    """Return list of available tools, skipping any with missing API keys."""
+    tools = []
+    for s in SPECS:
+        if enabled(s):
+            tools.append(lazy_tool(s))
+            logger.info(f"Loaded provider: {s.label}")
+        else:
+            logger.warning(f"Skipped provider: {s.label} ({s.env_key} not set)")
+    return tools
+
+
+def preload():
+    """Import every enabled provider module now (e.g. in the background)."""
+    for s in SPECS:
+        if enabled(s):
+            load(s)
@@ -0,0 +1,93 @@
+"""Record/replay of provider HTTP traffic, for offline tests and benchmarks.
+
+With HTTP_RECORD_DIR set, every response the transport receives is also
+saved as a fixture, one JSON file per host. With HTTP_STUB_URL set, requests
+are sent to a local stub server (stub_server.py) that replays those
+fixtures instead of the real host.
+
+Fixtures are keyed by path and params, minus credentials and the date
+params that change from day to day, so a recording stays replayable.
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from providers.cache import _SECRET_PARAMS
+
+RECORD_DIR = os.getenv("HTTP_RECORD_DIR")
+STUB_URL = os.getenv("HTTP_STUB_URL")
+
+# Query params holding dates or timestamps relative to "now"
+_VOLATILE_PARAMS = {
+    "period1", "period2", "startTime", "start_date", "startDate", "endDate", "from", "to", "observation_start",
+}
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+_record_lock = threading.Lock()
+
+
+def fixture_key(path, params=None):
+    """'/v8/finance/chart/AAPL?interval=1d&range=5d' — stable across days and keys."""
+    items = sorted(
+        (k, str(v)) for k, v in (params or {}).items()
+        if k.lower() not in _SECRET_PARAMS and k not in _VOLATILE_PARAMS
+    )
+    path = _DATE.sub("{date}", path)
+    return f"{path}?{urlencode(items)}" if items else path
+
+
+def target(url):
+    """The URL to actually request: url itself, or its stub server equivalent."""
+    if not STUB_URL:
+        return url
+    parts = urlsplit(url)
+    return f"{STUB_URL.rstrip('/')}/{parts.netloc}{parts.path}"
+
+
+def record(url, params, resp):
+    """Save a response as the fixture for (url, params) under RECORD_DIR."""
+    if resp.status_code == 429 or resp.status_code >= 500:
+        return  # the stub injects throttling itself
+    parts = urlsplit(url)
+    path = Path(RECORD_DIR) / f"{parts.netloc}.json"
+    with _record_lock:
+        fixtures = json.loads(path.read_text()) if path.exists() else {}
+        fixtures[fixture_key(parts.path, params)] = {
+            "status": resp.status_code,
+            "content_type": resp.headers.get("Content-Type", "application/json"),
+            "body": resp.text,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(fixtures, indent=1, sort_keys=True))
+
+
+def load_fixtures(directory):
+    """{host: {key: fixture}} for every host file in a fixture directory."""
+    return {
+        path.stem: json.loads(path.read_text())
+        for path in sorted(Path(directory).glob("*.json"))
+    }
+
+
+def match(fixtures, path, params):
+    """The fixture for a request: an exact key match, else the recording for
+    the same path that shares the most params (e.g. a warm incremental fetch
+    replayed from a cold-start recording). None if the path was never seen.
+    """
+    key = fixture_key(path, params)
+    if key in fixtures:
+        return fixtures[key]
+    wanted = set(key.partition("?")[2].split("&"))
+    best, best_score = None, -1
+    for candidate, fixture in fixtures.items():
+        cand_path, _, query = candidate.partition("?")
+        if cand_path != key.partition("?")[0]:
+            continue
+        score = len(wanted & set(query.split("&")))
+        if score > best_score:
+            best, best_score = fixture, score
+    return best
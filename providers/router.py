@@ -0,0 +1,298 @@
+"""Market data router — one data need, the fastest healthy source.
+
+Each data need (equity quote, daily bars, crypto price, fundamentals) has
+several providers that can serve it. `route()` ranks the enabled ones by
+their recent median latency for that need, penalised by their error rate
+(windows in providers.health), skipping providers whose circuit breaker is
+open or whose rate-limit budget is spent. It calls the best one, and if
+that hasn't answered by its own p95 latency, hedges with the next; a
+source that fails is replaced at once. The first good answer wins, and
+the losers finish in the background so their timings still count.
+"""
+
+import contextvars
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from langchain.tools import Tool
+
+from providers import (
+    alpha_vantage, binance, coingecko, finnhub, fmp, health, polygon, ratelimit, registry, tiingo, twelve_data,
+    yahoo_finance,
+)
+from providers.bar_store import format_date
+from providers.batch import fmt_num
+from providers.transport import to_coroutine
+
+HEDGE_MIN = float(os.getenv("ROUTER_HEDGE_MIN", "0.05"))
+HEDGE_MAX = float(os.getenv("ROUTER_HEDGE_MAX", "2"))
+HEDGE_DEFAULT = float(os.getenv("ROUTER_HEDGE_DEFAULT", "1"))
+WORKERS = int(os.getenv("ROUTER_WORKERS", "8"))
+
+# A source is ranked on its own latency once it has this many successes for
+# a need; before that it counts as HEDGE_DEFAULT seconds, in listed order.
+MIN_SAMPLES = 5
+# Ranking score is p50 * (1 + ERROR_PENALTY * error rate)
+ERROR_PENALTY = 4
+
+# (provider, module, function) per need, in the order tried before any
+# timings exist. The provider name is its rate-limit and health key.
+NEEDS = {
+    "equity_quote": [
+        ("yahoo_finance", yahoo_finance, "get_quote"),
+        ("finnhub", finnhub, "get_quote"),
+        ("polygon", polygon, "get_quote"),
+        ("twelve_data", twelve_data, "get_quote"),
+        ("tiingo", tiingo, "get_quote"),
+    ],
+    "daily_bars": [
+        ("yahoo_finance", yahoo_finance, "history"),
+        ("tiingo", tiingo, "history"),
+        ("polygon", polygon, "history"),
+        ("twelve_data", twelve_data, "history"),
+    ],
+    # USDT pairs: Binance first, then the equity sources that list crypto
+    # (under their own symbols, see _SYMBOLS), CoinGecko's closes last
+    "crypto_bars": [
+        ("binance", binance, "history"),
+        ("yahoo_finance", yahoo_finance, "history"),
+        ("polygon", polygon, "history"),
+        ("coingecko", coingecko, "history"),
+    ],
+    "crypto_price": [
+        ("binance", binance, "get_quote"),
+        ("coingecko", coingecko, "get_quote"),
+    ],
+    "fundamentals": [
+        ("fmp", fmp, "get_fundamentals"),
+        ("alpha_vantage", alpha_vantage, "get_fundamentals"),
+    ],
+}
+
+# How a source names a USDT pair's coin, where it differs from BTCUSDT
+_SYMBOLS = {
+    ("crypto_bars", "yahoo_finance"): "{base}-USD",
+    ("crypto_bars", "polygon"): "X:{base}USD",
+}
+
+# Whether a source's result answers the need; anything else counts as a failure
+_USABLE = {
+    "equity_quote": lambda q: q.get("price") is not None,
+    "daily_bars": bool,
+    "crypto_bars": bool,
+    "crypto_price": lambda q: q.get("price") is not None,
+    "fundamentals": lambda f: bool(f.get("name")),
+}
+
+# Own pool: routed calls run inside tool calls and fan-outs, whose pools
+# they must not wait on.
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="router")
+
+
+@dataclass
+class Routed:
+    source: str
+    value: object
+    seconds: float
+    hedged: bool = False
+    errors: dict = field(default_factory=dict)  # provider -> exception, for sources that failed
+
+
+def _window(need, provider):
+    return health.health(provider, f"route:{need}")
+
+
+def _score(need, provider, order):
+    h = _window(need, provider)
+    successes = len(h.latencies())
+    if successes >= MIN_SAMPLES:
+        return h.percentile(50) * (1 + ERROR_PENALTY * h.error_rate()), order
+    if successes == 0 and len(h) >= MIN_SAMPLES:
+        return float("inf"), order  # nothing but failures lately: last resort
+    return HEDGE_DEFAULT, order
+
+
+def rank(need):
+    """(ranked providers, skipped {provider: reason}) for a need."""
+    ranked, skipped = [], {}
+    for order, (provider, module, func) in enumerate(NEEDS[need]):
+        if module.tool is None:
+            continue
+        if not health.breaker(provider).allow():
+            skipped[provider] = "circuit open"
+        elif not ratelimit.has_capacity(provider):
+            skipped[provider] = "no budget"
+        else:
+            ranked.append((_score(need, provider, order), provider, getattr(module, func)))
+    ranked.sort(key=lambda item: item[0])
+    return [(provider, func) for _, provider, func in ranked], skipped
+
+
+def hedge_delay(need, provider):
+    """How long to wait on a source before hedging: its p95, clamped."""
+    h = _window(need, provider)
+    p95 = h.percentile(95) if len(h.latencies()) >= MIN_SAMPLES else None
+    return HEDGE_DEFAULT if p95 is None else min(HEDGE_MAX, max(HEDGE_MIN, p95))
+
+
+def _source_args(need, provider, args):
+    """`args` with the symbol (the first argument) in the source's own form."""
+    form = _SYMBOLS.get((need, provider))
+    if form is None or not args:
+        return args
+    symbol = args[0]
+    base = symbol[:-4] if symbol.endswith("USDT") else symbol
+    return (form.format(base=base), *args[1:])
+
+
+def source_symbol(need, provider, symbol):
+    """`symbol` as `provider` names it when serving `need`."""
+    return _source_args(need, provider, (symbol,))[0]
+
+
+def _call(need, provider, func, args):
+    start = time.perf_counter()
+    try:
+        value = func(*args)
+    except Exception:
+        _window(need, provider).record(time.perf_counter() - start, False)
+        raise
+    usable = _USABLE[need](value)
+    _window(need, provider).record(time.perf_counter() - start, usable)
+    if not usable:
+        raise LookupError("no data")
+    return value
+
+
+def route(need, *args):
+    """Serve `need` for `args` from the fastest healthy source, hedged.
+
+    Returns a Routed; raises LookupError if no source could answer.
+    """
+    queue, skipped = rank(need)
+    start = time.perf_counter()
+    pending, errors = {}, {}
+    hedged = False
+
+    def launch():
+        provider, func = queue.pop(0)
+        call_args = _source_args(need, provider, args)
+        pending[_executor.submit(contextvars.copy_context().run, _call, need, provider, func, call_args)] = provider
+        return provider
+
+    latest = launch() if queue else None
+    while pending:
+        delay = hedge_delay(need, latest) if queue else None
+        done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+        if not done:
+            latest, hedged = launch(), True
+            continue
+        for future in done:
+            provider = pending.pop(future)
+            try:
+                value = future.result()
+            except Exception as e:
+                errors[provider] = e
+                if queue:
+                    latest = launch()  # fail over without waiting for the hedge delay
+                continue
+            return Routed(provider, value, time.perf_counter() - start, hedged, errors)
+
+    detail = "; ".join(f"{p}: {e}" for p, e in errors.items())
+    if skipped:
+        detail += ("; " if detail else "") + ", ".join(f"{p} skipped ({why})" for p, why in skipped.items())
+    raise LookupError(f"no {need.replace('_', ' ')} source answered for {' '.join(map(str, args))}"
+                      + (f" ({detail})" if detail else ""))
+
+
+def stats():
+    """{need: {provider: window stats for that need}}, for providers that have been routed to."""
+    out = {}
+    for provider, entry in health.snapshot().items():
+        for endpoint, window in entry["endpoints"].items():
+            if endpoint.startswith("route:"):
+                out.setdefault(endpoint[len("route:"):], {})[provider] = window
+    return out
+
+
+# ─── Tool ────────────────────────────────────────────────────────────
+
+_KINDS = {"QUOTE": "equity_quote", "BARS": "daily_bars", "CRYPTO": "crypto_price", "FUNDAMENTALS": "fundamentals"}
+
+def _kind(parts):
+    """(need, symbol, rest) from 'quote AAPL', 'AAPL' or 'BTC'."""
+    if parts[0] in _KINDS and len(parts) > 1:
+        return _KINDS[parts[0]], parts[1], parts[2:]
+    symbol = parts[0]
+    crypto = symbol.endswith("USDT") or symbol in coingecko.COIN_MAP
+    return ("crypto_price" if crypto else "equity_quote"), symbol, parts[1:]
+
+
+def _via(routed):
+    note = f"{routed.source}, {routed.seconds:.2f}s"
+    if routed.hedged:
+        note += ", hedged"
+    if routed.errors:
+        note += ", failed over from " + ", ".join(routed.errors)
+    return note
+
+
+def query_market_data(query: str) -> str:
+    """Answer one data need from whichever provider is fastest and healthy.
+
+    Query format: 'quote SYMBOL', 'bars SYMBOL [N]', 'crypto SYMBOL',
+    'fundamentals SYMBOL', or just 'SYMBOL' for a quote (crypto for BTC,
+    ETH, ... and USDT pairs).
+    """
+    parts = query.strip().upper().split()
+    if not parts:
+        return "Market data error: empty query. Try 'quote AAPL' or 'bars AAPL 10'."
+    need, symbol, rest = _kind(parts)
+    try:
+        if need == "daily_bars":
+            n = int(rest[0]) if rest and rest[0].isdigit() else 10
+            routed = route("crypto_bars" if symbol.endswith("USDT") else "daily_bars", symbol, n)
+            bars = routed.value
+            lines = [f"Daily bars for {symbol} (last {len(bars)}, via {_via(routed)}):"]
+            for ts, o, h, l, c, v in bars:
+                lines.append(
+                    f"  {format_date(ts)}: O={fmt_num(o)} H={fmt_num(h)} L={fmt_num(l)} C={fmt_num(c)} "
+                    f"V={fmt_num(v, ',.0f')}"
+                )
+            return "\n".join(lines)
+
+        routed = route(need, symbol)
+        if need == "fundamentals":
+            f = routed.value
+            lines = [f"Fundamentals for {symbol} (via {_via(routed)}):"]
+            lines.append(f"  Name: {f['name']}")
+            lines.append(f"  Sector: {f.get('sector') or 'N/A'} / {f.get('industry') or 'N/A'}")
+            lines.append(f"  Market Cap: ${fmt_num(f.get('market_cap'), ',.0f')}")
+            for label, key, spec in (("Price", "price", ".2f"), ("P/E", "pe", ".2f"), ("EPS", "eps", ".2f"),
+                                     ("Beta", "beta", ".2f"), ("Dividend Yield", "dividend_yield", ".4f")):
+                if f.get(key) is not None:
+                    lines.append(f"  {label}: {fmt_num(f[key], spec)}")
+            return "\n".join(lines)
+
+        q = routed.value
+        price, prev = q["price"], q.get("prev_close")
+        change = f" Chg={(price / prev - 1) * 100:+.2f}%" if prev else ""
+        label = "Crypto price" if need == "crypto_price" else "Quote"
+        return (
+            f"{label} for {symbol} (via {_via(routed)}): Last={fmt_num(price)} "
+            f"PrevClose={fmt_num(prev)}{change} Volume={fmt_num(q.get('volume'), ',.0f')}"
+        )
+    except LookupError as e:
+        return f"Market data error: {e}"
+    except Exception as e:
+        return f"Market data error for {symbol}: {e}"
+
+
+tool = Tool(
+    name="market_data",
+    func=query_market_data,
+    coroutine=to_coroutine(query_market_data),
+    description=registry.spec("market_data").description,
+)
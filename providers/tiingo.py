@@ -3,52 +3,106 @@
 Requires TIINGO_API_KEY.
 """
 
+import functools
 import os
 from datetime import datetime, timedelta
-import requests
 from langchain.tools import Tool
 
+from providers import bar_store, registry
+from providers.bars import Bars
+from providers.batch import fan_out, fmt_num, split_query
+from providers.transport import gather, get_json, to_coroutine
+
 API_KEY = os.getenv("TIINGO_API_KEY")
 BASE_URL = "https://api.tiingo.com"
+HEADERS = {"Content-Type": "application/json", "Authorization": f"Token {API_KEY}"}
+# Calendar days per fetch_range request (bulk backfills split longer ranges)
+RANGE_DAYS = 3650
+
+
+def _fetch_bars(symbol, since):
+    """Adjusted daily prices since `since` (or the last 10 days on a cold start)."""
+    end = datetime.now().strftime("%Y-%m-%d")
+    if since is None:
+        start = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
+    else:
+        start = bar_store.format_date(since)
+    price_params = {"startDate": start, "endDate": end}
+    prices = get_json(
+        "tiingo", f"{BASE_URL}/tiingo/daily/{symbol}/prices", price_params, "bars",
+        headers=HEADERS, ok=lambda d: isinstance(d, list),
+    )
+    if not isinstance(prices, list):
+        return Bars.empty()
+    return Bars.from_records(
+        prices, ("date", "adjOpen", "adjHigh", "adjLow", "adjClose", "adjVolume"), bar_store.parse_date,
+    )
+
+
+def fetch_range(symbol, start, end):
+    """Adjusted daily Bars dated start..end (UTC-midnight epoch seconds), for bulk backfills.
+
+    Bypasses the response cache: years of bars would crowd out everything else.
+    """
+    params = {"startDate": bar_store.format_date(start), "endDate": bar_store.format_date(end)}
+    prices = get_json("tiingo", f"{BASE_URL}/tiingo/daily/{symbol}/prices", params, headers=HEADERS)
+    if not isinstance(prices, list):
+        detail = prices.get("detail") if isinstance(prices, dict) else None
+        raise LookupError(detail or f"no prices for {symbol}")
+    return Bars.from_records(
+        prices, ("date", "adjOpen", "adjHigh", "adjLow", "adjClose", "adjVolume"), bar_store.parse_date,
+    )
+
+
+def _load_bars(symbol):
+    return bar_store.sync("tiingo", symbol, "1d", functools.partial(_fetch_bars, symbol))
+
+
+def history(symbol, n):
+    """The newest n daily bars, backfilled into the bar store as needed."""
+    return bar_store.history("tiingo", symbol, "1d", functools.partial(_fetch_bars, symbol), n)
+
+
+def get_quote(symbol):
+    """Last close, prior close and volume for the consensus tool."""
+    return bar_store.last_quote(_load_bars(symbol))
 
 
 def query_tiingo(query: str) -> str:
     """Fetch historical prices and metadata from Tiingo.
 
-    Query should be a stock ticker symbol like AAPL.
+    Query should be a stock ticker symbol like AAPL. Several comma-separated
+    symbols are fetched concurrently, one block per symbol.
     """
-    symbol = query.strip().upper().split()[0]
-    headers = {"Content-Type": "application/json", "Authorization": f"Token {API_KEY}"}
+    symbols, _ = split_query(query)
+    if len(symbols) > 1:
+        return fan_out(query_tiingo, symbols)
+    symbol = symbols[0]
 
     try:
-        # Metadata
-        meta = requests.get(f"{BASE_URL}/tiingo/daily/{symbol}", headers=headers, timeout=10).json()
+        # Metadata and prices, fetched concurrently
+        meta, prices = gather(
+            lambda: get_json(
+                "tiingo", f"{BASE_URL}/tiingo/daily/{symbol}", None, "details",
+                headers=HEADERS, ok=lambda d: "detail" not in d,
+            ),
+            lambda: _load_bars(symbol),
+        )
         lines = [f"Tiingo data for {symbol}:"]
         lines.append(f"  Name: {meta.get('name', 'N/A')}")
         lines.append(f"  Exchange: {meta.get('exchangeCode', 'N/A')}")
         lines.append(f"  Start Date: {meta.get('startDate', 'N/A')}")
         lines.append(f"  Description: {str(meta.get('description', ''))[:200]}")
 
-        # Recent prices (last 5 trading days)
-        end = datetime.now().strftime("%Y-%m-%d")
-        start = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
-        prices = requests.get(
-            f"{BASE_URL}/tiingo/daily/{symbol}/prices",
-            headers=headers,
-            params={"startDate": start, "endDate": end},
-            timeout=10,
-        ).json()
-
-        if prices and isinstance(prices, list):
-            lines.append(f"\nRecent prices (last {min(len(prices), 5)} days):")
-            for p in prices[-5:]:
-                date = p["date"][:10]
+        if prices:
+            lines.append(f"\nRecent prices (last {len(prices)} days):")
+            for ts, o, h, l, c, v in prices:
                 lines.append(
-                    f"  {date}: Open={p.get('adjOpen', 'N/A'):.2f} "
-                    f"High={p.get('adjHigh', 'N/A'):.2f} "
-                    f"Low={p.get('adjLow', 'N/A'):.2f} "
-                    f"Close={p.get('adjClose', 'N/A'):.2f} "
-                    f"Vol={p.get('adjVolume', 'N/A')}"
+                    f"  {bar_store.format_date(ts)}: Open={fmt_num(o, '.2f')} "
+                    f"High={fmt_num(h, '.2f')} "
+                    f"Low={fmt_num(l, '.2f')} "
+                    f"Close={fmt_num(c, '.2f')} "
+                    f"Vol={fmt_num(v, '.0f')}"
                 )
 
         return "\n".join(lines)
@@ -61,9 +115,6 @@ if API_KEY:
     tool = Tool(
         name="tiingo",
         func=query_tiingo,
-        description=(
-            "Fetch historical EOD prices and stock metadata from Tiingo. "
-            "Input should be a stock ticker symbol like AAPL, TSLA. "
-            "Good for adjusted historical prices and basic stock info."
-        ),
+        coroutine=to_coroutine(query_tiingo),
+        description=registry.spec("tiingo").description,
     )
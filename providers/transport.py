@@ -0,0 +1,207 @@
+"""Shared HTTP transport for all providers.
+
+Holds one pooled keep-alive `requests.Session` per provider host, with
+gzip and retry/backoff on 5xx, so repeat calls reuse warm TCP+TLS
+connections instead of opening a new one per request. Every request
+first takes a slot from the provider's rate-limit scheduler; a 429 holds
+the provider there (honouring Retry-After) and the request queues for a
+new slot, so every retry is charged to the budget. Identical
+requests in flight are coalesced into one. Each request's latency and
+outcome feed the provider's health window (providers.health) and the
+metrics (providers.metrics). Also owns the thread pools that run
+sub-requests and async tool calls; work submitted to them carries the
+caller's context, so metrics attribute it to the right tool call.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from providers import health, metrics, ratelimit, replay
+from providers.cache import cached, make_key
+
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+FANOUT_WORKERS = int(os.getenv("HTTP_FANOUT_WORKERS", "16"))
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "8"))
+
+_DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+_sessions = {}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="fanout")
+# Separate pool for whole tool calls, so a tool waiting on its own
+# sub-requests can never starve the fan-out pool.
+_tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
+
+
+class _Retry(Retry):
+    # urllib3 would also retry a 429 that carries Retry-After; those go
+    # back through the rate limiter instead (see get_json)
+    RETRY_AFTER_STATUS_CODES = Retry.RETRY_AFTER_STATUS_CODES - {429}
+
+
+def _make_session():
+    retry = _Retry(
+        total=RETRIES,
+        backoff_factor=BACKOFF,
+        status_forcelist=(500, 502, 503, 504),  # 429s go back through the rate limiter, see get_json
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the final response back so providers can report the API's message
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(_DEFAULT_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def session_for(url):
+    """Return the pooled session for the host serving url."""
+    host = urlsplit(url).netloc
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _sessions[host] = _make_session()
+        return session
+
+
+def get(url, params=None, headers=None, timeout=None):
+    """GET through the host's pooled session.
+
+    Goes to the replay stub instead when HTTP_STUB_URL is set, and records
+    the response when HTTP_RECORD_DIR is set (see providers.replay).
+    """
+    resp = session_for(url).get(replay.target(url), params=params, headers=headers, timeout=timeout or TIMEOUT)
+    if replay.RECORD_DIR:
+        replay.record(url, params, resp)
+    return resp
+
+
+def _retry_after(resp, attempt):
+    """Seconds to hold a provider after a 429: its Retry-After, else exponential backoff."""
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", "")))
+    except ValueError:
+        return BACKOFF * 2 ** attempt
+
+
+def get_json(provider, url, params=None, data_class=None, headers=None, ok=None, raise_for_status=False):
+    """GET url and return the parsed JSON body.
+
+    With a `data_class` the response goes through the shared TTL cache
+    (see providers.cache); `ok` decides whether a response is cacheable.
+    Raises ratelimit.RateLimited if the provider's budget is spent.
+    """
+    path = urlsplit(url).path
+
+    def request():
+        for attempt in range(RETRIES + 1):
+            ratelimit.acquire(provider)
+            start = time.perf_counter()
+            try:
+                resp = get(url, params=params, headers=headers)
+            except requests.RequestException:
+                seconds = time.perf_counter() - start
+                health.observe(provider, path, seconds, ok=False)
+                metrics.http_request(provider, seconds, 0, 0, ok=False)
+                raise
+            seconds = time.perf_counter() - start
+            healthy = resp.status_code < 500 and resp.status_code != 429
+            health.observe(provider, path, seconds, ok=healthy)
+            retries = getattr(resp.raw, "retries", None)
+            retried = (len(retries.history) if retries else 0) + (attempt > 0)  # a requeue after a 429 is one
+            metrics.http_request(provider, seconds, len(resp.content), retried, ok=healthy)
+            if resp.status_code != 429 or attempt == RETRIES:
+                break
+            ratelimit.back_off(provider, _retry_after(resp, attempt))
+        if raise_for_status:
+            resp.raise_for_status()
+        return resp.json()
+
+    fetched = []
+
+    def fetch():
+        fetched.append(True)
+        return ratelimit.SINGLE_FLIGHT.do(make_key(provider, path, params), request)
+
+    if data_class is None:
+        return fetch()
+    value = cached(provider, path, params, data_class, fetch, ok=ok)
+    metrics.cache_lookup(hit=not fetched)
+    return value
+
+
+def gather(*calls):
+    """Run zero-argument callables concurrently; return their results in order.
+
+    The first call runs on the calling thread and the rest on a shared pool,
+    so wall time is the slowest call rather than the sum. If a call raises,
+    the exception propagates as it would have sequentially.
+    """
+    futures = [_executor.submit(contextvars.copy_context().run, call) for call in calls[1:]]
+    results = [calls[0]()]
+    results.extend(f.result() for f in futures)
+    return results
+
+
+def race(calls, timeout, first=None):
+    """Run named zero-argument calls concurrently, up to a deadline.
+
+    Returns (results, errors) — dicts keyed by name for the calls that
+    succeeded or raised within `timeout` seconds. With `first`, returns as
+    soon as that many calls have succeeded. Stragglers keep running in the
+    background, so their responses still land in the cache.
+    """
+    futures = {_executor.submit(contextvars.copy_context().run, call): name for name, call in calls.items()}
+    results, errors = {}, {}
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+            if first and len(results) >= first:
+                break
+    except FuturesTimeout:
+        pass
+    return results, errors
+
+
+def to_coroutine(func):
+    """Async counterpart of a sync query function, for `Tool(coroutine=...)`.
+
+    The call runs on the shared tool pool over the same pooled sessions and
+    cache, so tool calls the agent awaits together run concurrently.
+    """
+    @functools.wraps(func)
+    async def run(query: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_tool_executor, contextvars.copy_context().run, func, query)
+
+    return run
+
+
+def close_all():
+    """Close every pooled session (e.g. at shutdown)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
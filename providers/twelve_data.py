@@ -3,23 +3,94 @@
 Requires TWELVE_DATA_API_KEY.
 """
 
+import functools
 import os
-import requests
 from langchain.tools import Tool
 
+from providers import bar_store, indicators, registry
+from providers.bars import Bars
+from providers.batch import chunks, fan_out, fmt_num, split_query
+from providers.ratelimit import RateLimited
+from providers.transport import get_json, to_coroutine
+
 API_KEY = os.getenv("TWELVE_DATA_API_KEY")
 BASE_URL = "https://api.twelvedata.com"
 
 
+def _fetch_bars(symbol, since, errors=None):
+    """Daily time series since `since` (or the last 5 bars on a cold start).
+
+    API error messages are appended to `errors`, if given.
+    """
+    params = {"symbol": symbol, "interval": "1day", "apikey": API_KEY, "outputsize": 5}
+    if since is not None:
+        params.update(start_date=bar_store.format_date(since), outputsize=5000)
+    resp = get_json("twelve_data", f"{BASE_URL}/time_series", params, "bars", ok=lambda d: "values" in d)
+    if "values" not in resp:
+        if errors is not None:
+            errors.append(resp.get("message", "unknown error"))
+        return Bars.empty()
+    return Bars.from_records(
+        resp["values"][::-1], ("datetime", "open", "high", "low", "close", "volume"), bar_store.parse_date,
+    )
+
+
+def _load_bars(symbol, errors=None):
+    return bar_store.sync("twelve_data", symbol, "1d", functools.partial(_fetch_bars, symbol, errors=errors))
+
+
+def history(symbol, n):
+    """The newest n daily bars, backfilled into the bar store as needed."""
+    return bar_store.history("twelve_data", symbol, "1d", functools.partial(_fetch_bars, symbol), n)
+
+
+def get_quote(symbol):
+    """Last close, prior close and volume for the consensus tool."""
+    return bar_store.last_quote(_load_bars(symbol))
+
+
+def _query_many(symbols):
+    """Quotes for several symbols via /quote with a comma-separated symbol list."""
+    lines = [f"Twelve Data quotes for {len(symbols)} symbols:"]
+    for chunk in chunks(symbols, 120):
+        params = {"symbol": ",".join(chunk), "apikey": API_KEY}
+        resp = get_json("twelve_data", f"{BASE_URL}/quote", params, "quote", ok=lambda d: "code" not in d)
+        if "code" in resp:
+            return f"Twelve Data error: {resp.get('message', 'unknown error')}"
+        # A single-symbol chunk comes back unwrapped
+        quotes = resp if len(chunk) > 1 else {chunk[0]: resp}
+        for symbol in chunk:
+            q = quotes.get(symbol, {})
+            if "close" not in q:
+                lines.append(f"  {symbol}: {q.get('message', 'no data')}")
+                continue
+            lines.append(
+                f"  {symbol}: {q.get('name', '')} | C={q['close']} PC={q.get('previous_close', 'N/A')} "
+                f"Chg={fmt_num(q.get('percent_change'), '+.2f')}% V={fmt_num(q.get('volume'), ',.0f')}"
+            )
+    return "\n".join(lines)
+
+
 def query_twelve_data(query: str) -> str:
     """Fetch price data or technical indicators from Twelve Data.
 
     Query format: 'SYMBOL' for price, or 'SYMBOL INDICATOR' e.g. 'AAPL RSI'.
+    Several comma-separated symbols ('AAPL,MSFT' or 'AAPL,MSFT RSI') are
+    batched into one quote request, or fanned out for indicators.
     Supported indicators: RSI, SMA, EMA, MACD, BBANDS, STOCH, ADX, ATR.
+    Indicators are computed locally (providers.indicators) when the quota
+    is spent.
     """
-    parts = query.strip().upper().split()
-    symbol = parts[0]
-    indicator = parts[1] if len(parts) > 1 else None
+    symbols, rest = split_query(query.upper())
+    indicator = rest.split()[0] if rest else None
+    if len(symbols) > 1:
+        if indicator:
+            return fan_out(query_twelve_data, symbols, indicator)
+        try:
+            return _query_many(symbols)
+        except Exception as e:
+            return f"Twelve Data error: {e}"
+    symbol = symbols[0]
 
     try:
         if indicator:
@@ -41,8 +112,14 @@ def query_twelve_data(query: str) -> str:
             params = {"symbol": symbol, "interval": "1day", "apikey": API_KEY, "outputsize": 5}
             if ind in ("rsi", "sma", "ema", "atr", "adx"):
                 params["time_period"] = 14
-            resp = requests.get(f"{BASE_URL}/{ind}", params=params, timeout=10).json()
+            local_params = (params["time_period"],) if "time_period" in params else ()
+            try:
+                resp = get_json("twelve_data", f"{BASE_URL}/{ind}", params, "indicator", ok=lambda d: "values" in d)
+            except RateLimited:
+                return indicators.fallback("Twelve Data", symbol, indicator, local_params)
 
+            if resp.get("code") == 429:
+                return indicators.fallback("Twelve Data", symbol, indicator, local_params)
             if "values" not in resp:
                 return f"No {indicator} data for {symbol}: {resp.get('message', 'unknown error')}"
 
@@ -52,16 +129,16 @@ def query_twelve_data(query: str) -> str:
                 lines.append(f"  {v['datetime']}: {vals}")
             return "\n".join(lines)
 
-        # Time series (price)
-        params = {"symbol": symbol, "interval": "1day", "apikey": API_KEY, "outputsize": 5}
-        resp = requests.get(f"{BASE_URL}/time_series", params=params, timeout=10).json()
-
-        if "values" not in resp:
-            return f"No price data for {symbol}: {resp.get('message', 'unknown error')}"
+        # Time series (price) since the last stored bar
+        errors = []
+        bars = _load_bars(symbol, errors)
+        if not bars:
+            return f"No price data for {symbol}: {errors[0] if errors else 'unknown error'}"
 
         lines = [f"Twelve Data prices for {symbol} (last 5 trading days):"]
-        for v in resp["values"]:
-            lines.append(f"  {v['datetime']}: O={v['open']} H={v['high']} L={v['low']} C={v['close']} V={v['volume']}")
+        for ts, o, h, l, c, v in reversed(bars):
+            vol = f"{v:.0f}" if v is not None else "N/A"
+            lines.append(f"  {bar_store.format_date(ts)}: O={o} H={h} L={l} C={c} V={vol}")
         return "\n".join(lines)
     except Exception as e:
         return f"Twelve Data error: {e}"
@@ -72,10 +149,6 @@ if API_KEY:
     tool = Tool(
         name="twelve_data",
         func=query_twelve_data,
-        description=(
-            "Fetch real-time/historical prices and technical indicators from Twelve Data. "
-            "Input: 'SYMBOL' for price data or 'SYMBOL INDICATOR' for technicals. "
-            "Indicators: RSI, SMA, EMA, MACD, BBANDS, STOCH, ADX, ATR. "
-            "Example: 'AAPL RSI' or 'TSLA MACD'."
-        ),
+        coroutine=to_coroutine(query_twelve_data),
+        description=registry.spec("twelve_data").description,
     )
@@ -3,41 +3,165 @@
 Uses Yahoo's public query endpoints for price history and key stats.
 """
 
-import requests as _requests
+import functools
+import time
+
+import numpy as np
 from langchain.tools import Tool
 
-_SESSION = _requests.Session()
-_SESSION.headers.update({
+from providers import bar_store, registry
+from providers.bars import Bars
+from providers.batch import chunks, fan_out, fmt_num, split_query
+from providers.transport import get_json, to_coroutine
+
+_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-})
+}
 
 _CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
 _QUOTE_URL = "https://query1.finance.yahoo.com/v6/finance/quote"
+_QUOTE_BATCH_SIZE = 50
+# Calendar days per fetch_range request (bulk backfills split longer ranges)
+RANGE_DAYS = 3650
+
+
+def _fetch_chart(symbol, since):
+    """v8 chart endpoint — reliable, includes price history + metadata.
+
+    Without `since` this asks for the last 5 days; otherwise only for bars
+    from `since` up to the end of today.
+    """
+    if since is None:
+        params = {"range": "5d", "interval": "1d", "includePrePost": "false"}
+    else:
+        end_of_today = bar_store.day_ts(time.time()) + 86400
+        params = {"period1": since, "period2": end_of_today, "interval": "1d", "includePrePost": "false"}
+    return get_json(
+        "yahoo_finance", _CHART_URL.format(symbol=symbol), params, "quote",
+        headers=_HEADERS, raise_for_status=True,
+    )
+
+
+def _chart_bars(chart):
+    """Daily Bars from a chart result, dated in the exchange's timezone.
+
+    The chart is already columnar, so the columns are taken over as arrays.
+    """
+    timestamps = np.asarray(chart.get("timestamp") or [], dtype=np.int64)
+    quotes = chart.get("indicators", {}).get("quote", [{}])[0]
+    offset = chart.get("meta", {}).get("gmtoffset", 0)
+    columns = [quotes.get(k) or [None] * len(timestamps) for k in ("open", "high", "low", "close", "volume")]
+    return Bars((timestamps + offset) // 86400 * 86400, *columns)
+
+
+def fetch_range(symbol, start, end):
+    """Daily Bars dated start..end (UTC-midnight epoch seconds), for bulk backfills.
+
+    Bypasses the response cache: years of bars would crowd out everything else.
+    """
+    params = {"period1": start, "period2": end + 86400, "interval": "1d", "includePrePost": "false"}
+    data = get_json(
+        "yahoo_finance", _CHART_URL.format(symbol=symbol), params, headers=_HEADERS, raise_for_status=True,
+    )
+    result = data.get("chart", {}).get("result")
+    if not result:
+        return Bars.empty()
+    bars = _chart_bars(result[0])
+    return bars[(bars.ts >= start) & (bars.ts <= end)]
+
+
+def _fetch_rows(symbol, since, charts=None):
+    """Bars since `since`; the raw chart results are appended to `charts`."""
+    result = _fetch_chart(symbol, since).get("chart", {}).get("result")
+    if not result:
+        return Bars.empty()
+    if charts is not None:
+        charts.append(result[0])
+    return _chart_bars(result[0])
+
+
+def _load(symbol):
+    """Sync stored bars for symbol; return (chart meta, last 5 bars).
+
+    meta is None when Yahoo has no chart for the symbol.
+    """
+    charts = []
+    bars = bar_store.sync("yahoo_finance", symbol, "1d", functools.partial(_fetch_rows, symbol, charts=charts))
+    if not charts:
+        _fetch_rows(symbol, None, charts)  # bars came from the archive; the live meta still comes from Yahoo
+    meta = charts[-1].get("meta", {}) if charts else None
+    return meta, bars
+
+
+def history(symbol, n):
+    """The newest n daily bars, backfilled into the bar store as needed."""
+    return bar_store.history("yahoo_finance", symbol, "1d", functools.partial(_fetch_rows, symbol), n)
+
+
+def get_quote(symbol):
+    """Last price, prior close and volume for the consensus tool."""
+    meta, bars = _load(symbol)
+    if meta is None:
+        raise LookupError(f"no data for {symbol}")
+    return {
+        "price": meta.get("regularMarketPrice"),
+        "prev_close": bars[-2][4] if len(bars) > 1 else None,
+        "volume": meta.get("regularMarketVolume") or (bars[-1][5] if bars else None),
+    }
+
+
+def _query_many(symbols):
+    """One quote row per symbol from the v6 batch quote endpoint.
+
+    Symbols the batch endpoint doesn't return (or every symbol, if the
+    endpoint is unavailable) fall back to per-symbol chart lookups.
+    """
+    rows, missing = {}, []
+    for chunk in chunks(symbols, _QUOTE_BATCH_SIZE):
+        try:
+            data = get_json(
+                "yahoo_finance", _QUOTE_URL, {"symbols": ",".join(chunk)}, "quote",
+                headers=_HEADERS, raise_for_status=True,
+                ok=lambda d: bool(d.get("quoteResponse", {}).get("result")),
+            )
+            results = data.get("quoteResponse", {}).get("result") or []
+        except Exception:
+            results = []
+        for q in results:
+            rows[q.get("symbol")] = (
+                f"  {q.get('symbol')}: {q.get('shortName', q.get('longName', ''))} | "
+                f"Price={fmt_num(q.get('regularMarketPrice'))} "
+                f"Chg={fmt_num(q.get('regularMarketChangePercent'), '+.2f')}% "
+                f"PrevClose={fmt_num(q.get('regularMarketPreviousClose'))} "
+                f"Vol={fmt_num(q.get('regularMarketVolume'), ',.0f')} "
+                f"52W={fmt_num(q.get('fiftyTwoWeekLow'))}-{fmt_num(q.get('fiftyTwoWeekHigh'))}"
+            )
+        missing.extend(s for s in chunk if s not in rows)
+
+    lines = [f"Yahoo Finance quotes for {len(symbols)} symbols:"]
+    lines.extend(rows[s] for s in symbols if s in rows)
+    if missing:
+        lines.append("")
+        lines.append(fan_out(query_yahoo_finance, missing))
+    return "\n".join(lines)
 
 
 def query_yahoo_finance(query: str) -> str:
-    """Fetch stock data from Yahoo Finance. Query should be a ticker symbol like AAPL."""
-    symbol = query.strip().upper().split()[0]
+    """Fetch stock data from Yahoo Finance.
+
+    Query should be a ticker symbol like AAPL, or a comma-separated list
+    like 'AAPL, MSFT, NVDA' for one quote row per symbol.
+    """
+    symbols, _ = split_query(query)
+    if len(symbols) > 1:
+        return _query_many(symbols)
+    symbol = symbols[0]
 
     try:
-        # v8 chart endpoint — reliable, includes price history + metadata
-        resp = _SESSION.get(
-            _CHART_URL.format(symbol=symbol),
-            params={"range": "5d", "interval": "1d", "includePrePost": "false"},
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-
-        result = data.get("chart", {}).get("result")
-        if not result:
+        meta, bars = _load(symbol)
+        if meta is None:
             return f"No Yahoo Finance data found for {symbol}"
 
-        chart = result[0]
-        meta = chart.get("meta", {})
-        timestamps = chart.get("timestamp", [])
-        quotes = chart.get("indicators", {}).get("quote", [{}])[0]
-
         lines = [f"Yahoo Finance data for {symbol}:"]
         lines.append(f"  Name: {meta.get('longName', meta.get('shortName', symbol))}")
         lines.append(f"  Current Price: {meta.get('regularMarketPrice', 'N/A')}")
@@ -49,22 +173,15 @@ def query_yahoo_finance(query: str) -> str:
         lines.append(f"  Exchange: {meta.get('exchangeName', 'N/A')}")
         lines.append(f"  Currency: {meta.get('currency', 'N/A')}")
 
-        if timestamps:
-            from datetime import datetime
-            opens = quotes.get("open", [])
-            highs = quotes.get("high", [])
-            lows = quotes.get("low", [])
-            closes = quotes.get("close", [])
-            volumes = quotes.get("volume", [])
-
+        if bars:
             lines.append("\nRecent price history (last 5 trading days):")
-            for i, ts in enumerate(timestamps):
-                date = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
-                o = f"{opens[i]:.2f}" if opens[i] else "N/A"
-                h = f"{highs[i]:.2f}" if highs[i] else "N/A"
-                l = f"{lows[i]:.2f}" if lows[i] else "N/A"
-                c = f"{closes[i]:.2f}" if closes[i] else "N/A"
-                v = str(int(volumes[i])) if volumes[i] else "N/A"
+            for ts, op, hi, lo, cl, vol in bars:
+                date = bar_store.format_date(ts)
+                o = f"{op:.2f}" if op else "N/A"
+                h = f"{hi:.2f}" if hi else "N/A"
+                l = f"{lo:.2f}" if lo else "N/A"
+                c = f"{cl:.2f}" if cl else "N/A"
+                v = str(int(vol)) if vol else "N/A"
                 lines.append(f"  {date}: Open={o} High={h} Low={l} Close={c} Vol={v}")
 
         return "\n".join(lines)
@@ -75,8 +192,6 @@ def query_yahoo_finance(query: str) -> str:
 tool = Tool(
     name="yahoo_finance",
     func=query_yahoo_finance,
-    description=(
-        "Fetch stock price history, fundamentals, dividends, and key metrics from Yahoo Finance. "
-        "Input should be a stock ticker symbol like AAPL, TSLA, MSFT. Free, no API key needed."
-    ),
+    coroutine=to_coroutine(query_yahoo_finance),
+    description=registry.spec("yahoo_finance").description,
 )
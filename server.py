@@ -0,0 +1,416 @@
+"""HTTP service mode: the agent and the raw tools for several users at once.
+
+One process serves every session, so they all share one agent, the pooled
+provider connections, the response cache, the answer cache and the rate
+limits. Agent queries run on a bounded worker pool on one event loop;
+each session keeps its own bounded chat history (history.py).
+
+  POST   /query            {"query": ..., "session": optional id, "stream": bool}
+                           stream=true answers as Server-Sent Events (see
+                           streaming.py): token, tool_start, tool_end,
+                           answer, error
+  POST   /tools/<name>     {"input": ...}, a direct tool call without the LLM
+  GET    /tools            tool names and descriptions
+  GET    /health           readiness, load, sessions and cache stats
+  GET    /metrics          tool, HTTP and LLM timings in Prometheus text format
+  DELETE /sessions/<id>
+
+Past SERVER_WORKERS running and SERVER_QUEUE waiting queries (or
+SERVER_TOOL_WORKERS tool calls), requests get 503 with Retry-After.
+
+Run:   python server.py --port 8080
+       curl -N localhost:8080/query -d '{"query": "BTC price?", "stream": true}'
+
+Load testing needs no network or LLM: --stub replays fixtures through the
+tools, and --load-test drives the tool endpoints of a running server.
+       python server.py --stub fixtures/sample --port 8080
+       python server.py --load-test http://127.0.0.1:8080 --concurrency 32 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv("SERVER_WORKERS", "8"))
+QUEUE = int(os.getenv("SERVER_QUEUE", "32"))
+TOOL_WORKERS = int(os.getenv("SERVER_TOOL_WORKERS", "16"))
+SESSION_TTL = float(os.getenv("SERVER_SESSION_TTL", "1800"))  # seconds idle before a session is dropped
+
+
+class Busy(Exception):
+    """No worker free and the queue is full."""
+
+
+@dataclass
+class Session:
+    history: object
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # one query at a time, in order
+    used: float = field(default_factory=time.monotonic)
+
+
+class AgentService:
+    """The shared agent, its worker pool and the sessions."""
+
+    def __init__(self, workers=WORKERS, queue_size=QUEUE, tool_workers=TOOL_WORKERS, warmup=None):
+        import answer_cache
+        import main as repl
+
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="agent-loop", daemon=True).start()
+        self.warmup = warmup or ThreadPoolExecutor(max_workers=1, thread_name_prefix="warmup").submit(repl.warm_up)
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._slots = asyncio.Semaphore(workers)
+        self._tool_slots = threading.BoundedSemaphore(tool_workers)
+        self.answers = answer_cache.AnswerCache()
+        self.sessions = {}
+        self.pending = 0  # queries admitted, running or waiting
+        self._lock = threading.Lock()
+        self._tools = None
+        self._summarize = None
+
+    # ─── Sessions ───────────────────────────────────────────────────
+
+    def session(self, session_id):
+        """(id, Session), creating it if needed; idle sessions are dropped on the way."""
+        import history
+
+        now = time.monotonic()
+        with self._lock:
+            for stale in [k for k, s in self.sessions.items() if now - s.used > SESSION_TTL and not s.lock.locked()]:
+                del self.sessions[stale]
+            session_id = session_id or uuid.uuid4().hex[:16]
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = Session(history.ChatHistory(summarize=self._summarizer()))
+            session.used = now
+            return session_id, session
+
+    def _summarizer(self):
+        import history
+
+        if self._summarize is None:
+            self._summarize = history.extractive_summary
+            if history.SUMMARIZER == "llm":
+                self._summarize = self._llm_summary
+        return self._summarize
+
+    def _llm_summary(self, summary, turns):
+        """history.llm_summarizer on the agent's own chat model, so its tokens count in /stats."""
+        import history
+        import main as repl
+
+        return history.llm_summarizer(repl.agent_llm(self.warmup.result()))(summary, turns)
+
+    def drop(self, session_id):
+        with self._lock:
+            return self.sessions.pop(session_id, None) is not None
+
+    # ─── Agent queries ──────────────────────────────────────────────
+
+    def admit(self):
+        with self._lock:
+            if self.pending >= self.capacity:
+                raise Busy()
+            self.pending += 1
+
+    def query(self, session_id, text, emit):
+        """Run one query; `emit(event)` gets each event, then None. Raises Busy."""
+        self.admit()
+        sid, session = self.session(session_id)
+        emit({"type": "session", "session": sid})
+        asyncio.run_coroutine_threadsafe(self._run(session, text, emit), self.loop)
+        return sid
+
+    async def _run(self, session, text, emit):
+        import streaming
+        from providers import cache
+
+        try:
+            hit = self.answers.get(text)
+            if hit is not None:
+                emit({"type": "token", "text": hit.answer})
+                emit({"type": "answer", "text": hit.answer, "cached": True})
+                await self.loop.run_in_executor(None, session.history.add, text, hit.answer, hit.steps)
+                return
+            executor = await asyncio.wrap_future(self.warmup)
+            async with session.lock, self._slots:
+                chat = session.history
+                inputs = {"input": text, "chat_history": chat.messages(), "history_summary": chat.summary_prompt()}
+                answer = None
+                with cache.trace() as expiries:
+                    async for event in streaming.events(executor, inputs):
+                        if event["type"] == "answer":
+                            answer = event
+                        emit(event)
+                if answer is not None:
+                    self.answers.put(text, answer["text"], answer["steps"], expiries)
+                    # Summarizing may call the LLM; keep it off the event loop
+                    await self.loop.run_in_executor(None, chat.add, text, answer["text"], answer["steps"])
+        except Exception as e:
+            logger.exception("Query failed")
+            emit({"type": "error", "error": f"{type(e).__name__}: {e}"})
+        finally:
+            with self._lock:
+                self.pending -= 1
+            session.used = time.monotonic()
+            emit(None)
+
+    # ─── Direct tool calls ──────────────────────────────────────────
+
+    def tools(self):
+        if self._tools is None:
+            from providers import get_tools
+
+            self._tools = {t.name: t for t in get_tools()}
+        return self._tools
+
+    def call_tool(self, name, tool_input):
+        """(output, seconds) of one tool call; KeyError for unknown tools, Busy when saturated."""
+        tool = self.tools()[name]
+        if not self._tool_slots.acquire(timeout=1.0):
+            raise Busy()
+        try:
+            started = time.perf_counter()
+            output = tool.invoke(tool_input)
+            return output, time.perf_counter() - started
+        finally:
+            self._tool_slots.release()
+
+    def health(self):
+        from providers import cache
+
+        with self._lock:
+            pending, sessions = self.pending, len(self.sessions)
+        stats = cache.stats()
+        stats.pop("providers")
+        return {
+            "ready": self.warmup.done() and self.warmup.exception() is None,
+            "running": min(pending, self.workers),
+            "queued": max(0, pending - self.workers),
+            "sessions": sessions,
+            "cache": stats,
+            "answers": self.answers.stats(),
+        }
+
+
+class AgentServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog; the default 5 resets bursts of clients
+
+    def __init__(self, address, service):
+        super().__init__(address, _Handler)
+        self.service = service
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        service = self.server.service
+        if path == "/health":
+            return self._json(200, service.health())
+        if path == "/metrics":
+            from providers import metrics
+
+            return self._send(200, metrics.render().encode(), "text/plain; version=0.0.4; charset=utf-8")
+        if path == "/tools":
+            return self._json(200, {name: t.description for name, t in service.tools().items()})
+        if path.startswith("/tools/"):
+            params = dict(parse_qsl(urlsplit(self.path).query))
+            return self._tool(path[len("/tools/"):], params.get("input", ""))
+        self._json(404, {"error": f"no route for GET {path}"})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            return self._json(400, {"error": f"invalid JSON body: {e}"})
+        if path == "/query":
+            return self._query(body)
+        if path.startswith("/tools/"):
+            return self._tool(path[len("/tools/"):], body.get("input", ""))
+        self._json(404, {"error": f"no route for POST {path}"})
+
+    def do_DELETE(self):
+        path = urlsplit(self.path).path.rstrip("/")
+        if path.startswith("/sessions/") and self.server.service.drop(path[len("/sessions/"):]):
+            return self._json(200, {"deleted": path[len("/sessions/"):]})
+        self._json(404, {"error": f"no session {path}"})
+
+    def _query(self, body):
+        text = str(body.get("query") or "").strip()
+        if not text:
+            return self._json(400, {"error": "missing 'query'"})
+        events = queue.Queue()
+        started = time.perf_counter()
+        try:
+            self.server.service.query(body.get("session") or self.headers.get("X-Session-Id"), text, events.put)
+        except Busy:
+            return self._json(503, {"error": "server busy, retry shortly"}, {"Retry-After": "1"})
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for event in iter(events.get, None):
+                    self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n".encode())
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                for _ in iter(events.get, None):  # client left; let the run finish
+                    pass
+            return
+
+        result = {"tools": []}
+        for event in iter(events.get, None):
+            if event["type"] == "session":
+                result["session"] = event["session"]
+            elif event["type"] == "tool_end":
+                result["tools"].append({"tool": event["tool"], "seconds": event["seconds"]})
+            elif event["type"] == "answer":
+                result.update(answer=event["text"], cached=event.get("cached", False))
+            elif event["type"] == "error":
+                result["error"] = event["error"]
+        result["seconds"] = time.perf_counter() - started
+        self._json(500 if "error" in result else 200, result)
+
+    def _tool(self, name, tool_input):
+        try:
+            output, seconds = self.server.service.call_tool(name, str(tool_input))
+        except KeyError:
+            return self._json(404, {"error": f"no tool {name!r}"})
+        except Busy:
+            return self._json(503, {"error": "tool workers busy, retry shortly"}, {"Retry-After": "1"})
+        self._json(200, {"tool": name, "input": tool_input, "output": output, "seconds": seconds})
+
+    def _json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload, default=str).encode(), "application/json", headers)
+
+    def _send(self, status, data, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=0, service=None, **options):
+    """Start an AgentServer on a background thread and return it (port 0 = any free port)."""
+    server = AgentServer((host, port), service or AgentService(**options))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ─── Load test ──────────────────────────────────────────────────────
+
+def load_test(url, calls, concurrency, requests):
+    """POST `requests` tool calls cycling through [(tool, input)] with
+    `concurrency` clients; return (latencies, wall seconds, status counts)."""
+    from collections import Counter
+    from itertools import cycle, islice
+
+    from requests import RequestException, Session
+    from requests.adapters import HTTPAdapter
+
+    client = Session()
+    client.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+    statuses = Counter()
+
+    def one(call):
+        tool, tool_input = call
+        started = time.perf_counter()
+        try:
+            resp = client.post(f"{url.rstrip('/')}/tools/{tool}", json={"input": tool_input}, timeout=60)
+            statuses[resp.status_code] += 1
+        except RequestException as e:
+            statuses[type(e).__name__] += 1
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, islice(cycle(calls), requests)))
+    return latencies, time.perf_counter() - started, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="agent queries run at once")
+    parser.add_argument("--queue", type=int, default=QUEUE, help="agent queries waiting before 503s")
+    parser.add_argument("--tool-workers", type=int, default=TOOL_WORKERS, help="direct tool calls run at once")
+    parser.add_argument("--stub", metavar="FIXTURES", help="serve the tools from a replay fixture directory")
+    parser.add_argument("--load-test", metavar="URL", help="load-test the tool endpoints of a running server")
+    parser.add_argument("--concurrency", type=int, default=16, help="load-test clients")
+    parser.add_argument("--requests", type=int, default=200, help="load-test calls")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    if args.load_test:
+        from benchmark import WORKLOADS, percentile
+
+        calls = [(tool, q) for tool, queries in WORKLOADS.items() for q in queries]
+        latencies, wall, statuses = load_test(args.load_test, calls, args.concurrency, args.requests)
+        print(
+            f"{len(latencies)} calls in {wall:.1f}s ({len(latencies) / wall:.0f}/s) with {args.concurrency} clients: "
+            f"p50={percentile(latencies, 50) * 1000:.0f}ms p95={percentile(latencies, 95) * 1000:.0f}ms "
+            f"p99={percentile(latencies, 99) * 1000:.0f}ms; status {dict(statuses)}"
+        )
+        return
+
+    if args.stub:
+        # Before the providers are imported, as in benchmark.py: dummy keys enable every tool
+        from benchmark import _API_KEYS
+
+        for key in _API_KEYS:
+            os.environ.setdefault(key, "replay")
+        import stub_server
+        from providers import ratelimit, replay
+
+        replay.STUB_URL = stub_server.serve(args.stub).url
+        for name in ratelimit.DEFAULT_LIMITS:
+            ratelimit.SCHEDULER.configure(name, "")  # the stub has no quota
+        logger.info(f"Tools replay {args.stub} via {replay.STUB_URL}")
+
+    server = serve(
+        args.host, args.port, workers=args.workers, queue_size=args.queue, tool_workers=args.tool_workers,
+    )
+    print(f"Serving the agent on {server.url} ({args.workers} workers, queue {args.queue})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
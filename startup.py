@@ -0,0 +1,83 @@
+"""Startup timing for the REPL (`python main.py --startup-time`).
+
+A Timeline records how long each step of the cold start takes, including
+the steps that run in the background while the user types, and
+`import_profile()` reruns a set of imports under `python -X importtime`
+to show which packages the time goes to.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Time-to-prompt budget checked by --startup-time (ms)
+BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "300"))
+
+
+class Timeline:
+    """Named phases with their start offset and duration, from any thread."""
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.phases = []  # (offset, duration, name, thread name)
+        self._lock = threading.Lock()
+
+    def add(self, name, began, ended):
+        with self._lock:
+            self.phases.append((began - self.start, ended - began, name, threading.current_thread().name))
+
+    @contextmanager
+    def phase(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, began, time.perf_counter())
+
+    def mark(self, name):
+        """Record a point in time, e.g. 'prompt shown'."""
+        now = time.perf_counter()
+        self.add(name, now, now)
+
+    def elapsed(self, name):
+        """Offset of the end of phase `name`, in seconds (None if not reached)."""
+        return next((offset + duration for offset, duration, n, _ in self.phases if n == name), None)
+
+    def report(self):
+        lines = [f"  {'start':>8s} {'took':>8s}  phase"]
+        for offset, duration, name, thread in sorted(self.phases):
+            where = "" if thread == "MainThread" else f"  [{thread}]"
+            lines.append(f"  {offset * 1000:>6.0f}ms {duration * 1000:>6.0f}ms  {name}{where}")
+        return "\n".join(lines)
+
+
+def import_profile(modules):
+    """[(module, self µs, cumulative µs)] from a fresh `python -X importtime`."""
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def package_report(rows, top=12):
+    """Self import time summed per top-level package, largest first."""
+    totals = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    total = sum(totals.values())
+    lines = [f"  {'self':>8s}  package   (total {total / 1000:.0f}ms)"]
+    for package, us in sorted(totals.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"  {us / 1000:>6.0f}ms  {package}")
+    return "\n".join(lines)
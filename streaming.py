@@ -0,0 +1,69 @@
+"""An agent run as a stream of small events, for the HTTP server and the REPL.
+
+`events()` wraps AgentExecutor.astream_events and yields plain dicts:
+
+  {"type": "token", "text": ...}                    LLM output as it arrives
+  {"type": "tool_start", "tool": ..., "input": ...}
+  {"type": "tool_end", "tool": ..., "seconds": ..., "output": ...}
+  {"type": "answer", "text": ..., "steps": [(tool, input, output)]}   last
+
+Every backend in config.get_llm() streams once an event stream is
+attached. Chunks arrive as strings from Ollama, Groq and OpenAI, and as
+lists of content blocks from Anthropic; both become text here.
+"""
+
+import time
+
+
+def chunk_text(content):
+    """Text of a streamed message chunk's content (str or content blocks)."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in content or ()
+        if not isinstance(block, dict) or block.get("type") == "text"
+    )
+
+
+def _tool_input(value):
+    """The tool's input as the agent wrote it: 'BTC' rather than {'__arg1': 'BTC'}."""
+    if isinstance(value, dict) and len(value) == 1:
+        return str(next(iter(value.values())))
+    return value if isinstance(value, str) else str(value)
+
+
+async def events(executor, inputs, config=None):
+    """Run the agent on `inputs`, yielding the events above as they happen."""
+    started = {}
+    # String-input tools report an empty input in their start event, so the
+    # inputs come from the model's tool calls instead, per tool in call order.
+    called = {}
+    async for event in executor.astream_events(inputs, config=config, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            text = chunk_text(event["data"]["chunk"].content)
+            if text:
+                yield {"type": "token", "text": text}
+        elif kind == "on_chat_model_end":
+            for call in getattr(event["data"].get("output"), "tool_calls", None) or ():
+                called.setdefault(call["name"], []).append(_tool_input(call["args"]))
+        elif kind == "on_tool_start":
+            started[event["run_id"]] = time.perf_counter()
+            queued = called.get(event["name"])
+            from_call = queued.pop(0) if queued else ""
+            tool_input = event["data"].get("input") or from_call
+            yield {"type": "tool_start", "tool": event["name"], "input": _tool_input(tool_input)}
+        elif kind == "on_tool_end":
+            began = started.pop(event["run_id"], None)
+            output = event["data"].get("output")
+            yield {
+                "type": "tool_end",
+                "tool": event["name"],
+                "seconds": time.perf_counter() - began if began is not None else None,
+                "output": str(getattr(output, "content", output)),
+            }
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            result = event["data"].get("output") or {}
+            steps = [(a.tool, a.tool_input, obs) for a, obs in result.get("intermediate_steps", [])]
+            yield {"type": "answer", "text": result.get("output", ""), "steps": steps}
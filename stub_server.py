@@ -0,0 +1,209 @@
+"""Local stub HTTP server that replays recorded provider responses.
+
+Serves fixtures recorded with HTTP_RECORD_DIR (see providers/replay.py)
+with configurable latency, jitter and injected 429s, so tools can be run
+and measured without network access or API quota.
+
+It can also publish a synthetic Binance combined stream (random-walk
+trades, book tickers, partial depth, 1m klines and mini tickers) for the
+WebSocket streamer in providers/binance_stream.py.
+
+Run:   python stub_server.py --fixtures fixtures/sample --latency 80 --jitter 40 --error-rate 0.05
+Then:  HTTP_STUB_URL=http://127.0.0.1:8765 python main.py
+
+Run:   python stub_server.py --ws-port 8766
+Then:  BINANCE_STREAM_SYMBOLS=BTC,ETH BINANCE_STREAM_URL=ws://127.0.0.1:8766 python main.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from providers import replay
+
+
+class StubServer(ThreadingHTTPServer):
+    """Replays fixtures; requests look like /<original host>/<original path>?<params>.
+
+    latency and jitter are in seconds; error_rate is the fraction of
+    requests answered with 429 instead of the fixture.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, fixtures, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        super().__init__(address, _Handler)
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.counts = Counter()  # served / throttled / missing
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def bump(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def draw(self):
+        """(delay, throttle) for one request."""
+        with self._lock:
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            return delay, self.rng.random() < self.error_rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        delay, throttle = server.draw()
+        time.sleep(delay)
+
+        if throttle:
+            server.bump("throttled")
+            return self._send(429, "application/json", json.dumps({"error": "rate limited (stub)"}))
+        fixture = replay.match(server.fixtures.get(host, {}), "/" + path, dict(parse_qsl(parts.query)))
+        if fixture is None:
+            server.bump("missing")
+            return self._send(404, "application/json", json.dumps({"error": f"no fixture for {host}/{path}"}))
+        server.bump("served")
+        self._send(fixture["status"], fixture["content_type"], fixture["body"])
+
+    def _send(self, status, content_type, body):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(fixtures_dir, host="127.0.0.1", port=0, **options):
+    """Start a StubServer on a background thread and return it (port 0 = any free port)."""
+    server = StubServer((host, port), replay.load_fixtures(fixtures_dir), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class StreamFeed:
+    """Random-walk market data in Binance combined-stream messages."""
+
+    def __init__(self, symbols=("BTCUSDT", "ETHUSDT"), depth=20, seed=None):
+        self.rng = random.Random(seed)
+        self.depth = depth
+        self.prices = {s.upper(): 100.0 * (i + 1) for i, s in enumerate(symbols)}
+        self.opens = dict(self.prices)
+        self.update_id = 0
+
+    def tick(self, now=None):
+        """One round of messages (trade, bookTicker, depth, kline, miniTicker) per symbol."""
+        now = time.time() if now is None else now
+        ms = int(now * 1000)
+        messages = []
+        for symbol, price in self.prices.items():
+            price = self.prices[symbol] = price * (1 + self.rng.gauss(0, 0.0005))
+            step = price * 0.0001
+            self.update_id += 1
+            bids = [[f"{price - step * (i + 1):.4f}", f"{self.rng.uniform(0.1, 5):.4f}"] for i in range(self.depth)]
+            asks = [[f"{price + step * (i + 1):.4f}", f"{self.rng.uniform(0.1, 5):.4f}"] for i in range(self.depth)]
+            stream = symbol.lower()
+            o = self.opens[symbol]
+            messages += [
+                {"stream": f"{stream}@trade", "data": {
+                    "e": "trade", "E": ms, "s": symbol, "t": self.update_id, "p": f"{price:.4f}",
+                    "q": f"{self.rng.uniform(0.001, 1):.4f}", "T": ms, "m": self.rng.random() < 0.5,
+                }},
+                {"stream": f"{stream}@bookTicker", "data": {
+                    "u": self.update_id, "s": symbol, "b": bids[0][0], "B": bids[0][1], "a": asks[0][0], "A": asks[0][1],
+                }},
+                {"stream": f"{stream}@depth{self.depth}@100ms", "data": {
+                    "lastUpdateId": self.update_id, "bids": bids, "asks": asks,
+                }},
+                {"stream": f"{stream}@kline_1m", "data": {"e": "kline", "E": ms, "s": symbol, "k": {
+                    "t": ms // 60000 * 60000, "T": ms // 60000 * 60000 + 59999, "i": "1m",
+                    "o": f"{o:.4f}", "h": f"{max(o, price):.4f}", "l": f"{min(o, price):.4f}",
+                    "c": f"{price:.4f}", "v": "12.5", "x": False,
+                }}},
+                {"stream": f"{stream}@miniTicker", "data": {
+                    "e": "24hrMiniTicker", "E": ms, "s": symbol, "c": f"{price:.4f}", "o": f"{o:.4f}",
+                    "h": f"{max(o, price) * 1.01:.4f}", "l": f"{min(o, price) * 0.99:.4f}",
+                    "v": "1520.5", "q": f"{1520.5 * price:.2f}",
+                }},
+            ]
+        return messages
+
+
+def serve_stream(host="127.0.0.1", port=0, interval=0.1, **options):
+    """Publish a StreamFeed over WebSocket on a background thread; returns (server, ws:// url).
+
+    Every connection gets its own feed for the symbols it subscribes to
+    (`/stream?streams=btcusdt@trade/...`). Needs the websockets package.
+    """
+    from websockets.sync.server import serve as ws_serve
+
+    def handler(ws):
+        query = dict(parse_qsl(urlsplit(ws.request.path).query))
+        streams = [s for s in query.get("streams", "").split("/") if s]
+        symbols = list(dict.fromkeys(s.split("@")[0].upper() for s in streams))
+        depth = next((int(k[5:]) for s in streams for k in s.split("@") if k.startswith("depth") and k[5:].isdigit()), 20)
+        feed = StreamFeed(symbols or ("BTCUSDT",), depth=depth, **options)
+        try:
+            while True:
+                for message in feed.tick():
+                    ws.send(json.dumps(message))
+                time.sleep(interval)
+        except Exception:
+            pass  # client went away
+
+    server = ws_serve(handler, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    bound_host, bound_port = server.socket.getsockname()[:2]
+    return server, f"ws://{bound_host}:{bound_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default="fixtures/sample", help="fixture directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="base latency per request (ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="uniform +/- jitter (ms)")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered with 429")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--ws-port", type=int, default=None, help="also publish a synthetic Binance stream on this port")
+    args = parser.parse_args()
+
+    if args.ws_port is not None:
+        _, ws_url = serve_stream(args.host, args.ws_port, seed=args.seed)
+        print(f"Synthetic Binance stream on {ws_url}")
+
+    server = StubServer(
+        (args.host, args.port), replay.load_fixtures(args.fixtures),
+        latency=args.latency / 1000, jitter=args.jitter / 1000, error_rate=args.error_rate, seed=args.seed,
+    )
+    hosts = ", ".join(server.fixtures) or "none"
+    print(f"Replaying {args.fixtures} ({hosts}) on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStopped. {dict(server.counts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Unit tests for the multi-asset analytics, with the data sources stubbed out. No network needed.
+
+Run:  python -m pytest test_analytics.py -v
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from providers import analytics
+from providers.analytics import Series
+
+DAY = 86400
+
+
+def _walk(seed, n=300):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+
+
+def test_analyze_matches_column_by_column_reference():
+    ts = np.arange(300) * DAY
+    prices = np.column_stack([_walk(1), _walk(2), 4 + np.cumsum(np.random.default_rng(3).normal(0, 0.05, 300))])
+    stats = analytics.analyze(ts, prices, [False, False, True], benchmark=0, window=60)
+
+    returns = np.column_stack([np.diff(np.log(prices[:, 0])), np.diff(np.log(prices[:, 1])), np.diff(prices[:, 2])])
+    assert np.allclose(stats["corr"], np.corrcoef(returns, rowvar=False))
+    assert stats["beta"][1] == pytest.approx(np.cov(returns[:, 1], returns[:, 0])[0, 1] / returns[:, 0].var(ddof=1))
+    assert stats["corr_now"][1] == pytest.approx(np.corrcoef(returns[-60:, 1], returns[-60:, 0])[0, 1])
+    assert stats["total"][1] == pytest.approx(prices[-1, 1] / prices[0, 1] - 1)
+    assert stats["total"][2] == pytest.approx(prices[-1, 2] - prices[0, 2])
+    peak = np.maximum.accumulate(prices[:, 1])
+    assert stats["max_dd"][1] == pytest.approx((prices[:, 1] / peak - 1).min()) and np.isnan(stats["max_dd"][2])
+
+
+def test_align_joins_on_common_dates_and_carries_slow_series_forward():
+    stock = Series("AAPL", "p", np.array([1, 2, 3, 6, 7]) * DAY, np.array([1.0, 2, 3, 6, 7]))
+    coin = Series("BTC", "p", np.arange(0, 8) * DAY, np.arange(0, 8) * 10.0)
+    monthly = Series("CPI", "fred", np.array([2, 5]) * DAY, np.array([100.0, 101.0]), daily=False)
+    ts, matrix = analytics.align([stock, coin, monthly])
+    assert list(ts // DAY) == [2, 3, 6, 7]
+    assert matrix.tolist() == [[2, 20, 100], [3, 30, 100], [6, 60, 101], [7, 70, 101]]
+
+
+def test_query_reports_every_asset_and_skips_missing_ones(monkeypatch):
+    prices = {"QQQ": _walk(4), "BTC": _walk(5), "DGS10": 4 + np.cumsum(np.random.default_rng(6).normal(0, 0.05, 300))}
+
+    threads = set()
+
+    def load(term, start):
+        threads.add(threading.current_thread().name)
+        if term not in prices:
+            raise LookupError("no daily bars source answered")
+        return Series(term, "stub", start + np.arange(300) * DAY, prices[term], rate=term == "DGS10")
+
+    monkeypatch.setattr(analytics, "load", load)
+    out = analytics.query_analytics("BTC, DGS10, NOPE vs QQQ 2y window 20")
+    assert out.startswith("Analytics for QQQ, BTC, DGS10:") and "300 common dates, benchmark QQQ" in out
+    assert "Corr 20d now" in out and "Correlation of daily returns:" in out
+    assert "DGS10 in percent" in out and "Skipped: NOPE (no daily bars source answered)" in out
+    assert "pt" in out.splitlines()[4]
+    assert all(name.startswith("analytics") for name in threads)  # never on the transport fan-out pool
@@ -0,0 +1,59 @@
+"""Unit tests for the REPL answer cache and cache freshness tracing. No network needed.
+
+Run:  python -m pytest test_answer_cache.py -v
+"""
+
+import time
+
+from answer_cache import AnswerCache, cacheable, normalize
+from providers import cache
+
+
+def test_normalized_exact_match_until_data_expires():
+    answers = AnswerCache(match="exact")
+    assert normalize("What's the BTC price?") == normalize("btc price") == "btc price"
+    answers.put("BTC price?", "BTC is $67,000", [("binance", "BTC", "...")], [100.0], now=0.0)
+
+    hit = answers.get("what's the btc price", now=50.0)
+    assert hit is not None and hit.answer == "BTC is $67,000"
+    assert answers.get("ETH price?", now=50.0) is None
+    assert answers.get("BTC price?", now=100.0) is None  # the quote behind it expired
+    assert answers.stats()["entries"] == 0
+
+    # Tense and time words stay in the key; numbers must agree on exact matches too
+    answers.put("what was the BTC price", "BTC was $60,000", [("binance", "BTC", "...")], [100.0], now=0.0)
+    assert answers.get("what is the BTC price now", now=1.0) is None
+    assert answers.get("what was the btc price", now=1.0).answer == "BTC was $60,000"
+    answers.put("BTC above 1,000?", "yes", [("binance", "BTC", "...")], [100.0], now=0.0)
+    assert normalize("BTC above 1 000?") == normalize("BTC above 1,000?")
+    assert answers.get("BTC above 1 000?", now=1.0) is None
+
+    # Follow-ups depend on the conversation and are never cached
+    assert not cacheable("and ETH?") and not cacheable("chart it for me")
+    assert answers.put("what about ETH?", "ETH is $2,600", now=0.0) is None
+
+
+def test_similar_match_needs_same_tickers():
+    answers = AnswerCache(match="similar", similarity=0.8)
+    answers.put("fed funds rate", "4.33%", [("fred", "FEDFUNDS", "...")], [500.0], now=0.0)
+    assert answers.get("What's the fed funds rate level?", now=1.0).answer == "4.33%"
+    assert answers.get("what is the fed funds rate going to be", now=1.0) is None
+
+    answers.put("AAPL RSI", "RSI 61", [("technical_indicators", "AAPL RSI", "...")], [500.0], now=0.0)
+    assert answers.get("AAPL RSI value", now=1.0) is None  # below the threshold
+    answers.similarity = 0.7
+    assert answers.get("AAPL RSI value", now=1.0).answer == "RSI 61"
+    assert answers.get("MSFT RSI value", now=1.0) is None  # different ticker
+
+
+def test_trace_records_expiry_of_data_read(monkeypatch):
+    monkeypatch.setattr(cache, "CACHE", cache.TTLCache())
+    with cache.trace() as expiries:
+        cache.cached("binance", "/ticker", {"symbol": "BTCUSDT"}, "quote", lambda: {"p": 1})
+        cache.cached("fred", "/series", {"id": "GDP"}, "series", lambda: {"x": 1})
+        cache.cached("coingecko", "/coins", {"id": "x"}, "quote", lambda: {"error": 1}, ok=lambda d: "error" not in d)
+    now = time.monotonic()
+    quote, series, error = expiries
+    assert quote - now <= cache.TTLS["quote"] < series - now
+    assert error <= now  # not cached, so an answer built on it is stale at once
+    assert not cache._traces
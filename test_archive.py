@@ -0,0 +1,109 @@
+"""Unit tests for the memory-mapped bar archive and the bar store's use of it. No network needed.
+
+Run:  python -m pytest test_archive.py -v
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from providers import archive, bar_store, yahoo_finance
+from providers.archive import Archive
+from providers.bar_store import BarStore
+from providers.bars import Bars
+
+DAY = 86400
+
+
+@pytest.fixture
+def arch(tmp_path, monkeypatch):
+    a = Archive(tmp_path / "archive")
+    monkeypatch.setattr(archive, "ARCHIVE", a)
+    monkeypatch.setattr(bar_store, "STORE", BarStore(tmp_path / "bars.sqlite"))
+    return a
+
+
+def _bars(days, close=None):
+    days = np.asarray(days)
+    c = days * 1.0 if close is None else np.full(len(days), close)
+    return Bars(days * DAY, c, c, c, c, np.full(len(days), 100.0))
+
+
+def test_range_queries_are_views_into_the_mapped_file(arch):
+    arch.write("p", "AAPL", "1d", _bars([5, 3, 4, 1, 2]))
+    arch.write("p", "AAPL", "1d", _bars(range(6, 1001)))  # appended in place
+    arch.write("p", "AAPL", "1d", _bars([3], close=-1.0))  # rewrites, replacing day 3
+    path = arch.path("p", "AAPL", "1d")
+    assert path.stat().st_size == 1000 * archive.RECORD.itemsize
+
+    bars = arch.range("p", "AAPL", "1d", 250 * DAY, 260 * DAY)
+    assert list(bars.ts // DAY) == list(range(250, 261)) and not bars.close.flags.owndata
+    assert arch.range("p", "AAPL", "1d", start=2 * DAY, end=4 * DAY).close.tolist() == [2.0, -1.0, 4.0]
+    assert not arch.range("p", "AAPL", "1d", 2000 * DAY)
+    assert list(arch.recent("p", "AAPL", "1d", 3).ts // DAY) == [998, 999, 1000]
+    assert arch.last_ts("p", "AAPL", "1d") == 1000 * DAY and arch.symbols("p", "1d") == ["AAPL"]
+    assert not arch.recent("q", "AAPL", "1d", 3) and arch.symbols("q", "1d") == []
+
+    with open(path, "ab") as f:
+        f.write(b"\0" * 7)  # torn record from an interrupted append
+    assert arch.last_ts("p", "AAPL", "1d") == 1000 * DAY
+    arch.write("p", "AAPL", "1d", _bars([1001]))
+    assert list(arch.recent("p", "AAPL", "1d", 2).ts // DAY) == [1000, 1001]
+
+
+def test_history_reads_the_archive_and_fetches_only_the_tail(arch):
+    today = bar_store.day_ts(time.time()) // DAY
+    arch.write("p", "AAPL", "1d", _bars(range(today - 500, today - 3)))
+    calls = []
+
+    def fetch_tail(since):
+        calls.append(None if since is None else since // DAY)
+        start = today - 5 if since is None else since // DAY
+        return _bars(range(start, today + 1))
+
+    bars = bar_store.history("p", "AAPL", "1d", fetch_tail, 300)
+    assert list(bars.ts // DAY) == list(range(today - 299, today + 1))
+    assert calls == [None]  # the cold-start window already reached back to the archive
+
+    calls.clear()
+    assert len(bar_store.history("p", "AAPL", "1d", fetch_tail, 300)) == 300
+    assert calls == [today - 1]  # just the usual tail sync
+
+    arch.write("p", "AAPL", "1d", _bars(range(today - 3, today + 1)))
+    calls.clear()
+    assert list(bar_store.sync("p", "AAPL", "1d", fetch_tail).ts // DAY) == list(range(today - 4, today + 1))
+    assert len(bar_store.history("p", "AAPL", "1d", fetch_tail, 400)) == 400
+    assert calls == []  # a current archive needs no request
+    bar_store.history("q", "AAPL", "1d", fetch_tail, 400)
+    assert calls[0] is None  # another provider's history starts from a cold fetch, not p's archive
+
+
+def test_history_fills_the_gap_between_archive_and_store(arch):
+    today = bar_store.day_ts(time.time()) // DAY
+    arch.write("p", "MSFT", "1d", _bars(range(today - 100, today - 20)))
+    calls = []
+
+    def fetch_tail(since):
+        calls.append(None if since is None else since // DAY)
+        start = today - 3 if since is None else since // DAY
+        return _bars(range(start, today + 1))
+
+    bars = bar_store.history("p", "MSFT", "1d", fetch_tail, 90)
+    assert list(bars.ts // DAY) == list(range(today - 89, today + 1))
+    assert calls == [None, today - 21]
+
+
+def test_yahoo_quote_from_a_current_archive_still_has_live_meta(arch, monkeypatch):
+    today = bar_store.day_ts(time.time()) // DAY
+    arch.write("yahoo_finance", "AAPL", "1d", _bars(range(today - 300, today + 1)))
+    chart = {
+        "meta": {"regularMarketPrice": 123.5, "regularMarketVolume": 1000, "longName": "Apple Inc."},
+        "timestamp": [today * DAY], "indicators": {"quote": [{"close": [123.5]}]},
+    }
+    monkeypatch.setattr(yahoo_finance, "_fetch_chart", lambda symbol, since: {"chart": {"result": [chart]}})
+
+    quote = yahoo_finance.get_quote("AAPL")
+    assert quote["price"] == 123.5 and quote["prev_close"] == float(today - 1)
+    out = yahoo_finance.query_yahoo_finance("AAPL")
+    assert "Current Price: 123.5" in out and f"Close={today:.2f}" in out
@@ -0,0 +1,90 @@
+"""Unit tests for the bulk backfill, with a stubbed bar source. No network needed.
+
+Run:  python -m pytest test_backfill.py -v
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+import backfill
+from providers import archive, bar_store
+from providers.bars import Bars
+from providers.ratelimit import RateLimited
+
+START, END = bar_store.parse_date("2020-01-01"), bar_store.parse_date("2020-04-09")  # 100 days
+
+
+class FakeSource:
+    tool = object()
+    RANGE_DAYS = 30
+
+    def __init__(self):
+        self.calls, self.fail, self.limited = [], set(), 0
+
+    def fetch_range(self, symbol, start, end):
+        if self.limited:
+            self.limited -= 1
+            raise RateLimited("fake rate limit reached")
+        self.calls.append((symbol, start))
+        if (symbol, start) in self.fail:
+            raise LookupError("upstream 500")
+        ts = np.arange(start, end + 1, 86400)
+        return Bars(ts, ts * 0 + 1.0, ts * 0 + 2.0, ts * 0 + 0.5, ts / 86400.0, ts * 0 + 100.0)
+
+
+@pytest.fixture
+def source(monkeypatch):
+    fake = FakeSource()
+    monkeypatch.setitem(backfill.SOURCES, "fake", fake)
+    monkeypatch.setattr(backfill, "RATE_LIMIT_POLL", 0.0)
+    return fake
+
+
+def test_universe_and_chunks(source):
+    assert backfill.read_universe(["symbol,name", "aapl, Apple", "# comment", "", "BTCUSDT", "AAPL"]) == [
+        "AAPL", "BTCUSDT",
+    ]
+    assert backfill.source_for("BTCUSDT") == "binance" and backfill.source_for("AAPL") == "yahoo_finance"
+    chunks = backfill.chunk_range("AAPL", "fake", START, END)
+    assert [c.end - c.start for c in chunks] == [29 * 86400] * 3 + [9 * 86400]
+    assert chunks[0].start == START and chunks[-1].end == END
+    assert all(a.end + 86400 == b.start for a, b in zip(chunks, chunks[1:]))
+
+
+def test_failed_chunk_is_retried_on_resume_and_merged(source, tmp_path, monkeypatch):
+    source.fail = {("MSFT", START + 30 * 86400)}
+    source.limited = 2  # the first requests meet a spent budget and wait
+    first = backfill.run(["AAPL", "MSFT"], START, END, tmp_path, "fake", concurrency=3, stream=io.StringIO())
+    assert first["failed"] == 1 and first["symbols_done"] == 1 and "MSFT 2020-01-31" in first["errors"][0]
+    assert (tmp_path / "AAPL.npz").exists() and not (tmp_path / "MSFT.npz").exists()
+    assert len(list((tmp_path / ".parts" / "MSFT").iterdir())) == 3
+
+    source.fail, source.calls = set(), []
+    second = backfill.run(["AAPL", "MSFT"], START, END, tmp_path, "fake", stream=io.StringIO())
+    assert source.calls == [("MSFT", START + 30 * 86400)]
+    assert second["fetched"] == 1 and second["resumed"] == 3 and second["failed"] == 0
+    bars = Bars.from_npz(tmp_path / "MSFT.npz")
+    assert len(bars) == 100 and np.all(np.diff(bars.ts) == 86400) and bars.ts[0] == START
+    assert not (tmp_path / ".parts" / "MSFT").exists()
+
+    monkeypatch.setattr(archive, "ARCHIVE", archive.Archive(tmp_path / "archive"))
+    third = backfill.run(["AAPL", "MSFT"], START, END, tmp_path, "fake", stream=io.StringIO(), to_archive=True)
+    assert third["chunks"] == 0 and third["symbols_done"] == 2
+    assert archive.ARCHIVE.range("fake", "MSFT", "1d") == bars
+    assert archive.ARCHIVE.symbols("fake", "1d") == ["AAPL", "MSFT"]
+
+
+def test_rerun_with_a_later_end_only_fetches_the_new_days(source, tmp_path):
+    backfill.run(["AAPL"], START, END, tmp_path, "fake", stream=io.StringIO())
+    source.calls = []
+    later = END + 10 * 86400
+    stats = backfill.run(["AAPL"], START, later, tmp_path, "fake", stream=io.StringIO())
+    assert source.calls == [("AAPL", END)]  # the last saved day is refetched in case it was partial
+    assert stats["chunks"] == 1 and stats["symbols_done"] == 1
+    bars = Bars.from_npz(tmp_path / "AAPL.npz")
+    assert len(bars) == 110 and bars.ts[0] == START and bars.ts[-1] == later
+    assert np.all(np.diff(bars.ts) == 86400)
+    with np.load(tmp_path / "AAPL.npz") as data:
+        assert int(data["start"]) == START and int(data["end"]) == later
@@ -0,0 +1,57 @@
+"""Unit tests for the on-disk bar store. No network needed.
+
+Run:  python -m pytest test_bar_store.py -v
+"""
+
+import pytest
+
+from providers import bar_store
+from providers.bar_store import BarStore
+
+DAY = 86400
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    s = BarStore(tmp_path / "bars.sqlite")
+    monkeypatch.setattr(bar_store, "STORE", s)
+    return s
+
+
+def _bar(day, close):
+    return (day * DAY, close, close, close, close, 100.0)
+
+
+def test_sync_fetches_only_the_tail(store):
+    calls = []
+
+    def fetch_tail(since):
+        calls.append(since)
+        if since is None:
+            return [_bar(d, 10.0 + d) for d in range(1, 6)]
+        return [_bar(d, 10.0 + d) for d in range(since // DAY, 8)]
+
+    assert [r[0] for r in bar_store.sync("p", "AAPL", "1d", fetch_tail)] == [d * DAY for d in range(1, 6)]
+    bars = bar_store.sync("p", "AAPL", "1d", fetch_tail)
+    assert calls == [None, 4 * DAY]
+    assert [r[0] // DAY for r in bars] == [3, 4, 5, 6, 7]
+    assert len(store.load("p", "AAPL", "1d")) == 7
+
+
+def test_sync_rebuilds_restated_history(store):
+    store.upsert("p", "AAPL", "1d", [_bar(d, 100.0) for d in range(1, 6)])
+
+    def fetch_tail(since):
+        # A 2:1 split halves every historical close
+        start = 1 if since is None else since // DAY
+        return [_bar(d, 50.0) for d in range(start, 7)]
+
+    bars = bar_store.sync("p", "AAPL", "1d", fetch_tail)
+    assert all(r[4] == 50.0 for r in store.load("p", "AAPL", "1d"))
+    assert [r[0] // DAY for r in bars] == [2, 3, 4, 5, 6]
+
+
+def test_day_helpers_round_trip():
+    ts = bar_store.parse_date("2024-03-01T00:00:00.000Z")
+    assert bar_store.format_date(ts) == "2024-03-01"
+    assert bar_store.day_ts(ts + 13 * 3600) == ts
@@ -0,0 +1,56 @@
+"""Unit tests for the columnar Bars type. No network needed.
+
+Run:  python -m pytest test_bars.py -v
+"""
+
+import numpy as np
+
+from providers import bar_store, polygon, tiingo
+from providers.bar_store import BarStore
+from providers.bars import Bars
+
+DAY = 86400
+
+
+def test_from_rows_and_row_access():
+    bars = Bars.from_rows([(DAY, "1.5", 2, 1, 1.8, None), (2 * DAY, 1.8, 2.2, 1.7, 2.0, 10)])
+    assert bars.ts.dtype == np.int64 and bars.close.dtype == np.float64
+    assert bars[0] == (DAY, 1.5, 2.0, 1.0, 1.8, None)
+    assert [r[4] for r in reversed(bars)] == [2.0, 1.8]
+    assert bars.nbytes == 2 * 6 * 8
+    assert not Bars.from_rows([]) and len(Bars.concat([bars, bars])) == 4
+
+
+def test_slices_are_views():
+    bars = Bars.from_rows([(d * DAY, d, d, d, d, d) for d in range(10)])
+    tail = bars.tail(3)
+    assert np.shares_memory(tail.close, bars.close)
+    assert list(tail.ts // DAY) == [7, 8, 9]
+    assert len(bars.tail(50)) == 10 and len(bars.tail(0)) == 0
+    bars.high[8] = np.nan
+    assert list(bars.complete().ts // DAY) == [0, 1, 2, 3, 4, 5, 6, 7, 9]
+
+
+def test_records_round_trip_through_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "STORE", BarStore(tmp_path / "bars.sqlite"))
+    results = [{"t": d * DAY * 1000 + 3600_000, "o": 1.0, "h": 2.0, "l": 0.5, "c": 1.5, "v": 100} for d in (1, 2)]
+    monkeypatch.setattr(polygon, "get_json", lambda *a, **k: {"resultsCount": 2, "results": results})
+
+    bars = polygon.history("AAPL", 2)
+    assert isinstance(bars, Bars)
+    assert list(bars.ts) == [DAY, 2 * DAY]
+    assert bars == bar_store.STORE.load("polygon", "AAPL", "1d")
+
+
+def test_tools_render_missing_bar_values(monkeypatch):
+    bars = Bars.from_rows([(DAY, None, 2.0, 1.0, 1.5, 100), (2 * DAY, 1.5, 2.5, 1.2, 2.0, None)])
+    for module in (polygon, tiingo):
+        monkeypatch.setattr(module, "_load_bars", lambda symbol: bars)
+    monkeypatch.setattr(polygon, "get_json", lambda *a, **k: {"results": {"name": "Apple Inc."}})
+    monkeypatch.setattr(tiingo, "get_json", lambda *a, **k: {"name": "Apple Inc."})
+
+    out = polygon.query_polygon("AAPL")
+    assert "1970-01-02: Open=N/A High=2.00 Low=1.00 Close=1.50 Volume=100" in out
+    assert "Close=2.00 Volume=N/A" in out
+    out = tiingo.query_tiingo("AAPL")
+    assert "1970-01-02: Open=N/A High=2.00 Low=1.00 Close=1.50 Vol=100" in out
@@ -0,0 +1,51 @@
+"""Unit tests for multi-symbol query handling. No network needed.
+
+Run:  python -m pytest test_batch.py -v
+"""
+
+import threading
+import time
+
+from providers import batch, binance
+
+
+def test_split_query():
+    assert batch.split_query("aapl, msft ,nvda RSI") == (["AAPL", "MSFT", "NVDA"], "RSI")
+    assert batch.split_query("AAPL") == (["AAPL"], "")
+    assert batch.split_query("aapl,AAPL,msft earnings") == (["AAPL", "MSFT"], "earnings")
+
+
+def test_fan_out_keeps_order_and_bounds_concurrency():
+    running, peak = 0, 0
+    lock = threading.Lock()
+
+    def query(q):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return q
+
+    symbols = [f"S{i}" for i in range(10)]
+    assert batch.fan_out(query, symbols, "RSI", max_workers=3).split("\n\n") == [f"{s} RSI" for s in symbols]
+    assert peak <= 3
+
+
+def test_binance_batch_uses_one_request(monkeypatch):
+    calls = []
+
+    def fake_get_json(provider, url, params=None, data_class=None, **kwargs):
+        calls.append(params)
+        return [
+            {"symbol": s, "lastPrice": "1", "highPrice": "2", "lowPrice": "0.5",
+             "priceChangePercent": "1.0", "quoteVolume": "1000"}
+            for s in ("ETHUSDT", "BTCUSDT")
+        ]
+
+    monkeypatch.setattr(binance, "get_json", fake_get_json)
+    result = binance.query_binance("btc, eth")
+    assert calls == [{"symbols": '["BTCUSDT","ETHUSDT"]'}]
+    assert result.index("BTCUSDT:") < result.index("ETHUSDT:")
@@ -0,0 +1,70 @@
+"""Unit tests for the Binance WebSocket streamer, against the local stub feed.
+
+Run:  python -m pytest test_binance_stream.py -v
+"""
+
+import time
+
+import pytest
+
+import stub_server
+from providers import binance, binance_stream
+from providers.binance_stream import OrderBook, Streamer, TradeRing
+
+pytest.importorskip("websockets")
+
+
+def test_trade_ring_wraps_in_order():
+    ring = TradeRing(4)
+    for i in range(6):
+        ring.append(float(i), 100.0 + i, 1.0, i % 2 == 1)
+    assert list(ring.recent()["price"]) == [102.0, 103.0, 104.0, 105.0]
+    stats = ring.stats(since=4.0)
+    assert stats["count"] == 2 and stats["vwap"] == 104.5 and stats["buy_share"] == 0.5
+    assert ring.stats(since=10.0) is None
+
+
+def test_order_book_keeps_newest_top_of_book():
+    book = OrderBook()
+    book.apply_book_ticker({"u": 5, "b": "99.5", "B": "2", "a": "100.5", "A": "1"})
+    book.apply_depth({"lastUpdateId": 4, "bids": [["99", "3"]], "asks": [["101", "1"]]})
+    assert book.best_bid == (99.5, 2.0)  # depth snapshot was older
+    assert book.bids == [(99.0, 3.0)]
+    assert book.imbalance() == 0.5
+
+
+@pytest.fixture
+def feed():
+    server, url = stub_server.serve_stream(interval=0.02, seed=1)
+    yield url
+    server.shutdown()
+
+
+def test_streamer_fills_state_from_stub(feed, monkeypatch):
+    streamer = Streamer(["BTCUSDT", "ETHUSDT"], url=feed, depth=10).start()
+    try:
+        deadline = time.time() + 5
+        while time.time() < deadline and not all(streamer.snapshot(s) for s in streamer.symbols):
+            time.sleep(0.02)
+        live = streamer.snapshot("btcusdt")
+        assert live and live["ticker"] and live["kline"] and len(live["bids"]) == 10
+        assert live["best_bid"][0] < live["best_ask"][0]
+        assert live["recent"]["count"] >= 1
+        assert streamer.snapshot("SOLUSDT") is None
+
+        monkeypatch.setattr(binance, "STREAM", streamer)
+        assert "WebSocket stream" in binance.query_binance("BTC")
+        assert "ETHUSDT" in binance.query_binance("BTC, ETH")
+    finally:
+        streamer.stop()
+    assert streamer.snapshot("BTCUSDT", max_age=0) is None
+
+
+def test_stream_url_and_env(monkeypatch):
+    streamer = Streamer(["BTCUSDT"], url="ws://x/", depth=5)
+    assert streamer.stream_url == (
+        "ws://x/stream?streams=btcusdt@trade/btcusdt@bookTicker/btcusdt@kline_1m/"
+        "btcusdt@depth5@100ms/btcusdt@miniTicker"
+    )
+    monkeypatch.setattr(binance_stream, "SYMBOLS", [])
+    assert binance_stream.from_env(binance._pair) is None
@@ -0,0 +1,58 @@
+"""Unit tests for the shared provider response cache. No network needed.
+
+Run:  python -m pytest test_cache.py -v
+"""
+
+import time
+
+from providers import cache
+from providers.cache import TTLCache, make_key
+
+
+def test_key_ignores_param_order_and_secrets():
+    a = make_key("fred", "series", {"series_id": "CPIAUCSL", "api_key": "one", "file_type": "json"})
+    b = make_key("fred", "series", {"file_type": "json", "api_key": "two", "series_id": "CPIAUCSL"})
+    assert a == b
+    assert "one" not in str(a)
+
+
+def test_hit_miss_and_expiry():
+    c = TTLCache(max_bytes=10_000)
+    key = make_key("binance", "ticker/24hr", {"symbol": "BTCUSDT"})
+    assert c.get(key) is None
+    c.set(key, {"lastPrice": "1"}, ttl=0.05)
+    assert c.get(key) == {"lastPrice": "1"}
+    time.sleep(0.06)
+    assert c.get(key) is None
+    s = c.stats()
+    assert (s["hits"], s["misses"]) == (1, 2)
+    assert s["providers"]["binance"] == {"hits": 1, "misses": 2}
+
+
+def test_lru_eviction_respects_memory_cap():
+    c = TTLCache(max_bytes=250)
+    c.set(("p", "0", ()), "x" * 100, ttl=60)
+    c.set(("p", "1", ()), "x" * 100, ttl=60)
+    c.get(("p", "0", ()))  # 1 is now least recently used
+    c.set(("p", "2", ()), "x" * 100, ttl=60)
+    s = c.stats()
+    assert s["bytes"] <= 250
+    assert s["evictions"] == 1
+    assert c.get(("p", "1", ())) is None
+    assert c.get(("p", "0", ())) == "x" * 100
+
+
+def test_cached_skips_responses_rejected_by_ok():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"Note": "rate limited"}
+
+    for _ in range(2):
+        cache.cached("test", "endpoint", {"q": 1}, "quote", fetch, ok=lambda d: "Note" not in d)
+    assert len(calls) == 2
+
+    cache.cached("test", "endpoint", {"q": 2}, "quote", fetch)
+    cache.cached("test", "endpoint", {"q": 2}, "quote", fetch)
+    assert len(calls) == 3
@@ -0,0 +1,41 @@
+"""Unit tests for the consensus quote tool, with providers stubbed out.
+
+Run:  python -m pytest test_consensus.py -v
+"""
+
+import time
+
+import pytest
+
+from providers import consensus
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    def install(**modules):
+        monkeypatch.setattr(consensus, "SOURCES", list(modules.items()))
+    return install
+
+
+def test_merges_sources_and_reports_spread(sources, quote_source):
+    sources(a=quote_source(100.0, 99.0, 1000), b=quote_source(100.5, 99.0), c=quote_source(0, error="boom"))
+    result = consensus.query_consensus("aapl")
+    assert "Consensus quote for AAPL (2/3 sources" in result
+    assert "Last price spread: 0.50" in result
+    assert "c (boom)" in result
+
+
+def test_deadline_reports_slow_sources(sources, monkeypatch, quote_source):
+    monkeypatch.setattr(consensus, "TIMEOUT", 0.1)
+    sources(fast=quote_source(10.0), slow=quote_source(11.0, delay=0.5))
+    result = consensus.query_consensus("MSFT")
+    assert "(1/2 sources" in result
+    assert "Timed out: slow" in result
+
+
+def test_first_n_returns_early(sources, quote_source):
+    sources(fast=quote_source(10.0), slow=quote_source(11.0, delay=0.5))
+    start = time.perf_counter()
+    result = consensus.query_consensus("MSFT first 1")
+    assert time.perf_counter() - start < 0.3
+    assert "Not awaited: slow" in result
@@ -0,0 +1,79 @@
+"""Unit tests for the local FRED series store. No network needed.
+
+Run:  python -m pytest test_fred_store.py -v
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from providers import cache, fred, fred_store
+from providers.fred_store import FredStore
+
+META = {"id": "CPIAUCSL", "title": "Consumer Price Index", "units": "Index", "frequency": "Monthly"}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    s = FredStore(tmp_path / "fred.sqlite")
+    monkeypatch.setattr(fred_store, "STORE", s)
+    return s
+
+
+def _months(n):
+    return [f"{2000 + i // 12}-{i % 12 + 1:02d}-01" for i in range(n)]
+
+
+def test_full_history_once_then_deltas(store, monkeypatch):
+    monkeypatch.setattr(fred_store, "REVISION_WINDOW", 3)
+    history = {d: float(i) for i, d in enumerate(_months(30))}
+    calls = []
+
+    def fetch_observations(start):
+        calls.append(start)
+        return [(d, v, "2026-10-01") for d, v in history.items() if start is None or d >= start]
+
+    meta = fred_store.sync("CPIAUCSL", lambda: META, fetch_observations, now=0)
+    assert meta["title"] == "Consumer Price Index"
+    assert calls == [None] and len(store.load("CPIAUCSL")) == 30
+
+    # Within the refresh interval: answered from disk
+    fred_store.sync("CPIAUCSL", lambda: META, fetch_observations, now=10)
+    assert calls == [None]
+
+    # Later: a new month and a revision to the previous one
+    history["2002-07-01"] = 30.0
+    history["2002-06-01"] = 99.0
+    fred_store.sync("CPIAUCSL", lambda: META, fetch_observations, now=cache.TTLS["series"] + 1)
+    assert calls == [None, "2002-04-01"]
+    assert store.recent("CPIAUCSL", 2) == [("2002-06-01", 99.0), ("2002-07-01", 30.0)]
+
+
+def test_unknown_series(store, monkeypatch):
+    assert fred_store.series("NOPE", lambda: None, lambda start: []) == (None, [])
+
+    def rejected(start):
+        raise LookupError("Bad Request.  The series does not exist.")
+
+    assert fred_store.series("NOPE", lambda: None, rejected) == (None, [])
+    monkeypatch.setattr(fred, "_fetch_meta", lambda series_id: None)
+    monkeypatch.setattr(fred, "_fetch_observations", lambda series_id, start: rejected(start))
+    assert fred.query_fred("NOPE").startswith("FRED series 'NOPE' not found")
+    with pytest.raises(LookupError):
+        fred_store.series("CPIAUCSL", lambda: META, rejected)  # a known series still reports the error
+
+
+def test_resolve_from_local_index(store):
+    store.put_meta("CPIAUCSL", META, 0)
+    assert fred_store.resolve("inflation", fred.SERIES_ALIASES) == "CPIAUCSL"
+    assert fred_store.resolve("consumer price", fred.SERIES_ALIASES) == "CPIAUCSL"
+    assert fred_store.resolve("PAYEMS", fred.SERIES_ALIASES) == "PAYEMS"
+
+
+def test_parse_span():
+    assert fred._parse_span("CPI over the last 20 years") == (
+        "CPI", (date.today() - timedelta(days=20 * 365.25)).isoformat(),
+    )
+    assert fred._parse_span("UNRATE 6m")[0] == fred._parse_span("UNRATE last 6m")[0] == "UNRATE"
+    assert fred._parse_span("GDP since 2005") == ("GDP", "2005-01-01")
+    assert fred._parse_span("2 year treasury") == ("2 year treasury", None)
@@ -0,0 +1,82 @@
+"""Unit tests for the headless batch mode. No network or LLM needed.
+
+Run:  python -m pytest test_headless.py -v
+"""
+
+import asyncio
+import io
+import json
+import uuid
+
+import pytest
+
+import headless
+import main
+
+
+class FakeExecutor:
+    """Stands in for the AgentExecutor: one tool call per query, 'fail' raises."""
+
+    def __init__(self):
+        self.in_flight = self.peak = 0
+
+    async def ainvoke(self, inputs, config):
+        timings = config["callbacks"][0]
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            run_id = uuid.uuid4()
+            timings.on_tool_start({"name": "binance"}, inputs["input"], run_id=run_id)
+            await asyncio.sleep(0.01)
+            timings.on_tool_end("BTC: 67000", run_id=run_id)
+            if inputs["input"] == "fail":
+                raise RuntimeError("backend down")
+            return {"output": f"answer to {inputs['input']}"}
+        finally:
+            self.in_flight -= 1
+
+
+def test_read_queries_accepts_jsonl_requests_shape_and_text():
+    lines = [
+        '{"id": "q1", "query": "BTC price?"}',
+        '{"request_id": "user-001", "title": "t", "body": "CPI trend"}',
+        "",
+        "# comment",
+        "AAPL RSI",
+    ]
+    assert list(headless.read_queries(lines)) == [
+        {"id": "q1", "query": "BTC price?"},
+        {"id": "user-001", "query": "CPI trend"},
+        {"id": "5", "query": "AAPL RSI"},
+    ]
+    with pytest.raises(ValueError, match="line 1"):
+        list(headless.read_queries(['{"id": 1}']))
+
+
+def test_run_bounds_concurrency_and_records_tool_timings():
+    executor, out = FakeExecutor(), io.StringIO()
+    items = [{"id": str(i), "query": "fail" if i == 3 else f"q{i}"} for i in range(8)]
+    records = asyncio.run(headless.run(executor, items, 3, out))
+
+    assert executor.peak == 3
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len(lines) == 8 and sorted(r["id"] for r in lines) == [str(i) for i in range(8)]
+    failed = [r for r in records if not r["ok"]]
+    assert [r["id"] for r in failed] == ["3"] and "backend down" in failed[0]["error"]
+    tool = records[0]["tools"][0]
+    assert tool["tool"] == "binance" and tool["seconds"] >= 0.01 and tool["chars"] == 10
+    assert "8 queries (1 failed)" in headless.summarize(records, 1.0)
+
+
+def test_main_keeps_stdout_pure_jsonl(monkeypatch, capsys, tmp_path):
+    def warm_up():
+        print("Using Groq (auto-detected) — free tier")  # as config.get_llm does
+        return FakeExecutor()
+
+    monkeypatch.setattr(main, "warm_up", warm_up)
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text('{"id": "a", "query": "BTC?"}\n{"id": "b", "query": "ETH?"}\n')
+    assert headless.main([str(queries)]) == 0
+    captured = capsys.readouterr()
+    assert sorted(json.loads(line)["id"] for line in captured.out.splitlines()) == ["a", "b"]
+    assert "Using Groq" in captured.err
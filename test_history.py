@@ -0,0 +1,44 @@
+"""Unit tests for the bounded REPL chat history. No network needed.
+
+Run:  python -m pytest test_history.py -v
+"""
+
+from history import ChatHistory
+
+QUOTE = "AAPL: Price=272.80 Open=267.15 High=273.39 Low=266.68 Volume=64711690"
+
+
+def test_window_rolls_into_summary_under_cap():
+    chat = ChatHistory(max_tokens=10_000, max_turns=3)
+    for i in range(5):
+        chat.add(f"question {i}", f"answer {i}\nsecond line", prompt_tokens=100 + i)
+
+    assert [t.query for t in chat.turns] == ["question 2", "question 3", "question 4"]
+    assert chat.summarized == 2
+    assert chat.summary == "- Q: question 0 -> A: answer 0\n- Q: question 1 -> A: answer 1"
+    assert "(2 turns)" in chat.summary_prompt()
+    assert [m.type for m in chat.messages()] == ["human", "ai"] * 3
+    assert [e["prompt_tokens"] for e in chat.log] == [100, 101, 102, 103, 104]
+
+    small = ChatHistory(max_tokens=60, max_turns=10)
+    for i in range(10):
+        small.add(f"question {i}", "a fairly long answer " * 3)
+    assert sum(t.tokens() for t in small.turns) <= small.max_tokens
+    assert len(small.turns) < 10 and small.summarized == 10 - len(small.turns)
+
+
+def test_tool_data_deduplicated_then_dropped_first():
+    chat = ChatHistory(max_tokens=10_000, max_turns=5)
+    chat.add("AAPL price?", "272.80", [("yahoo_finance", "AAPL", QUOTE)])
+    chat.add("and now?", "273.10", [("yahoo_finance", "AAPL", QUOTE), ("yahoo_finance", "AAPL", QUOTE + " new")])
+    first, second = chat.turns
+    assert first.tool_data == [] and first.text() == "272.80"
+    assert second.tool_data == [("yahoo_finance", "AAPL", QUOTE + " new")]
+    assert "[yahoo_finance(AAPL)]" in second.text()
+
+    # Over the cap: tool data goes before any turn is summarized
+    chat.add("MSFT?", "510.00", [("polygon", "MSFT", QUOTE.replace("AAPL", "MSFT"))])
+    chat.max_tokens = chat.turns[0].tokens() + chat.turns[1].tokens() + chat.turns[2].tokens() - 5
+    chat.add("thanks", "You're welcome.")
+    assert chat.summarized == 0 and len(chat.turns) == 4
+    assert chat.turns[1].tool_data == [] and chat.turns[2].tool_data
@@ -0,0 +1,136 @@
+"""Unit tests for the local indicator engine. No network needed.
+
+Run:  python -m pytest test_indicators.py -v
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from providers import alpha_vantage, bar_store, indicators
+from providers.bar_store import BarStore
+from providers.ratelimit import RateLimited
+
+DAY = 86400
+
+
+def _bars(n=400, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    high = close * (1 + rng.uniform(0, 0.02, n))
+    low = close * (1 - rng.uniform(0, 0.02, n))
+    start = bar_store.day_ts(time.time()) - (n - 1) * DAY  # ending today
+    return [(start + i * DAY, c, h, l, c, 1000.0) for i, (h, l, c) in enumerate(zip(high, low, close))]
+
+
+def test_recursive_average_matches_plain_loop():
+    x = np.random.default_rng(0).normal(100, 5, 1000)
+    for alpha in (2 / 3, 2 / 21, 1 / 14, 2 / 201):
+        expected = [x[0]]
+        for value in x[1:]:
+            expected.append(expected[-1] + alpha * (value - expected[-1]))
+        np.testing.assert_allclose(indicators._recurse(x, alpha, x[0]), expected, rtol=1e-9)
+
+
+def test_known_values():
+    close = np.arange(1.0, 31.0)
+    np.testing.assert_allclose(indicators.sma(close, 5)[4:], close[2:-2])
+    assert np.isnan(indicators.sma(close, 5)[3])
+    assert indicators.rsi(close, 14)[-1] == 100.0  # only gains
+    assert np.isnan(indicators.rsi(close, 14)[13])
+    upper, middle, lower = indicators.bbands(np.full(30, 7.0))
+    assert upper[-1] == middle[-1] == lower[-1] == 7.0
+
+
+@pytest.mark.parametrize("name, params", [
+    ("SMA", (10,)), ("EMA", (20,)), ("RSI", (14,)), ("MACD", (12, 26, 9)),
+    ("BBANDS", (20, 2.0)), ("STOCH", (14, 3)), ("ATR", (14,)), ("ADX", (14,)),
+])
+def test_streaming_matches_vectorized(name, params):
+    bars = _bars()
+    _, values = indicators.compute(name, bars, params)
+    columns = list(values.values())
+    state = indicators.streaming(name, params)
+    for i, row in enumerate(bars):
+        got = state.update(row)
+        if got is None:
+            continue
+        got = got if isinstance(got, tuple) else (got,)
+        np.testing.assert_allclose(got, [col[i] for col in columns], rtol=1e-7, atol=1e-7)
+    assert got is not None
+
+
+def test_close_only_bars_keep_close_indicators(monkeypatch):
+    bars = _bars()
+    close_only = [(ts, np.nan, np.nan, np.nan, c, np.nan) for ts, _, _, _, c, _ in bars]  # CoinGecko shape
+    for name in ("SMA", "EMA", "RSI", "MACD", "BBANDS"):
+        ts, values = indicators.compute(name, close_only)
+        expected_ts, expected = indicators.compute(name, bars)
+        np.testing.assert_array_equal(ts, expected_ts)
+        for col in values:
+            np.testing.assert_allclose(values[col], expected[col], equal_nan=True)
+    assert not len(indicators.compute("ATR", close_only)[0])
+
+    monkeypatch.setattr(indicators, "load_bars", lambda symbol, n: ("coingecko", close_only[-n:]))
+    summary = indicators.query_indicators("BTC")
+    assert "RSI(14): RSI=" in summary and "ATR(14): N/A" in summary
+
+
+def test_history_backfills_store_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "STORE", BarStore(tmp_path / "bars.sqlite"))
+    full = _bars(300)
+    calls = []
+
+    def fetch_tail(since):
+        calls.append(since)
+        if since is None:
+            return full[-5:]
+        return [b for b in full if b[0] >= since]
+
+    bars = bar_store.history("p", "X", "1d", fetch_tail, 300, days_per_bar=1)
+    assert len(bars) == 300 and bars[-1] == full[-1]
+    calls.clear()
+    assert len(bar_store.history("p", "X", "1d", fetch_tail, 300)) == 300
+    assert calls == [full[-2][0]]  # just the incremental tail
+
+
+def test_query_and_rate_limit_fallback(monkeypatch):
+    bars = _bars()
+    monkeypatch.setattr(indicators, "load_bars", lambda symbol, n: ("yahoo_finance", bars[-n:]))
+
+    result = indicators.query_indicators("aapl macd 5 35 last 3")
+    assert result.startswith("Local MACD(5, 35, 9) for AAPL")
+    assert len(result.splitlines()) == 4 and "Hist=" in result
+    assert "ADX(14): ADX=" in indicators.query_indicators("AAPL")
+
+    def limited(*args, **kwargs):
+        raise RateLimited("alpha_vantage rate limit reached")
+
+    monkeypatch.setattr(alpha_vantage, "get_json", limited)
+    result = alpha_vantage.query_alpha_vantage("AAPL RSI")
+    assert result.startswith("Alpha Vantage rate limit reached; computed locally")
+    assert "Local RSI(14) for AAPL" in result
+
+
+def test_sync_feeds_live_indicators(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "STORE", BarStore(tmp_path / "bars.sqlite"))
+    monkeypatch.setattr(indicators, "_live", {})
+    full = _bars(300)
+    partial = list(full[-1])
+    partial[4] *= 1.05  # today's bar, before the close
+    feed = full[:-1] + [tuple(partial)]
+
+    def fetch_tail(since):
+        return feed[-5:] if since is None else [b for b in feed if b[0] >= since]
+
+    bar_store.STORE.upsert("p", "X", "1d", full[:-10])
+    indicators.live("p", "X", "1d", full[:-10])
+    bar_store.sync("p", "X", "1d", fetch_tail)  # nine new bars and a partial one
+    feed = full
+    bar_store.sync("p", "X", "1d", fetch_tail)  # the partial bar closes
+    latest = indicators.live("p", "X", "1d", [])
+    for name, value in latest.items():
+        _, values = indicators.compute(name, full)
+        value = value if isinstance(value, tuple) else (value,)
+        np.testing.assert_allclose(value, [col[-1] for col in values.values()], rtol=1e-7)
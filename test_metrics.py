@@ -0,0 +1,54 @@
+"""Unit tests for tool, HTTP and LLM instrumentation. No network or LLM needed.
+
+Run:  python -m pytest test_metrics.py -v
+"""
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+import stub_server
+from providers import cache, metrics, registry, replay, transport
+
+
+def test_http_time_is_attributed_to_the_tool_across_pools():
+    with metrics.tool_call("metrics_test_tool") as call:
+        transport.gather(
+            lambda: metrics.http_request("metrics_test", 0.1, 100, 1, ok=True),
+            lambda: metrics.http_request("metrics_test", 0.2, 50, 0, ok=False),
+        )
+        call["output"] = "Metrics test error: upstream down"
+    assert metrics.TOOL_HTTP_SECONDS.get(("metrics_test_tool",)) == pytest.approx(0.3)
+    assert metrics.TOOL_HTTP_BYTES.get(("metrics_test_tool",)) == 150
+    assert metrics.TOOL_CALLS.get(("metrics_test_tool", "error")) == 1
+    assert metrics.HTTP_RETRIES.get(("metrics_test",)) == 1 and metrics.HTTP_ERRORS.get(("metrics_test",)) == 1
+
+    text = metrics.render()
+    assert 'agent_tool_calls_total{tool="metrics_test_tool",outcome="error"} 1' in text
+    assert 'agent_http_request_seconds_bucket{provider="metrics_test",le="0.25"} 2' in text
+    assert 'agent_http_request_seconds_count{provider="metrics_test"} 2' in text
+    assert "metrics_test_tool" in metrics.report()
+
+
+def test_lazy_tool_records_payload_bytes_and_cache_hits(monkeypatch, tmp_path):
+    server = stub_server.serve("fixtures/sample")
+    monkeypatch.setattr(replay, "STUB_URL", server.url)
+    cache.CACHE.clear()
+    try:
+        tool = registry.lazy_tool(registry.spec("coingecko"))
+        before = metrics.HTTP_BYTES.get(("coingecko",))
+        assert "Bitcoin" in tool.func("BTC") and "Bitcoin" in tool.func("BTC")
+    finally:
+        server.shutdown()
+    assert metrics.HTTP_BYTES.get(("coingecko",)) > before
+    assert metrics.TOOL_CACHE.get(("coingecko", "hit")) >= 1 and metrics.TOOL_CACHE.get(("coingecko", "miss")) >= 1
+
+    path = tmp_path / "agent.prom"
+    metrics.write(str(path))
+    assert 'agent_tool_seconds_count{tool="coingecko"}' in path.read_text()
+
+
+def test_llm_handler_counts_calls():
+    before = metrics.LLM_SECONDS.count()
+    llm = FakeListChatModel(responses=["hi"], callbacks=[metrics.llm_handler()])
+    llm.invoke("hello")
+    assert metrics.LLM_SECONDS.count() == before + 1 and metrics.LLM_CALLS.get(("ok",)) >= 1
@@ -0,0 +1,47 @@
+"""Unit tests for compact tool output and token budgets. No network needed.
+
+Run:  python -m pytest test_output.py -v
+"""
+
+from collections import defaultdict
+
+from providers import output
+
+POLYGON = """Polygon.io daily aggregates for AAPL:
+  2026-10-16: Open=267.15 High=273.39 Low=266.68 Close=272.80 Volume=64711690
+  2026-10-15: Open=262.29 High=268.22 Low=259.92 Close=267.15 Volume=62782533
+
+  Name: Apple Inc.
+  Market: stocks"""
+
+
+def test_compact_rows_fields_and_numbers():
+    assert output.compact(POLYGON) == (
+        "Polygon.io daily aggregates for AAPL:\n"
+        "date,Open,High,Low,Close,Volume\n"
+        "2026-10-16,267.15,273.39,266.68,272.8,64.71M\n"
+        "2026-10-15,262.29,268.22,259.92,267.15,62.78M\n"
+        "Name=Apple Inc.; Market=stocks"
+    )
+    assert output.compact("  Market Cap: $1,319,900,000,000\n  24h Change: 1.20%") == (
+        "Market Cap=$1.32T; 24h Change=1.2%"
+    )
+    assert output.compact("Source     Last  Volume\nyahoo    272.80  64,711,690") == (
+        "Source,Last,Volume\nyahoo,272.8,64.71M"
+    )
+    assert output.count_tokens(output.compact(POLYGON)) < output.count_tokens(POLYGON)
+
+
+def test_budget_cuts_at_line_boundary(monkeypatch):
+    text = "\n".join(f"2026-01-{d:02d}: {d}.5" for d in range(1, 31))
+    cut, truncated = output.fit(text, 40)
+    assert truncated and output.count_tokens(cut) < output.count_tokens(text)
+    assert cut.startswith("2026-01-01: 1.5") and "more lines cut" in cut.splitlines()[-1]
+    assert output.fit(text, 0) == (text, False)
+
+    monkeypatch.setenv("TOOL_TOKEN_BUDGET_FRED", "40")
+    monkeypatch.setattr(output, "_stats", defaultdict(output._stats.default_factory))
+    assert output.shape("fred", text) == cut
+    assert output.shape("polygon", POLYGON) == POLYGON  # full mode, no budget
+    stats = output.stats()
+    assert stats["fred"]["truncated"] == 1 and stats["fred"]["sent"] < stats["fred"]["raw"]
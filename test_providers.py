@@ -156,4 +156,6 @@ def test_tool_loading():
     assert "yahoo_finance" in names
     assert "binance" in names
     assert "coingecko" in names
-    assert len(tools) >= 3
+    assert "consensus_quote" in names
+    assert "technical_indicators" in names
+    assert len(tools) >= 5
@@ -0,0 +1,73 @@
+"""Unit tests for the rate-limit scheduler. No network needed.
+
+Run:  python -m pytest test_ratelimit.py -v
+"""
+
+import threading
+import time
+
+import pytest
+
+from providers import ratelimit
+
+
+def test_burst_queues_instead_of_failing():
+    scheduler = ratelimit.Scheduler({"p": "2/sec"})
+    start = time.monotonic()
+    for _ in range(4):
+        assert scheduler.acquire("p")
+    # two immediate, then one every 0.5s
+    assert 0.9 <= time.monotonic() - start < 1.5
+    budget = scheduler.budget()["p"]
+    assert budget["limit"] == "2/sec"
+    assert budget["requests"] == 4 and budget["waits"] == 2
+
+
+def test_rejects_when_wait_exceeds_max(monkeypatch):
+    monkeypatch.setattr(ratelimit, "MAX_WAIT", 5)
+    scheduler = ratelimit.Scheduler({"p": "5/min,1/day"})
+    scheduler.acquire("p")
+    assert not scheduler.has_capacity("p")
+    assert scheduler.remaining("p") == 0
+    assert scheduler.acquire("p", blocking=False) is False
+    with pytest.raises(ratelimit.RateLimited, match="1 per day"):
+        scheduler.acquire("p")
+    assert scheduler.budget()["p"]["rejected"] == 1
+    # unlimited providers never wait
+    assert scheduler.acquire("other") and scheduler.remaining("other") is None
+
+
+def test_back_off_holds_even_unlimited_providers(monkeypatch):
+    monkeypatch.setattr(ratelimit, "MAX_WAIT", 5)
+    scheduler = ratelimit.Scheduler({"p": "5/min"})
+    scheduler.back_off("p", 60)
+    scheduler.back_off("other", 0.05)
+    assert not scheduler.has_capacity("p") and scheduler.has_capacity("other")
+    with pytest.raises(ratelimit.RateLimited, match="asked us to back off"):
+        scheduler.acquire("p")
+    start = time.monotonic()
+    assert scheduler.acquire("other") and time.monotonic() - start >= 0.04
+
+
+def test_single_flight_coalesces_identical_calls():
+    flight = ratelimit.SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return "data"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", fetch))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+    assert results == ["data"] * 4
+    assert len(calls) == 1 and flight.coalesced == 3
+    # the key is free again once the call completes
+    assert flight.do("k", lambda: "fresh") == "fresh"
@@ -0,0 +1,59 @@
+"""Unit tests for the lazy provider registry and start-up timing. No network needed.
+
+Run:  python -m pytest test_registry.py -v
+"""
+
+import asyncio
+import subprocess
+import sys
+import time
+
+from providers import registry
+from providers.registry import ProviderSpec
+from startup import Timeline, import_profile, package_report
+
+
+def test_get_tools_imports_no_provider_module():
+    code = (
+        "import sys, providers; tools = providers.get_tools(); "
+        "print(len(tools), sorted(m for m in sys.modules if m.startswith('providers.')))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    count, modules = out.split(" ", 1)
+    assert int(count) >= 5
+    assert modules.strip() == "['providers.registry']"
+
+
+def test_lazy_tool_imports_on_first_call(tmp_path, monkeypatch):
+    (tmp_path / "fake_provider.py").write_text(
+        "class tool:\n"
+        "    func = staticmethod(lambda q: 'sync ' + q)\n"
+        "    async def coroutine(q):\n"
+        "        return 'async ' + q\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "fake_provider", raising=False)
+    monkeypatch.setenv("FAKE_KEY", "x")
+    spec = ProviderSpec("Fake", "fake", "fake_provider", "FAKE_KEY", "A fake provider.")
+
+    tool = registry.lazy_tool(spec)
+    assert tool.name == "fake" and tool.description == "A fake provider."
+    assert "fake_provider" not in sys.modules
+    assert tool.func("AAPL") == "sync AAPL"
+    assert asyncio.run(tool.coroutine("AAPL")) == "async AAPL"
+
+    monkeypatch.delenv("FAKE_KEY")
+    assert not registry.enabled(spec)
+
+
+def test_timeline_and_import_profile():
+    timeline = Timeline()
+    with timeline.phase("work"):
+        time.sleep(0.01)
+    timeline.mark("done")
+    assert timeline.elapsed("done") >= timeline.elapsed("work") >= 0.01
+    assert "work" in timeline.report()
+
+    rows = import_profile(["json"])
+    assert any(name == "json" and cumulative > 0 for name, _, cumulative in rows)
+    assert "json" in package_report(rows)
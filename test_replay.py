@@ -0,0 +1,93 @@
+"""Unit tests for record/replay, the stub server and the benchmark helpers.
+
+Run:  python -m pytest test_replay.py -v
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import benchmark
+import stub_server
+from providers import replay, transport
+
+
+class _Origin(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path, "live": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def origin():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    transport.close_all()
+
+
+def test_fixture_key_drops_credentials_and_dates():
+    key = replay.fixture_key(
+        "/v2/aggs/ticker/AAPL/range/1/day/2026-01-02/2026-01-12",
+        {"sort": "asc", "apiKey": "secret", "period1": 1700000000, "limit": 10},
+    )
+    assert key == "/v2/aggs/ticker/AAPL/range/1/day/{date}/{date}?limit=10&sort=asc"
+
+
+def test_record_then_replay(origin, tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, "RECORD_DIR", str(tmp_path))
+    live = transport.get_json("p", f"{origin}/v1/quote", {"symbol": "X", "apikey": "k", "from": "2026-01-01"})
+    monkeypatch.setattr(replay, "RECORD_DIR", None)
+    host = origin.split("//")[1]
+    assert list(json.loads((tmp_path / f"{host}.json").read_text())) == ["/v1/quote?symbol=X"]
+
+    stub = stub_server.serve(tmp_path)
+    monkeypatch.setattr(replay, "STUB_URL", stub.url)
+    try:
+        replayed = transport.get_json("p", f"{origin}/v1/quote", {"symbol": "X", "from": "2026-02-01"})
+        assert replayed == live
+        # unknown params on a known path fall back to the closest recording
+        assert transport.get_json("p", f"{origin}/v1/quote", {"symbol": "X", "extra": 1}) == live
+        missing = transport.get(f"{origin}/v1/other")
+        assert missing.status_code == 404
+        assert dict(stub.counts) == {"served": 2, "missing": 1}
+    finally:
+        stub.shutdown()
+
+
+def test_stub_latency_and_throttling(tmp_path):
+    (tmp_path / "example.com.json").write_text(json.dumps(
+        {"/x": {"status": 200, "content_type": "application/json", "body": "{}"}}
+    ))
+    stub = stub_server.serve(tmp_path, latency=0.05, error_rate=1.0)
+    try:
+        start = time.perf_counter()
+        resp = requests.get(f"{stub.url}/example.com/x")
+        assert time.perf_counter() - start >= 0.05
+        assert resp.status_code == 429
+    finally:
+        stub.shutdown()
+
+
+def test_benchmark_measure():
+    latencies, wall, errors = benchmark.measure(
+        lambda q: "Some error" if q == "bad" else (time.sleep(0.02) or "ok"), ["a", "bad"], 4, 8,
+    )
+    assert len(latencies) == 8 and errors == 4
+    assert wall < 0.02 * 8  # ran concurrently
+    assert benchmark.percentile([1, 2, 3, 4], 50) == 2
+    assert benchmark.percentile([1, 2, 3, 4], 99) == 4
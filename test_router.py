@@ -0,0 +1,133 @@
+"""Unit tests for the market data router and provider health, with sources stubbed out.
+
+Run:  python -m pytest test_router.py -v
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from providers import health, router
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    health.reset()
+    monkeypatch.setattr(router, "HEDGE_DEFAULT", 0.2)
+
+    def install(**modules):
+        monkeypatch.setitem(router.NEEDS, "equity_quote", [(name, m, "get_quote") for name, m in modules.items()])
+    yield install
+    health.reset()
+
+
+def test_prefers_the_fastest_source_once_it_has_timings(sources, quote_source):
+    slow, fast = quote_source(1.0, delay=0.05), quote_source(2.0, delay=0.0)
+    sources(slow=slow, fast=fast)
+    for _ in range(router.MIN_SAMPLES):
+        router._call("equity_quote", "slow", slow.get_quote, ("AAPL",))
+        router._call("equity_quote", "fast", fast.get_quote, ("AAPL",))
+    routed = router.route("equity_quote", "AAPL")
+    assert routed.source == "fast" and routed.value["price"] == 2.0 and not routed.hedged
+
+
+def test_hedges_a_slow_source_and_fails_over_from_errors(sources, quote_source):
+    sources(broken=quote_source(0, error="boom"), stuck=quote_source(1.0, delay=1.0), quick=quote_source(3.0))
+    routed = router.route("equity_quote", "AAPL")
+    # broken fails at once, stuck gets HEDGE_DEFAULT seconds before quick is tried
+    assert routed.source == "quick" and routed.hedged and "broken" in routed.errors
+    assert 0.2 <= routed.seconds < 1.0
+    assert "failed over from broken" in router.query_market_data("AAPL")
+
+
+def test_open_breaker_skips_the_provider_until_cooldown(sources, quote_source):
+    down, up = quote_source(1.0), quote_source(2.0)
+    sources(down=down, up=up)
+    for _ in range(health.BREAKER_FAILURES):
+        health.observe("down", "/quote", 0.1, ok=False)
+    assert health.breaker("down").state == "open"
+    assert router.route("equity_quote", "AAPL").source == "up" and down.calls == 0
+
+    health.breaker("down").opened -= health.BREAKER_COOLDOWN
+    assert health.breaker("down").state == "half-open"
+    assert router.route("equity_quote", "AAPL").source == "down"
+    health.observe("down", "/quote", 0.1, ok=True)
+    assert health.breaker("down").state == "closed"
+
+    sources(down=down)
+    for _ in range(health.BREAKER_FAILURES):
+        health.observe("down", "/quote", 0.1, ok=False)
+    with pytest.raises(LookupError, match="down skipped \\(circuit open\\)"):
+        router.route("equity_quote", "AAPL")
+
+
+def test_half_open_breaker_admits_one_trial_call():
+    breaker = health.Breaker(failures=1, cooldown=60)
+    breaker.record(False)
+    assert not breaker.allow()
+    breaker.opened -= 60
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert sum(pool.map(lambda _: breaker.allow(), range(32))) == 1
+    breaker.record(False)  # the trial failed: open again
+    assert breaker.state == "open" and not breaker.allow()
+
+    breaker.opened -= 60
+    assert breaker.allow() and not breaker.allow()
+    breaker.probe -= 60  # the trial never reported back
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+
+def test_fastest_base_url_is_probed_once_and_demoted_on_failure(monkeypatch):
+    health.reset()
+    probes = []
+    latency = {"https://a.example": None, "https://b.example": 0.02, "https://c.example": 0.01}
+
+    def ping(url):
+        probes.append(url)
+        base = url.rsplit("/", 1)[0]
+        if latency[base] is None:
+            raise OSError("unreachable")
+        return latency[base]
+
+    monkeypatch.setattr(health, "_ping", ping)
+    urls = list(latency)
+    assert health.fastest("x", urls) == ["https://c.example", "https://b.example", "https://a.example"]
+    assert health.fastest("x", urls)[0] == "https://c.example" and len(probes) == 3
+    health.demote("x", "https://c.example")
+    assert health.fastest("x", urls) == ["https://b.example", "https://a.example", "https://c.example"]
+    health.reset()
+
+
+def test_crypto_bars_use_each_source_symbol_and_render_close_only_bars(monkeypatch):
+    from providers.bars import Bars
+
+    health.reset()
+    seen = {}
+
+    def source(name, bars=None):
+        class Source:
+            tool = object()
+
+            @staticmethod
+            def history(symbol, n):
+                seen[name] = symbol
+                if bars is None:
+                    raise LookupError("no such symbol")
+                return bars
+
+        return Source
+
+    nan = float("nan")
+    close_only = Bars([86400, 2 * 86400], [nan, nan], [nan, nan], [nan, nan], [100.0, 101.0], [5.0, nan])
+    monkeypatch.setitem(router.NEEDS, "crypto_bars", [
+        ("binance", source("binance"), "history"),
+        ("yahoo_finance", source("yahoo_finance"), "history"),
+        ("polygon", source("polygon"), "history"),
+        ("coingecko", source("coingecko", close_only), "history"),
+    ])
+    out = router.query_market_data("bars BTCUSDT 2")
+    assert seen == {"binance": "BTCUSDT", "yahoo_finance": "BTC-USD", "polygon": "X:BTCUSD", "coingecko": "BTCUSDT"}
+    assert "via coingecko" in out and "O=N/A H=N/A L=N/A C=101.00 V=N/A" in out
+    health.reset()
@@ -0,0 +1,82 @@
+"""Tests for the HTTP service mode with a scripted chat model. No network or LLM needed.
+
+Run:  python -m pytest test_server.py -v
+"""
+
+import json
+from concurrent.futures import Future
+
+import pytest
+import requests
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain.tools import Tool
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+import server
+
+
+class ScriptedModel(FakeMessagesListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@pytest.fixture
+def agent_server():
+    echo = Tool(name="echo", func=lambda q: f"echo {q}", description="Echo the input")
+    llm = ScriptedModel(responses=[
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"__arg1": "BTC"}, "id": "1"}]),
+        AIMessage(content="BTC is up"),
+    ])
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You answer questions.{history_summary}"),
+        MessagesPlaceholder("chat_history"),
+        ("human", "{input}"),
+        MessagesPlaceholder("agent_scratchpad"),
+    ])
+    executor = AgentExecutor(
+        agent=create_tool_calling_agent(llm, [echo], prompt), tools=[echo], return_intermediate_steps=True,
+    )
+    ready = Future()
+    ready.set_result(executor)
+    service = server.AgentService(workers=2, queue_size=0, warmup=ready)
+    service._tools = {"echo": echo}
+    httpd = server.serve(service=service)
+    yield httpd
+    httpd.shutdown()
+
+
+def test_query_stream_and_session_history(agent_server):
+    url = agent_server.url
+    first = requests.post(f"{url}/query", json={"query": "How is BTC doing?"}, timeout=10).json()
+    assert first["answer"] == "BTC is up" and first["tools"][0]["tool"] == "echo"
+
+    resp = requests.post(
+        f"{url}/query", json={"query": "Is BTC up today?", "session": first["session"], "stream": True},
+        stream=True, timeout=10,
+    )
+    events = [json.loads(line[len("data: "):]) for line in resp.iter_lines(decode_unicode=True) if line.startswith("data: ")]
+    kinds = [e["type"] for e in events]
+    assert kinds[0] == "session" and kinds[-1] == "answer" and "tool_start" in kinds
+    assert next(e for e in events if e["type"] == "tool_start")["input"] == "BTC"
+
+    service = agent_server.service
+    assert len(service.sessions[first["session"]].history.turns) == 2
+    assert requests.get(f"{url}/health", timeout=10).json()["sessions"] == 1
+    assert requests.delete(f"{url}/sessions/{first['session']}", timeout=10).status_code == 200
+
+
+def test_direct_tool_calls_and_backpressure(agent_server):
+    url = agent_server.url
+    assert requests.post(f"{url}/tools/echo", json={"input": "ETH"}, timeout=10).json()["output"] == "echo ETH"
+    assert requests.get(f"{url}/tools/echo", params={"input": "SOL"}, timeout=10).json()["output"] == "echo SOL"
+    assert requests.post(f"{url}/tools/nope", json={}, timeout=10).status_code == 404
+    metrics = requests.get(f"{url}/metrics", timeout=10)
+    assert metrics.headers["Content-Type"].startswith("text/plain") and "# TYPE agent_tool_seconds histogram" in metrics.text
+
+    service = agent_server.service
+    service.pending = service.capacity
+    resp = requests.post(f"{url}/query", json={"query": "BTC?"}, timeout=10)
+    assert resp.status_code == 503 and resp.headers["Retry-After"] == "1"
+    service.pending = 0
@@ -0,0 +1,77 @@
+"""Tests for streamed agent output with a scripted, streaming chat model. No network needed.
+
+Run:  python -m pytest test_streaming.py -v
+"""
+
+import asyncio
+
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain.tools import Tool
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+import main
+import streaming
+
+
+class StreamingModel(FakeMessagesListChatModel):
+    """Replays `responses`, streaming text word by word and tool calls in one chunk."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._generate(messages).generations[0].message
+        if message.tool_calls:
+            chunks = [{"name": c["name"], "args": '{"__arg1": "BTC"}', "id": c["id"], "index": 0}
+                      for c in message.tool_calls]
+            yield ChatGenerationChunk(message=AIMessageChunk(content="Checking. ", tool_call_chunks=chunks))
+            return
+        for word in message.content.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+
+def _executor():
+    llm = StreamingModel(responses=[
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"__arg1": "BTC"}, "id": "1"}]),
+        AIMessage(content="BTC is up 2% today"),
+    ])
+    echo = Tool(name="echo", func=lambda q: f"got {q}", description="Echo the input")
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "x"), MessagesPlaceholder("chat_history"), ("human", "{input}"), MessagesPlaceholder("agent_scratchpad"),
+    ])
+    return AgentExecutor(
+        agent=create_tool_calling_agent(llm, [echo], prompt), tools=[echo], return_intermediate_steps=True,
+    )
+
+
+def test_chunk_text_handles_content_blocks():
+    assert streaming.chunk_text("BTC") == "BTC"
+    assert streaming.chunk_text([
+        {"type": "text", "text": "BTC "}, {"type": "tool_use", "id": "1"}, {"type": "text", "text": "is up"},
+    ]) == "BTC is up"
+
+
+def test_repl_prints_tokens_and_tool_calls_as_they_arrive(capsys):
+    answer, first_token = asyncio.run(main.stream_answer(_executor(), {"input": "BTC?", "chat_history": []}))
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1:3] == ["Checking. ", "  -> echo(BTC)"]
+    assert lines[3].startswith("  <- echo ") and lines[4].rstrip() == "BTC is up 2% today"
+    assert answer["text"].strip() == "BTC is up 2% today" and answer["steps"] == [("echo", "BTC", "got BTC")]
+    assert first_token is not None
+
+
+def test_agent_llm_is_the_model_the_agent_calls():
+    class ToolBindingModel(StreamingModel):
+        def bind_tools(self, tools, **kwargs):
+            return self.bind(tools=[t.name for t in tools])
+
+    executor = _executor()
+    assert isinstance(main.agent_llm(executor), StreamingModel)
+    llm = ToolBindingModel(responses=[AIMessage(content="summary")])
+    echo = Tool(name="echo", func=lambda q: q, description="Echo the input")
+    prompt = ChatPromptTemplate.from_messages([("human", "{input}"), MessagesPlaceholder("agent_scratchpad")])
+    executor = AgentExecutor(agent=create_tool_calling_agent(llm, [echo], prompt), tools=[echo])
+    assert main.agent_llm(executor) is llm  # the summarizer shares its callbacks, so /stats sees its tokens
@@ -0,0 +1,107 @@
+"""Unit tests for the shared HTTP transport, against a local server.
+
+Run:  python -m pytest test_transport.py -v
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from providers import transport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    failures_left = 0
+    failure_status = 503
+    ports = set()
+
+    def do_GET(self):
+        _Handler.ports.add(self.client_address[1])
+        if _Handler.failures_left:
+            _Handler.failures_left -= 1
+            self.send_response(_Handler.failure_status)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    _Handler.ports.clear()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    transport.close_all()
+
+
+def test_one_session_per_host_reuses_connection(server):
+    assert transport.session_for(f"{server}/a") is transport.session_for(f"{server}/b")
+    for _ in range(3):
+        assert transport.get_json("test", f"{server}/ping")["path"] == "/ping"
+    assert len(_Handler.ports) == 1
+
+
+def test_retries_5xx_with_backoff(server):
+    _Handler.failures_left = 2
+    assert transport.get_json("test", f"{server}/flaky")["path"] == "/flaky"
+    assert _Handler.failures_left == 0
+
+
+def test_429_is_retried_through_the_rate_limiter(server, monkeypatch):
+    acquired, held = [], []
+    monkeypatch.setattr(transport.ratelimit, "acquire", lambda provider: acquired.append(provider))
+    monkeypatch.setattr(transport.ratelimit, "back_off", lambda provider, seconds: held.append(seconds))
+    monkeypatch.setattr(_Handler, "failure_status", 429)
+    _Handler.failures_left = 2
+    assert transport.get_json("test", f"{server}/busy")["path"] == "/busy"
+    assert acquired == ["test"] * 3 and held == [0.0, 0.0]  # each retry took its own slot
+
+
+def test_gather_runs_calls_concurrently_in_order():
+    def slow(value):
+        time.sleep(0.2)
+        return value
+
+    start = time.perf_counter()
+    assert transport.gather(lambda: slow(1), lambda: slow(2), lambda: slow(3)) == [1, 2, 3]
+    assert time.perf_counter() - start < 0.35
+
+
+def test_gather_propagates_errors():
+    def boom():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        transport.gather(lambda: 1, boom)
+
+
+def test_tool_coroutines_run_concurrently():
+
+
+    def slow_query(query: str) -> str:
+        time.sleep(0.2)
+        return query.upper()
+
+    async def both():
+        run = transport.to_coroutine(slow_query)
+        return await asyncio.gather(run("aapl"), run("msft"))
+
+    start = time.perf_counter()
+    assert asyncio.run(both()) == ["AAPL", "MSFT"]
+    assert time.perf_counter() - start < 0.35